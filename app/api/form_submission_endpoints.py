@@ -1,17 +1,31 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Header, Request, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.formparsers import MultiPartParser, MultiPartException
+import json
 import uuid
-from app.schemas.form_submission import FormSubmissionRequest, FormSubmissionResponse
-from app.services.form_filling_agent import run_humana_form_filling_agent
+from app.schemas.form_submission import FormSubmissionRequest, FormSubmissionResponse, BulkFormSubmissionRequest
+from app.services.agent_worker_pool import agent_worker_pool
 from app.services.dataverse_form_data_service import DataverseFormDataService
+from app.services.bulk_submission import bulk_submission_manager
+from app.services.attachment_store import attachment_store, AttachmentError
+from app.services.job_scheduler import job_scheduler, lane_for_form, QueueFullError, SchedulerUnavailableError
+from app.services.agent_profiles import get_profile, UnknownProfileError
+from app.services.job_store import job_store, ACTIVE_STATES
+from app.services.event_stream import event_stream
 from app.utils.config import Config
 from app.utils.logger import logger
 from app.utils.agent_tracker import agent_tracker
 
 router = APIRouter()
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 async def process_form_submission_background(request: FormSubmissionRequest, request_id: str):
     """Background task for form submission processing"""
+    logger.bind(request_id=request_id)
     try:
+        await job_store.mark_running(request_id)
         agent_tracker.log_action(request_id, "🚀 STARTING HUMANA FORM FILLING IN BACKGROUND")
         logger.header("🚀 STARTING HUMANA FORM FILLING IN BACKGROUND")
         logger.start_timer()
@@ -21,13 +35,15 @@ async def process_form_submission_background(request: FormSubmissionRequest, req
         Config.validate()
         
         # Fetch form data from Dataverse
-        agent_tracker.log_action(request_id, "🔍 Fetching form data from Dataverse")
-        form_data_service = DataverseFormDataService()
-        data = form_data_service.fetch_form_data_by_account_id(request.account_id)
+        with agent_tracker.phase(request_id, "fetch"):
+            agent_tracker.log_action(request_id, "🔍 Fetching form data from Dataverse")
+            form_data_service = DataverseFormDataService()
+            data = await form_data_service.fetch_form_data_by_account_id(request.account_id)
         
         if not data:
             agent_tracker.log_action(request_id, "❌ Failed to fetch form data from Dataverse")
             logger.error("Failed to fetch form data from Dataverse")
+            await job_store.mark_failed(request_id, "Failed to fetch form data from Dataverse")
             return
         
         # Merge custom data if provided
@@ -35,35 +51,220 @@ async def process_form_submission_background(request: FormSubmissionRequest, req
             data.update(request.custom_data)
         
         # Run the Humana form filling agent
-        agent_tracker.log_action(request_id, "🤖 Starting form filling agent")
-        await run_humana_form_filling_agent(data, request_id)
+        with agent_tracker.phase(request_id, "agent"):
+            agent_tracker.log_action(request_id, "🤖 Starting form filling agent")
+            result = await agent_worker_pool.run("form", request_id, data, request_id, request.agent_profile)
+        await job_store.mark_completed(request_id, result)
         agent_tracker.log_action(request_id, "✅ Form filling agent completed successfully")
         logger.success("✅ Form filling agent completed successfully")
         logger.end_timer()
         
     except Exception as e:
+        await job_store.mark_failed(request_id, str(e))
         agent_tracker.log_action(request_id, "❌ Background form submission failed", str(e))
         logger.error(f"Background form submission failed: {e}")
+    finally:
+        agent_tracker.finish_request(request_id)
+
+def _body_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413, detail=f"Request body is larger than {Config.ATTACHMENT_MAX_REQUEST_BYTES} bytes"
+    )
+
+async def _limited_stream(http_request: Request):
+    """The request body, failing as soon as it grows past ATTACHMENT_MAX_REQUEST_BYTES"""
+    limit = Config.ATTACHMENT_MAX_REQUEST_BYTES
+    received = 0
+    async for chunk in http_request.stream():
+        received += len(chunk)
+        if limit and received > limit:
+            raise _body_too_large()
+        yield chunk
 
-@router.post("/submit-form", response_model=FormSubmissionResponse)
-async def submit_form(request: FormSubmissionRequest, background_tasks: BackgroundTasks):
-    """Submit form - returns immediately, processes in background"""
+async def _read_form(http_request: Request):
+    """Parse a multipart body, enforcing the size limit before and while it is spooled to disk"""
+    limit = Config.ATTACHMENT_MAX_REQUEST_BYTES
+    content_length = http_request.headers.get("content-length", "")
+    if limit and content_length.isdigit() and int(content_length) > limit:
+        raise _body_too_large()
+    parser = MultiPartParser(http_request.headers, _limited_stream(http_request), max_files=Config.ATTACHMENT_MAX_FILES)
+    try:
+        return await parser.parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+async def _close_form(form):
+    if form is not None:
+        await form.close()
+
+async def _read_submission(http_request: Request) -> tuple[FormSubmissionRequest, list]:
+    """Parse a JSON body, or a multipart body with a JSON "request" field and "attachments" files"""
+    form = None
+    try:
+        if http_request.headers.get("content-type", "").startswith("multipart/form-data"):
+            # Starlette spools file parts to disk past 1 MB, they are never held whole in memory
+            form = await _read_form(http_request)
+            raw_fields = form.get("request") or "{}"
+            if not isinstance(raw_fields, str):
+                raise HTTPException(status_code=422, detail='The "request" field must be JSON text, not a file')
+            fields = json.loads(raw_fields)
+            uploads = [part for part in form.getlist("attachments") if not isinstance(part, str)]
+        else:
+            fields = await http_request.json()
+            uploads = []
+        return FormSubmissionRequest.model_validate(fields), uploads
+    except json.JSONDecodeError as e:
+        await _close_form(form)
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    except ValidationError as e:
+        await _close_form(form)
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    except HTTPException:
+        await _close_form(form)
+        raise
+
+# The body is parsed by hand to accept JSON or multipart, so document both for /docs
+SUBMIT_FORM_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": FormSubmissionRequest.model_json_schema()},
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "request": {"type": "string", "description": "FormSubmissionRequest as JSON"},
+                        "attachments": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                    },
+                }
+            },
+        },
+    }
+}
+
+@router.post("/submit-form", response_model=FormSubmissionResponse, openapi_extra=SUBMIT_FORM_BODY)
+async def submit_form(http_request: Request):
+    """Submit form - returns immediately, processes in background.
+
+    Send FormSubmissionRequest as JSON, or as multipart/form-data with the JSON in a
+    "request" field and the files to attach as "attachments". Without attachments
+    nothing is attached.
+    """
+    request, uploads = await _read_submission(http_request)
+    try:
+        get_profile("form", request.agent_profile)
+    except UnknownProfileError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
     # Generate unique request ID
     request_id = str(uuid.uuid4())[:8]
     
     # Create tracking file
+    lane = lane_for_form(request.custom_data)
     agent_tracker.create_request_file(request_id)
-    agent_tracker.log_action(request_id, "📋 Request received", f"Account ID: {request.account_id or 'default'}")
+    agent_tracker.log_action(request_id, "📋 Request received", f"Account ID: {request.account_id or 'default'}, lane: {lane}")
+    await job_store.create(
+        request_id, "form", account_id=request.account_id or Config.TARGET_ACCOUNT_ID, lane=lane,
+        callback_url=request.callback_url
+    )
+    
+    # Store the attachments before the request body goes away
+    try:
+        manifest = await attachment_store.create_manifest(request_id, uploads)
+    except AttachmentError as e:
+        agent_tracker.log_action(request_id, "⛔ Request rejected", str(e))
+        await job_store.mark_failed(request_id, str(e), state="rejected")
+        raise HTTPException(status_code=413, detail=str(e))
+    finally:
+        for upload in uploads:
+            await upload.close()
+    agent_tracker.log_action(
+        request_id, "📎 Attachments stored", ", ".join(entry["name"] for entry in manifest["files"]) or "none"
+    )
     
-    # Add form submission to background tasks
-    background_tasks.add_task(process_form_submission_background, request, request_id)
+    # Queue the form submission, urgent requests jump ahead of routine ones
+    try:
+        await job_scheduler.submit(
+            lane, lambda: process_form_submission_background(request, request_id), request_id
+        )
+    except QueueFullError as e:
+        agent_tracker.log_action(request_id, "⛔ Request rejected", str(e))
+        await job_store.mark_failed(request_id, str(e), state="rejected")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(Config.SCHEDULER_RETRY_AFTER)})
+    except SchedulerUnavailableError as e:
+        agent_tracker.log_action(request_id, "⛔ Request rejected", str(e))
+        await job_store.mark_failed(request_id, str(e), state="rejected")
+        raise HTTPException(status_code=503, detail=str(e))
     
     return FormSubmissionResponse(
         success=True,
         message="Form submission started in background",
-        data={"status": "processing", "request_id": request_id}
+        data={
+            "status": "processing",
+            "request_id": request_id,
+            "attachments": [{"name": entry["name"], "sha256": entry["sha256"]} for entry in manifest["files"]]
+        }
     )
 
+@router.post("/submit-forms", response_model=FormSubmissionResponse)
+async def submit_forms(request: BulkFormSubmissionRequest, background_tasks: BackgroundTasks):
+    """Submit many forms - prefetches Dataverse data in bulk and runs them on the worker pool"""
+    try:
+        for item in request.items:
+            get_profile("form", item.agent_profile)
+    except UnknownProfileError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    batch = await bulk_submission_manager.create_batch(request.items)
+    
+    # Prefetch and queue in background so the response returns immediately
+    background_tasks.add_task(bulk_submission_manager.process_batch, batch["batch_id"])
+    
+    return FormSubmissionResponse(
+        success=True,
+        message=f"Bulk form submission of {len(batch['items'])} forms started in background",
+        data={
+            "status": "processing",
+            "batch_id": batch["batch_id"],
+            "request_ids": [item["request_id"] for item in batch["items"]]
+        }
+    )
+
+@router.get("/status/{request_id}")
+async def get_form_status(request_id: str, wait: int = 0, since: str | None = None):
+    """Get the state, timings, result and error of a form submission.
+    
+    With wait > 0 the call long-polls: it returns once the run's updated_at differs
+    from since (or from its value at call time) or after wait seconds.
+    """
+    if wait > 0:
+        job = await job_store.wait_for_update(request_id, since, min(wait, Config.STATUS_LONG_POLL_MAX))
+    else:
+        job = await job_store.get(request_id)
+    if job is None or job["kind"] != "form":
+        return {"status": "not_found", "message": "Request ID not found"}
+    return job
+
+@router.get("/stream/{request_id}")
+async def stream_form_progress(request_id: str, last_event_id: int = Header(0)):
+    """Stream a form submission's progress events as Server-Sent Events"""
+    job = await job_store.get(request_id)
+    if job is None or job["kind"] != "form":
+        raise HTTPException(status_code=404, detail=f"Request {request_id} not found")
+    if job["state"] not in ACTIVE_STATES and not event_stream.has_history(request_id):
+        body = event_stream.snapshot_sse(job)
+    else:
+        body = event_stream.sse(request_id, last_event_id, job)
+    return StreamingResponse(body, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Get aggregate progress and per-item results of a bulk submission"""
+    status = await bulk_submission_manager.get_status(batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+    return status
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
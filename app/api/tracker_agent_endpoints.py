@@ -1,47 +1,91 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
 import uuid
-from app.schemas.tracker_agent import TrackerAgentRequest, TrackerAgentResponse
-from app.services.tracker_agent import run_tracker_agent
+from app.schemas.tracker_agent import TrackerAgentRequest, TrackerAgentResponse, BatchTrackingRequest
+from app.services.tracker_agent import batch_tracker, track_pa_request
+from app.services.job_scheduler import job_scheduler, TRACKER_LANE, QueueFullError, SchedulerUnavailableError
+from app.services.agent_profiles import get_profile, UnknownProfileError
+from app.services.job_store import job_store, ACTIVE_STATES
+from app.services.event_stream import event_stream
+from app.utils.config import Config
+from app.utils.logger import logger
 from app.utils.agent_tracker import agent_tracker
 
 router = APIRouter()
 
-# Store active tracking tasks
-active_tracking_tasks = {}
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
 async def process_tracker_agent_background(request: TrackerAgentRequest, request_id: str):
     """Background task for tracker agent processing"""
+    logger.bind(request_id=request_id)
     try:
-        active_tracking_tasks[request_id] = {"status": "running", "started_at": "now"}
+        await job_store.mark_running(request_id)
         agent_tracker.log_action(request_id, "🔄 Background task started")
         
-        await run_tracker_agent(request_id, request)
+        with agent_tracker.phase(request_id, "tracking"):
+            result = await track_pa_request(request_id, request)
         
-        active_tracking_tasks[request_id] = {"status": "completed", "completed_at": "now"}
+        await job_store.mark_completed(request_id, result)
         agent_tracker.log_action(request_id, "✅ Background task completed successfully")
         
     except Exception as e:
-        active_tracking_tasks[request_id] = {"status": "failed", "error": str(e), "failed_at": "now"}
+        await job_store.mark_failed(request_id, str(e))
         agent_tracker.log_action(request_id, f"❌ Background task failed: {str(e)}")
-        
     finally:
-        # Clean up completed tasks
-        if request_id in active_tracking_tasks:
-            del active_tracking_tasks[request_id]
-            agent_tracker.log_action(request_id, "🧹 Background task cleaned up")
+        agent_tracker.finish_request(request_id)
 
 @router.post("/start-tracking", response_model=TrackerAgentResponse)
-async def start_tracking(request: TrackerAgentRequest, background_tasks: BackgroundTasks):
+async def start_tracking(request: TrackerAgentRequest):
     """Start Tracker Agent - returns immediately, processes in background"""
+    # Batch mode shares one poller and one table scan across all tracked IDs
+    if request.batch:
+        if request.callback_url:
+            raise HTTPException(status_code=422, detail="callback_url is not supported with batch tracking")
+        tracking_id = (request.custom_tracking_id or Config.HUMANA_ID_FOR_TRACKING or "").strip()
+        if not tracking_id:
+            raise HTTPException(status_code=422, detail="custom_tracking_id is required when HUMANA_ID_FOR_TRACKING is not set")
+        added = await batch_tracker.add([tracking_id])
+        return TrackerAgentResponse(
+            success=True,
+            message="PA request added to the batch tracker" if added else "PA request is already in the batch tracker",
+            data={
+                "status": "tracking",
+                "tracking_id": tracking_id,
+                "added": added,
+                "interval_seconds": batch_tracker.interval,
+                "request_id": batch_tracker.request_id
+            }
+        )
+    
+    try:
+        get_profile("tracker", request.agent_profile)
+    except UnknownProfileError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
     # Generate unique request ID
     request_id = str(uuid.uuid4())[:8]
     
     # Create tracking file
     agent_tracker.create_request_file(request_id)
     agent_tracker.log_action(request_id, "📋 Tracker Agent request received")
+    await job_store.create(
+        request_id, "tracker", pa_id=request.custom_tracking_id or Config.HUMANA_ID_FOR_TRACKING, lane=TRACKER_LANE,
+        callback_url=request.callback_url
+    )
     
-    # Add tracker agent to background tasks
-    background_tasks.add_task(process_tracker_agent_background, request, request_id)
+    # The polling loop holds no slot, each status check queues in the tracker lane
+    # so trackers cannot starve form submissions
+    try:
+        job_scheduler.check_admission(TRACKER_LANE)
+        job_scheduler.spawn(lambda: process_tracker_agent_background(request, request_id), request_id)
+    except QueueFullError as e:
+        agent_tracker.log_action(request_id, "⛔ Request rejected", str(e))
+        await job_store.mark_failed(request_id, str(e), state="rejected")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(Config.SCHEDULER_RETRY_AFTER)})
+    except SchedulerUnavailableError as e:
+        agent_tracker.log_action(request_id, "⛔ Request rejected", str(e))
+        await job_store.mark_failed(request_id, str(e), state="rejected")
+        raise HTTPException(status_code=503, detail=str(e))
     
     # Use custom values if provided, otherwise use defaults
     tracking_id = request.custom_tracking_id or "PA-14091005229"
@@ -59,17 +103,72 @@ async def start_tracking(request: TrackerAgentRequest, background_tasks: Backgro
     )
 
 @router.get("/status/{request_id}")
-async def get_tracking_status(request_id: str):
-    """Get the status of a tracking task"""
-    if request_id in active_tracking_tasks:
-        return active_tracking_tasks[request_id]
+async def get_tracking_status(request_id: str, wait: int = 0, since: str | None = None):
+    """Get the status of a tracking task.
+    
+    With wait > 0 the call long-polls: it returns once the run's updated_at differs
+    from since (or from its value at call time) or after wait seconds.
+    """
+    if wait > 0:
+        job = await job_store.wait_for_update(request_id, since, min(wait, Config.STATUS_LONG_POLL_MAX))
     else:
-        return {"status": "not_found", "message": "Request ID not found or task completed"}
+        job = await job_store.get(request_id)
+    if job is None or job["kind"] != "tracker":
+        return {"status": "not_found", "message": "Request ID not found"}
+    return job
+
+@router.get("/stream/{request_id}")
+async def stream_tracking_progress(request_id: str, last_event_id: int = Header(0)):
+    """Stream a tracking run's progress events as Server-Sent Events (also the batch tracker's request ID)"""
+    job = await job_store.get(request_id)
+    if job is None or job["kind"] != "tracker":
+        if request_id != batch_tracker.request_id and not event_stream.has_history(request_id):
+            raise HTTPException(status_code=404, detail=f"Request {request_id} not found")
+        body = event_stream.sse(request_id, last_event_id)
+    elif job["state"] not in ACTIVE_STATES and not event_stream.has_history(request_id):
+        body = event_stream.snapshot_sse(job)
+    else:
+        body = event_stream.sse(request_id, last_event_id, job)
+    return StreamingResponse(body, media_type="text/event-stream", headers=SSE_HEADERS)
 
 @router.get("/active-tasks")
 async def get_active_tracking_tasks():
     """Get all active tracking tasks"""
+    active_tasks = await job_store.list_active(kind="tracker")
     return {
-        "active_tasks": active_tracking_tasks,
-        "count": len(active_tracking_tasks)
+        "active_tasks": {job["request_id"]: job for job in active_tasks},
+        "count": len(active_tasks)
     }
+
+@router.get("/history")
+async def get_tracking_history(pa_id: str | None = None, state: str | None = None, limit: int = 100):
+    """Look up past and current tracking runs by PA ID and/or state"""
+    jobs = await job_store.find(pa_id=pa_id, state=state, limit=limit)
+    return {"jobs": [job for job in jobs if job["kind"] == "tracker"]}
+
+@router.post("/batch/ids", response_model=TrackerAgentResponse)
+async def add_batch_tracking_ids(request: BatchTrackingRequest):
+    """Add PA request IDs to the running batch tracker"""
+    added = await batch_tracker.add(request.tracking_ids)
+    return TrackerAgentResponse(
+        success=True,
+        message=f"{len(added)} PA requests added to the batch tracker",
+        data={
+            "status": "tracking",
+            "added": added,
+            "interval_seconds": batch_tracker.interval,
+            "request_id": batch_tracker.request_id
+        }
+    )
+
+@router.delete("/batch/ids/{tracking_id}")
+async def remove_batch_tracking_id(tracking_id: str):
+    """Stop tracking a PA request ID in the batch tracker"""
+    if not await batch_tracker.remove(tracking_id):
+        raise HTTPException(status_code=404, detail=f"{tracking_id} is not being tracked")
+    return {"status": "removed", "tracking_id": tracking_id}
+
+@router.get("/batch")
+async def get_batch_tracking_status():
+    """Get the status of every ID in the batch tracker"""
+    return await batch_tracker.snapshot()
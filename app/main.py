@@ -1,7 +1,23 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.form_submission_endpoints import router as form_router
 from app.api.tracker_agent_endpoints import router as tracker_router
+from app.services.browser_pool import browser_pool
+from app.services.tracker_agent import batch_tracker, pa_table_reader
+from app.services.dataverse_client import close_http_client
+from app.services.dataverse_mirror import dataverse_mirror
+from app.services.bulk_submission import bulk_submission_manager
+from app.services.job_scheduler import job_scheduler
+from app.services.job_store import job_store
+from app.services.attachment_store import attachment_store
+from app.services.agent_worker_pool import agent_worker_pool
+from app.services.event_stream import event_stream
+from app.services.agent_profiles import AGENT_PROFILES, DEFAULT_PROFILES
+from app.services.llm_cache import llm_cache
+from app.services.webhooks import webhook_dispatcher
+from app.utils.agent_tracker import agent_tracker
+from app.services.metrics import HTTP_REQUESTS, HTTP_REQUEST_SECONDS, QUEUE_DEPTH, RUNNING_JOBS, render_metrics
 
 app = FastAPI(title="Humana Form Filling Agent API", version="1.0.0")
 
@@ -14,13 +30,94 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and their outcome per route template"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        HTTP_REQUESTS.labels(method=request.method, route=path, status=str(status)).inc()
+        HTTP_REQUEST_SECONDS.labels(method=request.method, route=path).observe(time.perf_counter() - started)
+
 app.include_router(form_router, prefix="/api/v1/form")
 app.include_router(tracker_router, prefix="/api/v1/tracker")
 
+@app.on_event("startup")
+async def startup():
+    # POST state changes to the callback URLs of requests, including recovered runs
+    webhook_dispatcher.start()
+    # Fail runs of API processes that stopped, and keep this process's heartbeat fresh
+    await job_store.recover()
+    job_store.start()
+    # Drop attachments of requests past retention, now and every ATTACHMENT_CLEANUP_INTERVAL
+    attachment_store.start()
+    # Fan tracker events out to /stream subscribers
+    event_stream.start()
+    job_scheduler.start()
+    if agent_worker_pool.enabled:
+        # Agent runs happen in worker processes, each with its own browser pool
+        agent_worker_pool.start()
+    else:
+        # Pre-launch browsers so the first requests skip the Chromium cold start
+        await browser_pool.start()
+    # Keep the local Dataverse mirror current in the background (when enabled)
+    dataverse_mirror.start()
+    # Poll the PA table for batch-tracked IDs (one API process at a time)
+    batch_tracker.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await batch_tracker.stop()
+    await job_store.stop()
+    await bulk_submission_manager.stop()
+    await job_scheduler.stop()
+    await agent_worker_pool.stop()
+    await dataverse_mirror.stop()
+    await attachment_store.stop()
+    await pa_table_reader.close()
+    await browser_pool.close()
+    await webhook_dispatcher.stop()
+    await close_http_client()
+    # Write out tracking events still buffered
+    agent_tracker.close()
+
 @app.get("/")
 async def root():
     return {"message": "Humana Form Filling Agent API"}
 
+@app.get("/api/v1/scheduler")
+async def scheduler_stats():
+    """Concurrency and queue depth of the job scheduler"""
+    return {**job_scheduler.stats(), "workers": agent_worker_pool.stats()}
+
+@app.get("/api/v1/agent-profiles")
+async def agent_profiles():
+    """Configured agent profiles and the default profile of each run type"""
+    return {
+        "defaults": DEFAULT_PROFILES,
+        "profiles": {name: profile.to_dict() for name, profile in AGENT_PROFILES.items()}
+    }
+
+@app.get("/api/v1/llm-cache")
+async def llm_cache_stats():
+    """Size of the LLM response cache and this process's hits and misses"""
+    return await llm_cache.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    for lane, depth in job_scheduler.queue_depths().items():
+        QUEUE_DEPTH.labels(lane=lane).set(depth)
+    RUNNING_JOBS.set(job_scheduler.running)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,10 +1,27 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, Dict, Any, List
+from app.services.pa_payload import check_dates
+from app.services.webhooks import validate_callback_url
+
+CUSTOM_DATA_DESCRIPTION = "Additional form data to merge; dates as YYYY-MM-DD or MM/DD/YYYY"
+
+def _check_custom_dates(custom_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if custom_data:
+        check_dates(custom_data)
+    return custom_data
+
+def _check_callback_url(callback_url: Optional[str]) -> Optional[str]:
+    return validate_callback_url(callback_url) if callback_url else callback_url
 
 class FormSubmissionRequest(BaseModel):
     """Request model for form submission"""
     account_id: Optional[str] = Field(None, description="Custom account ID to fetch data for")
-    custom_data: Optional[Dict[str, Any]] = Field(None, description="Additional form data to merge")
+    custom_data: Optional[Dict[str, Any]] = Field(None, description=CUSTOM_DATA_DESCRIPTION)
+    agent_profile: Optional[str] = Field(None, description="Agent profile (fast, balanced, accurate), defaults to FORM_AGENT_PROFILE")
+    callback_url: Optional[str] = Field(None, description="Public URL to POST each state and result change of the run to")
+    
+    _check_custom_dates = field_validator("custom_data")(_check_custom_dates)
+    _check_callback_url = field_validator("callback_url")(_check_callback_url)
     
     model_config = {
         "json_schema_extra": {
@@ -30,7 +47,7 @@ class FormSubmissionRequest(BaseModel):
                             "CPT_Code": 72148,
                             "Description": "MRI Lumbar Spine w/o Contrast",
                             "Place_of_Service": "Outpatient",
-                            "Requested_Start_Date": "25/08/2025",
+                            "Requested_Start_Date": "08/25/2025",
                             "Duration_in_Days": 1,
                             "Priority": "Routine"
                         },
@@ -50,3 +67,30 @@ class FormSubmissionResponse(BaseModel):
     success: bool
     message: str
     data: Optional[Dict[str, Any]] = None
+
+class BulkFormSubmissionItem(BaseModel):
+    """One submission within a bulk request"""
+    account_id: Optional[str] = Field(None, description="Custom account ID to fetch data for")
+    custom_data: Optional[Dict[str, Any]] = Field(None, description=CUSTOM_DATA_DESCRIPTION)
+    agent_profile: Optional[str] = Field(None, description="Agent profile (fast, balanced, accurate), defaults to FORM_AGENT_PROFILE")
+    callback_url: Optional[str] = Field(None, description="Public URL to POST each state and result change of the run to")
+    
+    _check_custom_dates = field_validator("custom_data")(_check_custom_dates)
+    _check_callback_url = field_validator("callback_url")(_check_callback_url)
+
+class BulkFormSubmissionRequest(BaseModel):
+    """Request model for bulk form submission"""
+    items: List[BulkFormSubmissionItem] = Field(..., min_length=1, description="Submissions to process")
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "items": [
+                        {"account_id": "1086c0f3-973f-f011-b4cb-7c1e5218e4a2"},
+                        {"account_id": "2197d1a4-a84a-f011-b4cb-7c1e5218e4a2", "custom_data": {"Service": {"Priority": "Urgent"}}}
+                    ]
+                }
+            ]
+        }
+    }
@@ -1,10 +1,19 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List
+from app.services.webhooks import validate_callback_url
 
 class TrackerAgentRequest(BaseModel):
     """Request model for tracker agent"""
     custom_tracking_id: Optional[str] = Field(None, description="Optional custom PA request ID to track")
     custom_interval: Optional[int] = Field(None, description="Optional custom check interval in seconds")
+    batch: bool = Field(False, description="Track the ID with the shared batch tracker instead of a dedicated agent")
+    agent_profile: Optional[str] = Field(None, description="Agent profile (fast, balanced, accurate), defaults to TRACKER_AGENT_PROFILE")
+    callback_url: Optional[str] = Field(None, description="Public URL to POST each state and result change of the run to")
+    
+    @field_validator("callback_url")
+    @classmethod
+    def _check_callback_url(cls, callback_url: Optional[str]) -> Optional[str]:
+        return validate_callback_url(callback_url) if callback_url else callback_url
     
     model_config = {
         "json_schema_extra": {
@@ -42,3 +51,25 @@ class TrackerAgentResponse(BaseModel):
             ]
         }
     }
+
+class BatchTrackingRequest(BaseModel):
+    """Request model for adding IDs to the batch tracker"""
+    tracking_ids: List[str] = Field(..., min_length=1, description="PA request IDs to track")
+    
+    @field_validator("tracking_ids")
+    @classmethod
+    def _check_tracking_ids(cls, tracking_ids: List[str]) -> List[str]:
+        tracking_ids = [tracking_id.strip() for tracking_id in tracking_ids]
+        if not all(tracking_ids):
+            raise ValueError("tracking_ids must not contain empty IDs")
+        return tracking_ids
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "tracking_ids": ["PA-130810002", "PA-14091005229"]
+                }
+            ]
+        }
+    }
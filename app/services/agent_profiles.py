@@ -0,0 +1,128 @@
+import json
+from app.utils.config import Config
+
+class UnknownProfileError(ValueError):
+    """Raised when a request names an agent profile that is not configured"""
+
+class ProfileConfigError(ValueError):
+    """Raised at startup when AGENT_PROFILE_OVERRIDES or a default profile name is invalid"""
+
+def _is_str_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+# Setting -> (check, expected value) for AGENT_PROFILE_OVERRIDES; bool is excluded from the ints
+SETTING_CHECKS = {
+    "model": (lambda value: isinstance(value, str) and bool(value), "a model name"),
+    "use_vision": (lambda value: isinstance(value, bool), "true or false"),
+    "max_actions_per_step": (lambda value: type(value) is int and value >= 1, "an integer >= 1"),
+    "max_steps": (lambda value: type(value) is int and value >= 1, "an integer >= 1"),
+    "use_thinking": (lambda value: isinstance(value, bool), "true or false"),
+    "flash_mode": (lambda value: isinstance(value, bool), "true or false"),
+    "max_history_items": (lambda value: value is None or (type(value) is int and value >= 1), "null or an integer >= 1"),
+    "viewport_expansion": (lambda value: type(value) is int and value >= -1, "an integer >= -1"),
+    "include_attributes": (lambda value: value is None or _is_str_list(value), "null or a list of attribute names"),
+    "llm_cache": (lambda value: isinstance(value, bool), "true or false"),
+    "block_resource_types": (lambda value: value is None or _is_str_list(value), "null or a list of resource types"),
+}
+
+class AgentProfile:
+    """Named set of browser-use Agent settings, trading accuracy for speed and tokens"""
+
+    def __init__(self, name: str, settings: dict):
+        self.name = name
+        self.model = settings["model"]
+        self.use_vision = settings["use_vision"]
+        self.max_actions_per_step = settings["max_actions_per_step"]
+        self.max_steps = settings["max_steps"]
+        self.use_thinking = settings["use_thinking"]
+        self.flash_mode = settings["flash_mode"]
+        self.max_history_items = settings["max_history_items"]
+        # DOM extraction: pixels beyond the viewport sent to the LLM, and element attributes kept
+        self.viewport_expansion = settings["viewport_expansion"]
+        self.include_attributes = settings["include_attributes"]
+        # Answer repeated page states from the LLM response cache (when LLM_CACHE_ENABLED)
+        self.llm_cache = settings["llm_cache"]
+        # Resource types the browser skips, None for the run type's default list
+        self.block_resource_types = settings["block_resource_types"]
+
+    def agent_kwargs(self) -> dict:
+        """Keyword arguments for Agent(...)"""
+        kwargs = {
+            "use_vision": self.use_vision,
+            "max_actions_per_step": self.max_actions_per_step,
+            "use_thinking": self.use_thinking,
+            "flash_mode": self.flash_mode,
+            "max_history_items": self.max_history_items,
+        }
+        if self.include_attributes is not None:
+            kwargs["include_attributes"] = self.include_attributes
+        return kwargs
+
+    def resource_types_to_block(self, default: list[str]) -> list[str]:
+        """Resource types the browser skips for this profile, never images when the LLM sees screenshots"""
+        types = default if self.block_resource_types is None else self.block_resource_types
+        if self.use_vision:
+            types = [resource_type for resource_type in types if resource_type.lower() != "image"]
+        return types
+    
+    def configure_session(self, browser_session):
+        """Apply the DOM extraction settings to a leased browser session"""
+        browser_session.browser_profile.viewport_expansion = self.viewport_expansion
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+def _parse_overrides(raw: str) -> dict:
+    """AGENT_PROFILE_OVERRIDES as {profile: {setting: value}}, raising ProfileConfigError on any bad entry"""
+    try:
+        overrides = json.loads(raw or "{}")
+    except json.JSONDecodeError as e:
+        raise ProfileConfigError(f"AGENT_PROFILE_OVERRIDES is not valid JSON: {e}") from None
+    if not isinstance(overrides, dict):
+        raise ProfileConfigError("AGENT_PROFILE_OVERRIDES must be a JSON object of profile names")
+    for name, settings in overrides.items():
+        if name not in Config.AGENT_PROFILES:
+            raise ProfileConfigError(
+                f"AGENT_PROFILE_OVERRIDES: unknown profile '{name}', expected one of: {', '.join(Config.AGENT_PROFILES)}"
+            )
+        if not isinstance(settings, dict):
+            raise ProfileConfigError(f"AGENT_PROFILE_OVERRIDES.{name} must be a JSON object of settings")
+        for key, value in settings.items():
+            if key not in SETTING_CHECKS:
+                raise ProfileConfigError(
+                    f"AGENT_PROFILE_OVERRIDES.{name}: unknown setting '{key}', expected one of: {', '.join(SETTING_CHECKS)}"
+                )
+            check, expected = SETTING_CHECKS[key]
+            if not check(value):
+                raise ProfileConfigError(f"AGENT_PROFILE_OVERRIDES.{name}.{key} must be {expected}, got {value!r}")
+    return overrides
+
+def _load_profiles() -> dict[str, AgentProfile]:
+    """Profiles from Config, with AGENT_PROFILE_OVERRIDES (JSON) applied field by field"""
+    overrides = _parse_overrides(Config.AGENT_PROFILE_OVERRIDES)
+    profiles = {}
+    for name, settings in Config.AGENT_PROFILES.items():
+        profiles[name] = AgentProfile(name, {**settings, **overrides.get(name, {})})
+    return profiles
+
+AGENT_PROFILES = _load_profiles()
+
+DEFAULT_PROFILES = {
+    "form": Config.FORM_AGENT_PROFILE,
+    "tracker": Config.TRACKER_AGENT_PROFILE,
+}
+
+for _kind, _name in DEFAULT_PROFILES.items():
+    if _name not in AGENT_PROFILES:
+        raise ProfileConfigError(
+            f"{_kind.upper()}_AGENT_PROFILE: unknown profile '{_name}', expected one of: {', '.join(AGENT_PROFILES)}"
+        )
+
+def get_profile(kind: str, name: str | None = None) -> AgentProfile:
+    """The named profile, or the configured default of the run type ("form" or "tracker")"""
+    name = name or DEFAULT_PROFILES[kind]
+    if name not in AGENT_PROFILES:
+        raise UnknownProfileError(
+            f"Unknown agent profile '{name}', expected one of: {', '.join(AGENT_PROFILES)}"
+        )
+    return AGENT_PROFILES[name]
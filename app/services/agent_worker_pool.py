@@ -0,0 +1,240 @@
+import asyncio
+import importlib
+import multiprocessing
+import threading
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.services.event_stream import event_stream
+from app.services.job_store import job_store
+
+# Agent entry points that can run in a worker process, by job kind
+AGENT_JOBS = {
+    "form": ("app.services.form_filling_agent", "run_humana_form_filling_agent"),
+    "tracker": ("app.services.tracker_agent", "run_tracker_agent"),
+    "tracker_check": ("app.services.tracker_agent", "check_pa_status"),
+    "tracker_scan": ("app.services.tracker_agent", "scan_pa_table"),
+}
+
+# Seconds to let workers finish their jobs on shutdown before terminating them
+SHUTDOWN_TIMEOUT = 30
+
+class AgentWorkerError(Exception):
+    """Raised when an agent run fails inside a worker process or the worker dies"""
+
+def _resolve(kind: str):
+    module_name, function_name = AGENT_JOBS[kind]
+    return getattr(importlib.import_module(module_name), function_name)
+
+# Worker process side
+
+async def _run_job(worker_id: int, job_id: str, kind: str, args: tuple, results):
+    logger.bind(request_id=job_id, worker_id=worker_id)
+    try:
+        result = await _resolve(kind)(*args)
+        results.put(("done", worker_id, job_id, True, result))
+    except Exception as e:
+        results.put(("done", worker_id, job_id, False, f"{type(e).__name__}: {e}"))
+
+async def _worker_loop(worker_id: int, jobs, results, concurrency: int, max_jobs: int):
+    """Take jobs while a slot is free, exit after max_jobs so the parent can recycle the process"""
+    from app.services.browser_pool import browser_pool
+    from app.services.dataverse_client import close_http_client
+    from app.services.job_store import job_store
+    from app.services.tracker_agent import pa_table_reader
+    from app.utils.agent_tracker import agent_tracker
+
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    running: set[asyncio.Task] = set()
+    taken = 0
+    # Tracker events go back to the API process for live streaming
+    agent_tracker.add_listener(lambda record: results.put(("event", worker_id, record)))
+    # Run state and result changes too, webhooks are only registered in the API process
+    job_store.add_listener(lambda job: results.put(("job", worker_id, job)))
+    await browser_pool.start()
+    try:
+        while not max_jobs or taken < max_jobs:
+            await slots.acquire()
+            job = await loop.run_in_executor(None, jobs.get)
+            if job is None:
+                break
+            taken += 1
+            job_id, kind, args = job
+            results.put(("started", worker_id, job_id))
+            task = asyncio.create_task(_run_job(worker_id, job_id, kind, args, results))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            task.add_done_callback(lambda _: slots.release())
+        await asyncio.gather(*running, return_exceptions=True)
+    finally:
+        await pa_table_reader.close()
+        await browser_pool.close()
+        await close_http_client()
+        agent_tracker.close()
+        results.put(("exit", worker_id))
+
+def _worker_main(worker_id: int, jobs, results, concurrency: int, max_jobs: int):
+    asyncio.run(_worker_loop(worker_id, jobs, results, concurrency, max_jobs))
+
+# API process side
+
+class AgentWorkerPool:
+    """Runs agent jobs in a pool of separate worker processes fed from a local queue"""
+
+    def __init__(self):
+        self.enabled = Config.AGENT_WORKER_MODE
+        self.worker_count = Config.AGENT_WORKER_COUNT
+        self.concurrency = Config.AGENT_WORKER_CONCURRENCY
+        self.max_jobs = Config.AGENT_WORKER_MAX_JOBS
+        # spawn, a forked child would inherit the API's event loop and threads
+        self._context = multiprocessing.get_context("spawn")
+        self._jobs = None
+        self._results = None
+        self._workers: dict[int, multiprocessing.process.BaseProcess] = {}
+        self._retired: set[int] = set()
+        self._assigned: dict[str, int] = {}
+        self._pending: dict[str, asyncio.Future] = {}
+        self._next_worker_id = 0
+        self._loop = None
+        self._reader = None
+        self._supervisor = None
+        self._stopping = False
+
+    def start(self):
+        """Spawn the worker processes (no-op unless worker mode is enabled)"""
+        if not self.enabled or self._supervisor is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._jobs = self._context.Queue()
+        self._results = self._context.Queue()
+        self._stopping = False
+        for _ in range(self.worker_count):
+            self._spawn()
+        self._reader = threading.Thread(target=self._read_results, name="agent-worker-results", daemon=True)
+        self._reader.start()
+        self._supervisor = asyncio.create_task(self._supervise())
+        logger.info(
+            f"🏭 Agent worker pool started ({self.worker_count} processes x {self.concurrency} jobs, "
+            f"recycled every {self.max_jobs or 'unlimited'} jobs)"
+        )
+
+    async def stop(self):
+        """Let workers finish their current jobs, then terminate any that remain"""
+        if self._supervisor is None:
+            return
+        self._stopping = True
+        self._supervisor.cancel()
+        for _ in self._workers:
+            self._jobs.put(None)
+        for process in list(self._workers.values()):
+            await asyncio.to_thread(process.join, SHUTDOWN_TIMEOUT)
+            if process.is_alive():
+                logger.error(f"Agent worker {process.pid} did not stop in time, terminating")
+                process.terminate()
+        self._workers.clear()
+        self._results.put(None)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(AgentWorkerError("Agent worker pool stopped"))
+        self._pending.clear()
+        self._supervisor = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "workers": len(self._workers),
+            "concurrency_per_worker": self.concurrency,
+            "pending_jobs": len(self._pending),
+            "running_jobs": len(self._assigned)
+        }
+
+    async def run(self, kind: str, job_id: str, *args):
+        """Run an agent job in a worker process and return its result.
+
+        Runs inline in this process when worker mode is disabled. Arguments
+        and results cross a process boundary, so they must be picklable.
+        """
+        if not self.enabled:
+            return await _resolve(kind)(*args)
+        if self._supervisor is None or self._stopping:
+            raise AgentWorkerError("Agent worker pool is not running")
+        future = self._loop.create_future()
+        self._pending[job_id] = future
+        try:
+            self._jobs.put((job_id, kind, args))
+            return await future
+        finally:
+            self._pending.pop(job_id, None)
+
+    def _spawn(self):
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_id, self._jobs, self._results, self.concurrency, self.max_jobs),
+            name=f"agent-worker-{worker_id}",
+            daemon=False
+        )
+        process.start()
+        self._workers[worker_id] = process
+
+    def _read_results(self):
+        """Forward worker messages to the event loop (runs in a thread, Queue.get blocks)"""
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._handle_message, message)
+
+    def _handle_message(self, message: tuple):
+        event, worker_id, *payload = message
+        if event == "event":
+            event_stream.publish(payload[0])
+        elif event == "job":
+            job_store.publish(payload[0])
+        elif event == "started":
+            self._assigned[payload[0]] = worker_id
+        elif event == "done":
+            job_id, ok, result = payload
+            self._assigned.pop(job_id, None)
+            future = self._pending.get(job_id)
+            if future is None or future.done():
+                return
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(AgentWorkerError(result))
+        elif event == "exit":
+            # A worker that reached its job limit, replace it right away
+            self._retired.add(worker_id)
+            if not self._stopping and worker_id in self._workers:
+                logger.info(f"♻️ Recycling agent worker {worker_id}")
+                self._spawn()
+
+    def _fail_jobs(self, worker_id: int, reason: str):
+        for job_id, assigned_worker in list(self._assigned.items()):
+            if assigned_worker != worker_id:
+                continue
+            del self._assigned[job_id]
+            future = self._pending.get(job_id)
+            if future is not None and not future.done():
+                future.set_exception(AgentWorkerError(reason))
+
+    async def _supervise(self):
+        """Reap exited workers and replace any that crashed"""
+        while True:
+            await asyncio.sleep(1)
+            for worker_id, process in list(self._workers.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                del self._workers[worker_id]
+                if worker_id in self._retired:
+                    self._retired.discard(worker_id)
+                    continue
+                logger.error(f"Agent worker {worker_id} died with exit code {process.exitcode}, restarting")
+                self._fail_jobs(worker_id, f"Agent worker died with exit code {process.exitcode}")
+                self._spawn()
+
+# Global instance
+agent_worker_pool = AgentWorkerPool()
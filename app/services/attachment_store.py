@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from app.utils.config import Config
+from app.utils.logger import logger
+
+class AttachmentError(Exception):
+    """Raised when an attachment cannot be accepted"""
+
+class AttachmentStore:
+    """Content-addressed store of form attachments with one manifest per request.
+
+    Files are streamed in chunks into objects/<sha256[:2]>/<sha256>, so a document
+    reused across submissions is stored once. Each request gets requests/<id>/files/
+    with hard links named after the original files, plus a manifest.json listing them.
+    """
+
+    def __init__(self):
+        self.root = Path(Config.ATTACHMENT_DIR)
+        self.chunk_size = Config.ATTACHMENT_CHUNK_SIZE
+        self.max_bytes = Config.ATTACHMENT_MAX_BYTES
+        self.retention_seconds = Config.ATTACHMENT_RETENTION_DAYS * 86400
+        self.cleanup_interval = Config.ATTACHMENT_CLEANUP_INTERVAL
+        self._task = None
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _request_dir(self, request_id: str) -> Path:
+        return self.root / "requests" / request_id
+
+    @staticmethod
+    def _safe_name(filename: str | None) -> str:
+        name = os.path.basename((filename or "").replace("\\", "/")).strip()
+        return name if name not in ("", ".", "..") else "attachment"
+
+    # Blocking operations (run in a worker thread)
+
+    def _ingest(self, source, filename: str | None, created: list[Path]) -> dict:
+        """Copy a binary file object into the store chunk by chunk and return its manifest entry.
+
+        Blobs that did not exist before are appended to created.
+        """
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as out:
+            try:
+                while chunk := source.read(self.chunk_size):
+                    size += len(chunk)
+                    if self.max_bytes and size > self.max_bytes:
+                        raise AttachmentError(
+                            f"Attachment {filename} is larger than {self.max_bytes} bytes"
+                        )
+                    digest.update(chunk)
+                    out.write(chunk)
+            except BaseException:
+                out.close()
+                os.unlink(out.name)
+                raise
+
+        sha256 = digest.hexdigest()
+        blob = self._blob_path(sha256)
+        if blob.exists():
+            os.unlink(out.name)
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(out.name, blob)
+            created.append(blob)
+
+        name = self._safe_name(filename)
+        return {
+            "name": name,
+            "sha256": sha256,
+            "size": size,
+            "content_type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+        }
+
+    def _write_manifest(self, request_id: str, entries: list[dict]) -> dict:
+        """Link each blob into the request's directory and write its manifest"""
+        files_dir = self._request_dir(request_id) / "files"
+        files_dir.mkdir(parents=True, exist_ok=True)
+        files, seen = [], set()
+        for entry in entries:
+            # The same document twice in one request is uploaded once
+            if entry["sha256"] in seen:
+                continue
+            seen.add(entry["sha256"])
+            base, ext = os.path.splitext(entry["name"])
+            path, counter = files_dir / entry["name"], 1
+            while path.exists():
+                path = files_dir / f"{base}_{counter}{ext}"
+                counter += 1
+            try:
+                os.link(self._blob_path(entry["sha256"]), path)
+            except OSError:
+                shutil.copyfile(self._blob_path(entry["sha256"]), path)
+            files.append({**entry, "name": path.name, "path": str(path.resolve())})
+
+        manifest = {
+            "request_id": request_id,
+            "created_at": datetime.now().isoformat(),
+            "files": files,
+        }
+        manifest_path = self._request_dir(request_id) / "manifest.json"
+        tmp_path = manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp_path, manifest_path)
+        return manifest
+
+    def _create_manifest(self, request_id: str, uploads: list) -> dict:
+        created = []
+        try:
+            entries = [self._ingest(upload.file, upload.filename, created) for upload in uploads]
+            return self._write_manifest(request_id, entries)
+        except BaseException:
+            # A rejected file leaves the ones stored before it; drop those no other request links to
+            shutil.rmtree(self._request_dir(request_id), ignore_errors=True)
+            for blob in created:
+                try:
+                    if blob.stat().st_nlink == 1:
+                        blob.unlink()
+                except FileNotFoundError:
+                    pass
+            raise
+
+    def _cleanup(self):
+        """Drop request directories past retention, then blobs no request links to"""
+        if not self.retention_seconds or not self.root.exists():
+            return
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+        requests_dir = self.root / "requests"
+        if requests_dir.exists():
+            for request_dir in requests_dir.iterdir():
+                if request_dir.stat().st_mtime < cutoff:
+                    shutil.rmtree(request_dir, ignore_errors=True)
+                    removed += 1
+        objects_dir = self.root / "objects"
+        if objects_dir.exists():
+            for blob in objects_dir.glob("*/*"):
+                # A blob is only linked from the store itself once its requests are gone
+                stat = blob.stat()
+                if stat.st_nlink == 1 and stat.st_mtime < cutoff:
+                    blob.unlink()
+        if removed:
+            logger.info(f"🧹 Removed attachments of {removed} expired requests")
+
+    # Public API
+
+    async def create_manifest(self, request_id: str, uploads: list | None = None) -> dict:
+        """Store the uploaded files (starlette UploadFile objects) and write the request's manifest.
+
+        A request without uploads gets an empty manifest, nothing is attached by default.
+        """
+        return await asyncio.to_thread(self._create_manifest, request_id, uploads or [])
+
+    def load_manifest(self, request_id: str) -> dict | None:
+        """Manifest of a request, or None if it has none"""
+        manifest_path = self._request_dir(request_id) / "manifest.json"
+        if not manifest_path.exists():
+            return None
+        return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    def files(self, request_id: str) -> list[str]:
+        """Paths of the request's attachments"""
+        manifest = self.load_manifest(request_id)
+        return [entry["path"] for entry in manifest["files"]] if manifest else []
+
+    async def cleanup(self):
+        """Remove expired request attachments and unreferenced blobs"""
+        await asyncio.to_thread(self._cleanup)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.cleanup()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Attachment cleanup failed: {e}")
+            await asyncio.sleep(self.cleanup_interval)
+
+    def start(self):
+        """Start the periodic cleanup, the first one runs right away"""
+        if self.retention_seconds and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Global instance
+attachment_store = AttachmentStore()
@@ -0,0 +1,150 @@
+import asyncio
+import os
+from urllib.parse import unquote
+from browser_use import ActionResult, BrowserSession
+from app.utils.logger import logger
+from app.utils.config import Config
+
+# True once every uploaded file name shows up in the page (the portal lists uploaded files)
+_FILES_LISTED_JS = """
+(names) => {
+    const text = document.body.innerText;
+    return names.every(name => text.includes(name));
+}
+"""
+
+class ActionContext:
+    """Per-run state handed to the custom controller actions through Agent(context=...).
+
+    Controllers are shared by every run in the process, so anything a run remembers
+    between actions lives here instead of in module globals.
+    """
+
+    def __init__(self, request_id: str, attachments: list[str] | None = None, download_dir: str | None = None):
+        self.request_id = request_id
+        self.attachments = attachments or []
+        # Each run downloads into its own directory so concurrent runs never mix files
+        self.download_dir = download_dir or os.path.join(Config.DOWNLOAD_PATH or "downloads", request_id)
+        # Upload fields already filled in this run, keyed by element index and file type
+        self.uploaded: set[str] = set()
+        self.downloads: list[str] = []
+
+def files_for_upload(file_type: str) -> list[str]:
+    """Files the agents attach: every PDF in PDF_PATH, or the configured image"""
+    if file_type.lower() == "pdf":
+        pdf_dir = Config.PDF_PATH
+        if not os.path.exists(pdf_dir):
+            return []
+        return sorted(os.path.join(pdf_dir, f) for f in os.listdir(pdf_dir) if f.lower().endswith('.pdf'))
+    return [Config.IMAGE_PATH] if Config.IMAGE_PATH else []
+
+def _unique_path(directory: str, filename: str) -> str:
+    """Path in directory that does not overwrite an earlier download"""
+    base, ext = os.path.splitext(filename)
+    path = os.path.join(directory, filename)
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{base}_{counter}{ext}")
+        counter += 1
+    return path
+
+def _is_upload_request(request, names: list[str]) -> bool:
+    """True for a POST/PUT that carries one of the files, by multipart file name or by URL"""
+    if request.method not in ("POST", "PUT"):
+        return False
+    url = unquote(request.url)
+    if any(name in url for name in names):
+        return True
+    content_type = request.headers.get("content-type", "")
+    body = request.post_data_buffer or b""
+    return content_type.startswith("multipart/form-data") and any(
+        f'filename="{name}"'.encode() in body for name in names
+    )
+
+async def _wait_for_upload(page, files: list[str], started: asyncio.Event) -> str | None:
+    """Wait until a request carrying the files finishes or the file names are listed on the page"""
+    timeout = Config.UPLOAD_SETTLE_TIMEOUT
+    listed = asyncio.create_task(page.wait_for_function(
+        _FILES_LISTED_JS, arg=[os.path.basename(f) for f in files], timeout=timeout * 1000
+    ))
+    requested = asyncio.create_task(asyncio.wait_for(started.wait(), timeout))
+    signals = {listed: "files listed on page", requested: "upload request finished"}
+    pending = set(signals)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.exception():
+                    return signals[task]
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def upload_files(browser_session: BrowserSession, index: int, files: list[str]) -> ActionResult:
+    """Attach files to the element at index and wait for the page to take them"""
+    if not files:
+        return ActionResult(error='No files available for upload')
+
+    element = await browser_session.get_element_by_index(index)
+    if element is None:
+        return ActionResult(error=f'No element found at index {index}')
+    page = await browser_session.get_current_page()
+
+    # Only a request carrying one of the files counts, not analytics or other XHR
+    names = [os.path.basename(f) for f in files]
+    started = asyncio.Event()
+    def on_request_finished(request):
+        if _is_upload_request(request, names):
+            started.set()
+
+    page.on('requestfinished', on_request_finished)
+    try:
+        timeout = Config.UPLOAD_TIMEOUT * 1000
+        if await browser_session.is_file_input_by_index(index):
+            await element.set_input_files(files, timeout=timeout)
+        else:
+            async with page.expect_file_chooser(timeout=timeout) as chooser_info:
+                await element.click()
+            file_chooser = await chooser_info.value
+            await file_chooser.set_files(files, timeout=timeout)
+        logger.info(f"📤 Set {len(files)} file(s) on element {index}")
+
+        confirmed_by = await _wait_for_upload(page, files, started)
+    finally:
+        page.remove_listener('requestfinished', on_request_finished)
+
+    if not confirmed_by:
+        # An error, so the caller does not count the element as uploaded
+        msg = (f'Set {len(files)} file(s) on element {index}, but the page showed no sign of the upload '
+               f'within {Config.UPLOAD_SETTLE_TIMEOUT}s; check the upload list before retrying')
+        logger.warning(msg)
+        return ActionResult(error=msg)
+    msg = f'Uploaded {len(files)} file(s) ({confirmed_by}): {", ".join(os.path.basename(f) for f in files)}'
+    logger.success(msg)
+    return ActionResult(extracted_content=msg, include_in_memory=True)
+
+async def download_file(browser_session: BrowserSession, index: int, context: ActionContext) -> ActionResult:
+    """Click the element at index and save the download it triggers to the run's download directory"""
+    element = await browser_session.get_element_by_index(index)
+    if element is None:
+        return ActionResult(error=f'No element found at index {index}')
+    page = await browser_session.get_current_page()
+
+    async with page.expect_download(timeout=Config.DOWNLOAD_TIMEOUT * 1000) as download_info:
+        await element.click()
+    download = await download_info.value
+
+    # failure() resolves once the download has finished
+    failure = await download.failure()
+    if failure:
+        return ActionResult(error=f'Download failed: {failure}')
+
+    os.makedirs(context.download_dir, exist_ok=True)
+    file_path = _unique_path(context.download_dir, download.suggested_filename)
+    await download.save_as(file_path)
+    context.downloads.append(file_path)
+
+    msg = f'Successfully downloaded file: {file_path}'
+    logger.success(msg)
+    return ActionResult(extracted_content=msg, include_in_memory=True)
@@ -0,0 +1,195 @@
+import asyncio
+from contextlib import asynccontextmanager
+from browser_use import BrowserSession
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.services.metrics import ACTIVE_BROWSERS
+
+class PooledBrowser:
+    """A launched browser session plus its usage bookkeeping"""
+
+    def __init__(self, browser_session: BrowserSession):
+        self.browser_session = browser_session
+        self.uses = 0
+        # Context the browser was launched with, idle browsers point back at it
+        self.base_context = browser_session.browser_context
+        # Context of the current lease, closed on checkin
+        self.lease_context = None
+
+class BrowserPool:
+    """Warm pool of reusable browser sessions shared by all agents"""
+
+    def __init__(self):
+        self.min_size = Config.BROWSER_POOL_MIN_SIZE
+        self.max_size = Config.BROWSER_POOL_MAX_SIZE
+        self.max_uses = Config.BROWSER_POOL_MAX_USES
+        self._idle: list[PooledBrowser] = []
+        self._size = 0
+        self._closed = False
+        self._semaphore = None
+        self._lock = None
+
+    def _ensure_primitives(self):
+        """Create asyncio primitives lazily so they bind to the running loop"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_size)
+            self._lock = asyncio.Lock()
+
+    @property
+    def size(self) -> int:
+        """Number of browsers currently launched (idle and leased)"""
+        return self._size
+
+    @property
+    def idle_count(self) -> int:
+        """Number of launched browsers waiting for a lease"""
+        return len(self._idle)
+
+    async def start(self):
+        """Pre-launch the minimum number of browsers"""
+        self._ensure_primitives()
+        logger.progress(f"🌐 Warming browser pool ({self.min_size}-{self.max_size} browsers)...")
+        launched = await asyncio.gather(
+            *[self._launch() for _ in range(self.min_size - self._size)],
+            return_exceptions=True
+        )
+        for browser in launched:
+            if isinstance(browser, Exception):
+                logger.error(f"Failed to pre-launch browser: {browser}")
+            else:
+                self._idle.append(browser)
+        logger.success(f"Browser pool ready with {len(self._idle)} warm browsers")
+
+    async def close(self):
+        """Kill every idle browser (leased browsers are killed on return)"""
+        self._ensure_primitives()
+        async with self._lock:
+            idle, self._idle = self._idle, []
+        self._closed = True
+        for browser in idle:
+            await self._discard(browser)
+        logger.info("🧹 Browser pool closed")
+
+    @asynccontextmanager
+    async def lease(self, policy=None):
+        """Lease a browser session with a fresh browser context, returning it to the pool afterwards.
+
+        A ResourcePolicy, if given, intercepts the session's requests for the lease.
+        """
+        self._ensure_primitives()
+        await self._semaphore.acquire()
+        browser = None
+        try:
+            browser = await self._checkout()
+            await self._open_context(browser)
+            if policy is not None:
+                await policy.apply(browser.browser_session.browser_context)
+            yield browser.browser_session
+        finally:
+            try:
+                if browser is not None:
+                    await self._checkin(browser)
+            finally:
+                self._semaphore.release()
+
+    async def _launch(self) -> PooledBrowser:
+        """Launch a new browser that survives agent runs"""
+        # keep_alive stops Agent.close() from killing the browser, and no
+        # user_data_dir gives every pooled browser its own incognito profile
+        browser_session = BrowserSession(
+            headless=Config.HEADLESS_MODE,
+            keep_alive=True,
+            user_data_dir=None,
+        )
+        await browser_session.start()
+        self._size += 1
+        ACTIVE_BROWSERS.inc()
+        return PooledBrowser(browser_session)
+
+    async def _discard(self, browser: PooledBrowser):
+        """Kill a browser and remove it from the pool"""
+        self._size -= 1
+        ACTIVE_BROWSERS.dec()
+        try:
+            await browser.browser_session.kill()
+        except Exception as e:
+            logger.error(f"Failed to kill pooled browser: {e}")
+
+    async def _checkout(self) -> PooledBrowser:
+        """Take a healthy idle browser, launching one if none is available"""
+        while True:
+            async with self._lock:
+                browser = self._idle.pop() if self._idle else None
+            if browser is None:
+                return await self._launch()
+            if await browser.browser_session.is_connected(restart=True):
+                return browser
+            logger.info("♻️ Recycling unhealthy pooled browser")
+            await self._discard(browser)
+
+    async def _checkin(self, browser: PooledBrowser):
+        """Close the lease's context, recycling the browser when worn out or unhealthy"""
+        browser.uses += 1
+        if self._closed:
+            await self._discard(browser)
+            return
+        if browser.uses >= self.max_uses:
+            logger.info(f"♻️ Recycling pooled browser after {browser.uses} uses")
+            await self._discard(browser)
+        elif not await self._close_context(browser):
+            logger.info("♻️ Recycling pooled browser whose context failed to close")
+            await self._discard(browser)
+        else:
+            async with self._lock:
+                self._idle.append(browser)
+            return
+
+        # Keep the pool topped up to its minimum size
+        if self._size < self.min_size:
+            try:
+                replacement = await self._launch()
+                async with self._lock:
+                    self._idle.append(replacement)
+            except Exception as e:
+                logger.error(f"Failed to replace recycled browser: {e}")
+
+    async def _open_context(self, browser: PooledBrowser):
+        """Point the session at a new browser context, so no cookies, storage, cache or
+        service workers of an earlier lease are visible. Only the browser process is reused.
+        """
+        browser_session = browser.browser_session
+        profile = browser_session.browser_profile
+        context = await browser_session.browser.new_context(
+            **profile.kwargs_for_new_context().model_dump(mode="json")
+        )
+        browser.lease_context = context
+        page = await context.new_page()
+        browser_session.browser_context = context
+        browser_session.agent_current_page = page
+        browser_session.human_current_page = page
+        browser_session._cached_clickable_element_hashes = None
+        browser_session._cached_browser_state_summary = None
+        await browser_session._setup_viewports()
+        await browser_session._setup_current_page_change_listeners()
+
+    async def _close_context(self, browser: PooledBrowser) -> bool:
+        """Close the lease's context and point the session back at the launch context"""
+        browser_session = browser.browser_session
+        context, browser.lease_context = browser.lease_context, None
+        try:
+            if context is not None:
+                await context.close()
+            pages = browser.base_context.pages
+            page = pages[0] if pages else await browser.base_context.new_page()
+            browser_session.browser_context = browser.base_context
+            browser_session.agent_current_page = page
+            browser_session.human_current_page = page
+            browser_session._cached_clickable_element_hashes = None
+            browser_session._cached_browser_state_summary = None
+            return await browser_session.is_connected(restart=True)
+        except Exception as e:
+            logger.error(f"Failed to close pooled browser context: {e}")
+            return False
+
+# Global instance
+browser_pool = BrowserPool()
@@ -0,0 +1,144 @@
+import asyncio
+import uuid
+from datetime import datetime
+from app.services.agent_worker_pool import agent_worker_pool
+from app.services.dataverse_form_data_service import DataverseFormDataService
+from app.services.job_scheduler import job_scheduler, lane_for_form
+from app.services.job_store import job_store
+from app.services.attachment_store import attachment_store
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.utils.agent_tracker import agent_tracker
+
+class BulkSubmissionManager:
+    """Runs batches of form submissions on a fixed-size pool of agent workers"""
+
+    def __init__(self):
+        self.worker_count = Config.BULK_WORKER_COUNT
+        self.batches: dict[str, dict] = {}
+        self._queue = None
+        self._workers: list[asyncio.Task] = []
+
+    def _ensure_workers(self):
+        """Start the worker pool on first use"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        for _ in range(self.worker_count - len(self._workers)):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        """Cancel the worker pool"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def create_batch(self, items: list) -> dict:
+        """Register a batch and one tracked request per item"""
+        batch_id = str(uuid.uuid4())[:8]
+        batch = {
+            "batch_id": batch_id,
+            "created_at": datetime.now().isoformat(),
+            "items": []
+        }
+        for item in items:
+            request_id = str(uuid.uuid4())[:8]
+            account_id = item.account_id or Config.TARGET_ACCOUNT_ID
+            agent_tracker.create_request_file(request_id)
+            agent_tracker.log_action(request_id, "📋 Request received", f"Batch {batch_id}, Account ID: {item.account_id or 'default'}")
+            await job_store.create(
+                request_id, "form", account_id=account_id, batch_id=batch_id, callback_url=item.callback_url
+            )
+            await attachment_store.create_manifest(request_id)
+            batch["items"].append({
+                "request_id": request_id,
+                "batch_id": batch_id,
+                "account_id": account_id,
+                "custom_data": item.custom_data,
+                "agent_profile": item.agent_profile
+            })
+        self.batches[batch_id] = batch
+        return batch
+
+    async def process_batch(self, batch_id: str):
+        """Prefetch all Dataverse data in bulk, then queue the items for the workers"""
+        batch = self.batches.pop(batch_id)
+        self._ensure_workers()
+        try:
+            Config.validate()
+            form_data_service = DataverseFormDataService()
+            prefetched = await form_data_service.fetch_form_data_by_account_ids(
+                [item["account_id"] for item in batch["items"]]
+            )
+        except Exception as e:
+            logger.error(f"Bulk prefetch failed for batch {batch_id}: {e}")
+            prefetched = {}
+
+        for item in batch["items"]:
+            data = prefetched.get(item["account_id"])
+            if not data:
+                await job_store.mark_failed(item["request_id"], "Failed to fetch form data from Dataverse")
+                agent_tracker.log_action(item["request_id"], "❌ Failed to fetch form data from Dataverse")
+                agent_tracker.finish_request(item["request_id"])
+                continue
+            # Each item gets its own copy, accounts can repeat within a batch
+            data = dict(data)
+            if item["custom_data"]:
+                data.update(item["custom_data"])
+            lane = lane_for_form(data)
+            await job_store.update(item["request_id"], lane=lane)
+            await self._queue.put((item, data, lane))
+
+    async def _worker(self):
+        """Run queued form submissions one at a time"""
+        while True:
+            item, data, lane = await self._queue.get()
+            request_id = item["request_id"]
+            try:
+                # Wait for queue room instead of rejecting, the batch was already accepted
+                future = await job_scheduler.submit(
+                    lane, lambda: self._run_item(item, data), request_id, block=True
+                )
+                result = await future
+                await job_store.mark_completed(request_id, result)
+                agent_tracker.log_action(request_id, "✅ Form filling agent completed successfully")
+            except Exception as e:
+                await job_store.mark_failed(request_id, str(e))
+                agent_tracker.log_action(request_id, "❌ Background form submission failed", str(e))
+                logger.error(f"Bulk form submission {request_id} failed: {e}")
+            finally:
+                agent_tracker.finish_request(request_id)
+                self._queue.task_done()
+
+    async def _run_item(self, item: dict, data: dict):
+        """Run one batch item once the scheduler gives it a slot"""
+        logger.bind(request_id=item["request_id"], batch_id=item["batch_id"])
+        await job_store.mark_running(item["request_id"])
+        with agent_tracker.phase(item["request_id"], "agent"):
+            agent_tracker.log_action(item["request_id"], "🤖 Starting form filling agent")
+            return await agent_worker_pool.run(
+                "form", item["request_id"], data, item["request_id"], item["agent_profile"]
+            )
+    
+    async def get_status(self, batch_id: str) -> dict | None:
+        """Aggregate progress and per-item results for a batch from the job store"""
+        jobs = await job_store.list_by_batch(batch_id)
+        if not jobs:
+            return None
+        jobs.sort(key=lambda job: job["created_at"])
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        for job in jobs:
+            counts[job["state"]] = counts.get(job["state"], 0) + 1
+        total = len(jobs)
+        return {
+            "batch_id": batch_id,
+            "created_at": jobs[0]["created_at"],
+            "total": total,
+            "counts": counts,
+            "done": counts["queued"] + counts["running"] == 0,
+            "items": jobs
+        }
+
+# Global instance
+bulk_submission_manager = BulkSubmissionManager()
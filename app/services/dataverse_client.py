@@ -0,0 +1,102 @@
+import asyncio
+import time
+import httpx
+from app.utils.config import Config
+from app.utils.logger import logger
+
+# Process-wide keep-alive client shared by every Dataverse call
+_http_client: httpx.AsyncClient | None = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared pooled HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=Config.DATAVERSE_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=Config.DATAVERSE_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.DATAVERSE_MAX_CONNECTIONS,
+            ),
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def dataverse_request(method: str, url: str, headers: dict | None = None, **kwargs) -> httpx.Response:
+    """Call the Dataverse Web API, retrying once with a new token if it was rejected"""
+    client = get_http_client()
+    for attempt in range(2):
+        token = await token_provider.get_token()
+        request_headers = {
+            'Authorization': f'Bearer {token}',
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+            'OData-MaxVersion': '4.0',
+            'OData-Version': '4.0',
+            **(headers or {})
+        }
+        response = await client.request(method, url, headers=request_headers, **kwargs)
+        if response.status_code == 401 and attempt == 0:
+            token_provider.invalidate()
+            continue
+        return response
+    return response
+
+class DataverseTokenProvider:
+    """Process-wide OAuth token cache that refreshes ahead of expiry"""
+
+    def __init__(self):
+        self.tenant_id = Config.TENANT_ID
+        self.client_id = Config.CLIENT_ID
+        self.client_secret = Config.CLIENT_SECRET
+        self.base_url = Config.DATAVERSE_URL
+        self.refresh_margin = Config.DATAVERSE_TOKEN_REFRESH_MARGIN
+        self._access_token = None
+        self._expires_at = 0.0
+        self._refresh_task: asyncio.Task | None = None
+
+    def _is_fresh(self) -> bool:
+        return self._access_token is not None and time.monotonic() < self._expires_at - self.refresh_margin
+
+    async def get_token(self) -> str:
+        """Get a valid access token, refreshing it when it is close to expiry"""
+        if self._is_fresh():
+            return self._access_token
+        # Single-flight: concurrent callers all await the same refresh request
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return await asyncio.shield(self._refresh_task)
+
+    def invalidate(self):
+        """Drop the cached token, e.g. after Dataverse rejected it"""
+        self._access_token = None
+        self._expires_at = 0.0
+
+    async def _refresh(self) -> str:
+        """Request a new token from Azure AD"""
+        token_url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
+        data = {
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'scope': f'{self.base_url}/.default',
+            'grant_type': 'client_credentials'
+        }
+        try:
+            requested_at = time.monotonic()
+            response = await get_http_client().post(token_url, data=data)
+            response.raise_for_status()
+            token_data = response.json()
+            self._access_token = token_data['access_token']
+            self._expires_at = requested_at + int(token_data.get('expires_in', 3600))
+            return self._access_token
+        except Exception as e:
+            logger.error(f"Failed to get access token: {e}")
+            raise
+
+# Global instance
+token_provider = DataverseTokenProvider()
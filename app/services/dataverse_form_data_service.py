@@ -1,6 +1,37 @@
-import requests
+import json
+import re
+import uuid
 from app.utils.config import Config
 from app.utils.logger import logger
+from app.services.dataverse_client import dataverse_request, token_provider
+from app.services.dataverse_mirror import dataverse_mirror
+from app.services.metrics import timer, DATAVERSE_FETCH_SECONDS
+
+API_PATH = "/api/data/v9.2"
+
+def _strip_annotations(record: dict) -> dict:
+    """Drop @odata.* annotation keys from an entity"""
+    return {key: value for key, value in record.items() if not key.startswith('@')}
+
+def _parse_batch_response(content_type: str, body: str) -> list:
+    """Split an OData $batch multipart response into (status, json body) per request, in order"""
+    boundary = re.search(r'boundary=([^;\s]+)', content_type).group(1).strip('"')
+    results = []
+    for part in body.split(f"--{boundary}")[1:]:
+        if part.startswith("--"):
+            break
+        status_match = re.search(r'HTTP/1\.1 (\d{3})', part)
+        if not status_match:
+            continue
+        # The entity body follows the blank line after the embedded HTTP headers
+        http_part = part[status_match.start():]
+        payload = re.split(r'\r?\n\r?\n', http_part, maxsplit=1)
+        body_text = payload[1].strip() if len(payload) > 1 else ""
+        try:
+            results.append((int(status_match.group(1)), json.loads(body_text) if body_text else None))
+        except ValueError:
+            results.append((int(status_match.group(1)), None))
+    return results
 
 class DataverseFormDataService:
     def __init__(self):
@@ -8,72 +39,115 @@ class DataverseFormDataService:
         self.client_id = Config.CLIENT_ID
         self.client_secret = Config.CLIENT_SECRET
         self.tenant_id = Config.TENANT_ID
-        self.access_token = None
+        self.account_fields = Config.DATAVERSE_ACCOUNT_FIELDS
+        self.contact_fields = Config.DATAVERSE_CONTACT_FIELDS
     
-    def get_access_token(self):
-        """Get OAuth access token from Azure AD"""
-        if self.access_token:
-            return self.access_token
-            
-        token_url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
-        
-        data = {
-            'client_id': self.client_id,
-            'client_secret': self.client_secret,
-            'scope': f'{self.base_url}/.default',
-            'grant_type': 'client_credentials'
+    async def get_access_token(self):
+        """Get OAuth access token from the shared token provider"""
+        return await token_provider.get_token()
+    
+    def _account_query(self, account_id) -> str:
+        """Relative URL fetching one account and its contacts, projected to the form fields"""
+        return (
+            f"accounts({account_id})?$select={self.account_fields}"
+            f"&$expand=contact_customer_accounts($select={self.contact_fields})"
+        )
+    
+    def _combine(self, account_id, account_data: dict) -> dict:
+        """Split an expanded account into the account/contacts shape the agent expects"""
+        contacts = account_data.pop('contact_customer_accounts', None) or []
+        return {
+            'account': _strip_annotations(account_data),
+            'contacts': [_strip_annotations(contact) for contact in contacts],
+            'account_id': account_id
         }
-        
-        try:
-            response = requests.post(token_url, data=data)
-            response.raise_for_status()
-            token_data = response.json()
-            self.access_token = token_data['access_token']
-            return self.access_token
-        except Exception as e:
-            logger.error(f"Failed to get access token: {e}")
-            raise
     
-    def fetch_form_data_by_account_id(self, account_id=None):
-        """Fetch form data by account ID from Dataverse"""
+    async def fetch_form_data_by_account_id(self, account_id=None):
+        """Fetch form data by account ID from Dataverse in a single request"""
         if not account_id:
             account_id = Config.TARGET_ACCOUNT_ID
+        
+        # Serve from the local mirror when enabled, falling back to a live fetch on a miss
+        if dataverse_mirror.enabled:
+            with timer(DATAVERSE_FETCH_SECONDS, source="mirror"):
+                mirrored = await dataverse_mirror.get(account_id)
+            if mirrored:
+                return mirrored
             
         try:
-            token = self.get_access_token()
-            headers = {
-                'Authorization': f'Bearer {token}',
-                'Content-Type': 'application/json'
-            }
-            
-            # Fetch account details
-            account_url = f"{self.base_url}/api/data/v9.2/accounts({account_id})"
-            response = requests.get(account_url, headers=headers)
+            # One GET returns the account and its contacts with only the needed columns
+            url = f"{self.base_url}{API_PATH}/{self._account_query(account_id)}"
+            with timer(DATAVERSE_FETCH_SECONDS, source="live"):
+                response = await dataverse_request('GET', url)
             response.raise_for_status()
-            
-            account_data = response.json()
-            
-            # Fetch related contacts
-            contacts_url = f"{self.base_url}/api/data/v9.2/accounts({account_id})/contact_customer_accounts"
-            contacts_response = requests.get(contacts_url, headers=headers)
-            
-            contacts_data = []
-            if contacts_response.status_code == 200:
-                contacts_data = contacts_response.json().get('value', [])
-            
-            # Combine account and contacts data
-            combined_data = {
-                'account': account_data,
-                'contacts': contacts_data,
-                'account_id': account_id
-            }
-            
-            return combined_data
+            data = self._combine(account_id, response.json())
+            if dataverse_mirror.enabled:
+                await dataverse_mirror.store(data)
+            return data
             
         except Exception as e:
             logger.error(f"Failed to fetch form data: {e}")
             return None
     
+    async def fetch_form_data_by_account_ids(self, account_ids):
+        """Fetch form data for many accounts using OData $batch requests.
+
+        Returns a dict of account ID -> form data, or None for accounts that failed.
+        """
+        account_ids = list(dict.fromkeys(account_ids))
+        results = {}
+        if dataverse_mirror.enabled:
+            for account_id in account_ids:
+                mirrored = await dataverse_mirror.get(account_id)
+                if mirrored:
+                    results[account_id] = mirrored
+            account_ids = [account_id for account_id in account_ids if account_id not in results]
+        batch_size = Config.DATAVERSE_BATCH_SIZE
+        for start in range(0, len(account_ids), batch_size):
+            chunk = account_ids[start:start + batch_size]
+            try:
+                with timer(DATAVERSE_FETCH_SECONDS, source="batch"):
+                    results.update(await self._fetch_batch(chunk))
+            except Exception as e:
+                logger.error(f"Failed to fetch form data batch: {e}")
+                results.update({account_id: None for account_id in chunk})
+        return results
+    
+    async def _fetch_batch(self, account_ids) -> dict:
+        """Resolve one chunk of account IDs with a single $batch call"""
+        boundary = f"batch_{uuid.uuid4()}"
+        parts = []
+        for account_id in account_ids:
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                "Content-Transfer-Encoding: binary\r\n\r\n"
+                f"GET {self.base_url}{API_PATH}/{self._account_query(account_id)} HTTP/1.1\r\n"
+                "Accept: application/json\r\n\r\n"
+            )
+        body = "".join(parts) + f"--{boundary}--\r\n"
+        
+        response = await dataverse_request(
+            'POST', f"{self.base_url}{API_PATH}/$batch",
+            headers={'Content-Type': f'multipart/mixed; boundary={boundary}'},
+            content=body.encode('utf-8')
+        )
+        response.raise_for_status()
+        
+        results = {}
+        parsed = _parse_batch_response(response.headers.get('content-type', ''), response.text)
+        for account_id, (status, payload) in zip(account_ids, parsed):
+            if status == 200 and payload:
+                results[account_id] = self._combine(account_id, payload)
+                if dataverse_mirror.enabled:
+                    await dataverse_mirror.store(results[account_id])
+            else:
+                logger.error(f"Failed to fetch form data for account {account_id}: HTTP {status}")
+                results[account_id] = None
+        for account_id in account_ids[len(parsed):]:
+            results[account_id] = None
+        return results
+    
     def display_form_data(self, data):
         """Display form data information in a formatted way"""
         if not data:
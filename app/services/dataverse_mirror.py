@@ -0,0 +1,247 @@
+import asyncio
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.services.dataverse_client import dataverse_request
+
+API_PATH = "/api/data/v9.2"
+
+# Lookup column linking a contact to its parent account
+CONTACT_PARENT_FIELD = "_parentcustomerid_value"
+
+# Primary key column per mirrored entity set
+KEY_FIELDS = {"accounts": "accountid", "contacts": "contactid"}
+
+# Record ID in an "@id" link such as .../contacts(<guid>)
+_RECORD_ID = re.compile(r'\(([^)]+)\)$')
+
+class DataverseMirror:
+    """Local SQLite mirror of accounts and contacts, kept current by change-tracking delta sync.
+
+    Reads count as misses once the last completed sync of either entity is older
+    than the max age, unless the account itself was fetched live since then.
+    """
+
+    def __init__(self):
+        self.enabled = Config.DATAVERSE_MIRROR_ENABLED
+        self.db_path = Path(Config.DATAVERSE_MIRROR_PATH)
+        self.sync_interval = Config.DATAVERSE_MIRROR_SYNC_INTERVAL
+        self.max_age = Config.DATAVERSE_MIRROR_MAX_AGE
+        self.base_url = Config.DATAVERSE_URL
+        self._task = None
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _init_db(self):
+        """Create the mirror tables on first use"""
+        if self._initialized:
+            return
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS accounts (
+                    accountid TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    synced_at TEXT NOT NULL,
+                    fetched_at TEXT
+                );
+                CREATE TABLE IF NOT EXISTS contacts (
+                    contactid TEXT PRIMARY KEY,
+                    accountid TEXT,
+                    data TEXT NOT NULL,
+                    synced_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_contacts_accountid ON contacts(accountid);
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    entity TEXT PRIMARY KEY,
+                    delta_link TEXT NOT NULL,
+                    last_synced_at TEXT
+                );
+            """)
+            # Mirrors created before freshness tracking lack the live fetch and last sync columns
+            if "fetched_at" not in {row[1] for row in connection.execute("PRAGMA table_info(accounts)")}:
+                connection.execute("ALTER TABLE accounts ADD COLUMN fetched_at TEXT")
+            if "last_synced_at" not in {row[1] for row in connection.execute("PRAGMA table_info(sync_state)")}:
+                connection.execute("ALTER TABLE sync_state ADD COLUMN last_synced_at TEXT")
+        self._initialized = True
+
+    # Reads and writes (run in a worker thread, sqlite3 is blocking)
+
+    def _read(self, account_id: str) -> dict | None:
+        self._init_db()
+        oldest = (datetime.now() - timedelta(seconds=self.max_age)).isoformat()
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT data, fetched_at FROM accounts WHERE accountid = ?", (account_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            synced = dict(connection.execute("SELECT entity, last_synced_at FROM sync_state").fetchall())
+            stale = [entity for entity in KEY_FIELDS if (synced.get(entity) or "") < oldest]
+            if stale and (row[1] or "") < oldest:
+                logger.info(f"⌛ Dataverse mirror {', '.join(stale)} older than {self.max_age}s, reading live", sample=True)
+                return None
+            contacts = connection.execute(
+                "SELECT data FROM contacts WHERE accountid = ? ORDER BY contactid", (account_id,)
+            ).fetchall()
+        return {
+            'account': json.loads(row[0]),
+            'contacts': [json.loads(contact[0]) for contact in contacts],
+            'account_id': account_id
+        }
+
+    def _write(self, data: dict):
+        """Store a live-fetched account, replacing its contacts with the live ones"""
+        self._init_db()
+        now = datetime.now().isoformat()
+        account_id = data['account_id']
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO accounts (accountid, data, synced_at, fetched_at) VALUES (?, ?, ?, ?)",
+                (account_id, json.dumps(data['account']), now, now)
+            )
+            # Contacts that moved to another account or were deleted are not in the live data
+            connection.execute("DELETE FROM contacts WHERE accountid = ?", (account_id,))
+            for contact in data['contacts']:
+                connection.execute(
+                    "INSERT OR REPLACE INTO contacts (contactid, accountid, data, synced_at) VALUES (?, ?, ?, ?)",
+                    (contact.get('contactid'), account_id, json.dumps(contact), now)
+                )
+
+    @staticmethod
+    def _removed_id(entity: str, record: dict) -> str | None:
+        """ID of a delta entry for a deleted record, None for a new or changed one.
+
+        Deletions come as "$deletedEntity" entries with an id, or as "@removed"
+        entries with the key column or an "@id" link.
+        """
+        if '$deletedEntity' in record.get('@odata.context', ''):
+            return record['id']
+        if '@removed' in record:
+            match = _RECORD_ID.search(record.get('@id', ''))
+            return record.get(KEY_FIELDS[entity]) or record.get('id') or (match.group(1) if match else None)
+        return None
+
+    def _apply_changes(self, entity: str, records: list, delta_link: str | None):
+        """Apply one page of delta changes, remembering the delta link and sync time after the last page"""
+        self._init_db()
+        now = datetime.now().isoformat()
+        with self._connect() as connection:
+            for record in records:
+                removed_id = self._removed_id(entity, record)
+                if removed_id is not None or '@removed' in record:
+                    if entity == 'accounts':
+                        connection.execute("DELETE FROM accounts WHERE accountid = ?", (removed_id,))
+                    else:
+                        connection.execute("DELETE FROM contacts WHERE contactid = ?", (removed_id,))
+                    continue
+                clean = {key: value for key, value in record.items() if not key.startswith('@')}
+                if entity == 'accounts':
+                    connection.execute(
+                        "INSERT OR REPLACE INTO accounts (accountid, data, synced_at) VALUES (?, ?, ?)",
+                        (clean['accountid'], json.dumps(clean), now)
+                    )
+                else:
+                    parent_id = clean.pop(CONTACT_PARENT_FIELD, None)
+                    connection.execute(
+                        "INSERT OR REPLACE INTO contacts (contactid, accountid, data, synced_at) VALUES (?, ?, ?, ?)",
+                        (clean['contactid'], parent_id, json.dumps(clean), now)
+                    )
+            if delta_link:
+                connection.execute(
+                    "INSERT OR REPLACE INTO sync_state (entity, delta_link, last_synced_at) VALUES (?, ?, ?)",
+                    (entity, delta_link, now)
+                )
+
+    def _get_delta_link(self, entity: str) -> str | None:
+        self._init_db()
+        with self._connect() as connection:
+            row = connection.execute("SELECT delta_link FROM sync_state WHERE entity = ?", (entity,)).fetchone()
+        return row[0] if row else None
+
+    def _reset_entity(self, entity: str):
+        """Forget an entity's delta link so the next sync starts over"""
+        self._init_db()
+        with self._connect() as connection:
+            connection.execute("DELETE FROM sync_state WHERE entity = ?", (entity,))
+
+    # Public API
+
+    async def get(self, account_id: str) -> dict | None:
+        """Read an account's form data from the mirror, None on a miss or when the mirror is stale"""
+        try:
+            return await asyncio.to_thread(self._read, account_id)
+        except Exception as e:
+            logger.error(f"Failed to read Dataverse mirror: {e}")
+            return None
+
+    async def store(self, data: dict):
+        """Add live-fetched form data to the mirror"""
+        try:
+            await asyncio.to_thread(self._write, data)
+        except Exception as e:
+            logger.error(f"Failed to write Dataverse mirror: {e}")
+
+    async def sync_entity(self, entity: str, select: str) -> int:
+        """Pull changes for one entity since the last delta link, returns the change count"""
+        delta_link = await asyncio.to_thread(self._get_delta_link, entity)
+        url = delta_link or f"{self.base_url}{API_PATH}/{entity}?$select={select}"
+        headers = {'Prefer': f'odata.track-changes, odata.maxpagesize={Config.DATAVERSE_MIRROR_PAGE_SIZE}'}
+        changes = 0
+        while url:
+            response = await dataverse_request('GET', url, headers=headers)
+            if response.status_code in (400, 410) and delta_link:
+                # Delta tokens expire; fall back to a full initial sync
+                logger.info(f"⌛ Delta link for {entity} expired, starting a full sync")
+                await asyncio.to_thread(self._reset_entity, entity)
+                return await self.sync_entity(entity, select)
+            response.raise_for_status()
+            payload = response.json()
+            records = payload.get('value', [])
+            url = payload.get('@odata.nextLink')
+            await asyncio.to_thread(self._apply_changes, entity, records, payload.get('@odata.deltaLink'))
+            changes += len(records)
+        return changes
+
+    async def sync(self):
+        """Run one delta sync of accounts and contacts"""
+        accounts = await self.sync_entity('accounts', Config.DATAVERSE_ACCOUNT_FIELDS)
+        contacts = await self.sync_entity('contacts', f"{Config.DATAVERSE_CONTACT_FIELDS},{CONTACT_PARENT_FIELD}")
+        if accounts or contacts:
+            logger.info(f"🔄 Dataverse mirror synced {accounts} account and {contacts} contact changes")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Dataverse mirror sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self):
+        """Start the background sync job when the mirror is enabled"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🗄️ Dataverse mirror sync started (every {self.sync_interval}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Global instance
+dataverse_mirror = DataverseMirror()
@@ -0,0 +1,124 @@
+import asyncio
+import json
+from collections import OrderedDict, deque
+from app.utils.config import Config
+from app.utils.agent_tracker import agent_tracker
+from app.services.job_store import ACTIVE_STATES
+
+# Action logged by AgentTracker.finish_request, ends a request's stream
+FINISHED_ACTION = "request_finished"
+
+class EventStream:
+    """Fans AgentTracker events out to live subscribers, keeping a ring buffer per request"""
+
+    def __init__(self):
+        self.buffer_size = Config.STREAM_BUFFER_SIZE
+        self.max_requests = Config.STREAM_MAX_REQUESTS
+        self.heartbeat = Config.STREAM_HEARTBEAT
+        self._buffers: OrderedDict[str, deque] = OrderedDict()
+        self._sequences: dict[str, int] = {}
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._loop = None
+
+    def start(self):
+        """Start receiving tracker events on the running event loop"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            agent_tracker.add_listener(self.publish)
+
+    def publish(self, record: dict):
+        """Accept an event from any thread (or forwarded from a worker process)"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._publish(record)
+        else:
+            self._loop.call_soon_threadsafe(self._publish, record)
+
+    def _publish(self, record: dict):
+        request_id = record["request_id"]
+        buffer = self._buffers.get(request_id)
+        if buffer is None:
+            buffer = self._buffers[request_id] = deque(maxlen=self.buffer_size)
+            self._evict()
+        else:
+            self._buffers.move_to_end(request_id)
+        sequence = self._sequences.get(request_id, 0) + 1
+        self._sequences[request_id] = sequence
+        event = (sequence, record)
+        buffer.append(event)
+        for queue in self._subscribers.get(request_id, ()):
+            if queue.full():
+                # A slow client loses its oldest undelivered event rather than blocking others
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _evict(self):
+        """Drop the least recently active buffers that nobody is watching"""
+        for request_id in list(self._buffers):
+            if len(self._buffers) <= self.max_requests:
+                return
+            if not self._subscribers.get(request_id):
+                del self._buffers[request_id]
+                self._sequences.pop(request_id, None)
+
+    def has_history(self, request_id: str) -> bool:
+        return request_id in self._buffers
+
+    async def snapshot_sse(self, job: dict):
+        """SSE body for a run that finished before its events were buffered (e.g. before a restart)"""
+        yield f"event: status\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+
+    def _attach(self, request_id: str, last_event_id: int) -> asyncio.Queue:
+        """Register a subscriber queue pre-filled with buffered history after last_event_id"""
+        queue = asyncio.Queue(maxsize=self.buffer_size)
+        for event in self._buffers.get(request_id, ()):
+            if event[0] > last_event_id:
+                queue.put_nowait(event)
+        self._subscribers.setdefault(request_id, set()).add(queue)
+        return queue
+
+    def _detach(self, request_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(request_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[request_id]
+
+    def _finished(self, request_id: str) -> bool:
+        """Whether the request's finish event is buffered"""
+        return any(record["action"] == FINISHED_ACTION for _, record in self._buffers.get(request_id, ()))
+
+    async def sse(self, request_id: str, last_event_id: int = 0, job: dict | None = None):
+        """Server-Sent Events body for a request: recent history, then live events until it finishes.
+
+        A client reconnecting after the last event of a finished request (its run
+        no longer active, or its finish event already delivered) gets the run's
+        final status instead of keep-alives.
+        """
+        queue = self._attach(request_id, last_event_id)
+        try:
+            if queue.empty() and (self._finished(request_id) or (job is not None and job["state"] not in ACTIVE_STATES)):
+                if job is not None:
+                    async for chunk in self.snapshot_sse(job):
+                        yield chunk
+                return
+            while True:
+                try:
+                    sequence, record = await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {sequence}\nevent: progress\ndata: {json.dumps(record, ensure_ascii=False)}\n\n"
+                if record["action"] == FINISHED_ACTION:
+                    return
+        finally:
+            self._detach(request_id, queue)
+
+# Global instance
+event_stream = EventStream()
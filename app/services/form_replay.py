@@ -0,0 +1,351 @@
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+import portalocker
+from browser_use import BrowserSession
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.utils.agent_tracker import agent_tracker
+from app.services.pa_payload import PAYLOAD_FORMAT, is_date_field
+
+# Actions that can be replayed without the LLM; anything else in a recording
+# (scrolling, waiting, extraction, done) only served the LLM and is dropped
+REPLAYABLE_ACTIONS = {'go_to_url', 'click_element_by_index', 'input_text', 'select_dropdown_option', 'send_keys', 'upload_file'}
+
+# Element attributes compared at replay time to detect that the page diverged
+IDENTITY_ATTRIBUTES = ('id', 'name', 'type', 'placeholder', 'aria-label')
+
+# Layout of the script file; older scripts may hold typed patient data or a guessed
+# submit step and are deleted
+SCRIPT_FORMAT = 3
+
+# browser-use reports the clicked element's text in the click result
+CLICK_RESULT = re.compile(r'Clicked button with index \d+: (.*)', re.DOTALL)
+
+# Element attributes that may carry a button's label
+LABEL_ATTRIBUTES = ('value', 'aria-label', 'title', 'name', 'id')
+
+# Seconds to wait for another run writing the script before skipping this recording
+RECORD_LOCK_TIMEOUT = 10
+
+class ReplayDivergence(Exception):
+    """Raised when the page no longer matches the recording"""
+
+class ReplaySubmitUnconfirmed(Exception):
+    """Raised when the replay clicked Submit but the success screen never appeared.
+
+    The LLM must not take over at that point, it could submit the PA request a second time.
+    """
+
+def _flatten(value, prefix: str = "") -> dict:
+    """Flatten nested dicts/lists into dotted paths -> leaf values"""
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}{key}."))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            flat.update(_flatten(item, f"{prefix}{index}."))
+    elif value is not None:
+        flat[prefix[:-1]] = value
+    return flat
+
+def _resolve(data: dict, path: str):
+    """Look up a dotted path produced by _flatten"""
+    value = data
+    for key in path.split('.'):
+        if isinstance(value, list):
+            value = value[int(key)]
+        elif isinstance(value, dict):
+            value = value[key]
+        else:
+            raise KeyError(path)
+    return value
+
+# Payload dates are already in portal format, so bound values are typed as they are
+TRANSFORMS = {
+    None: lambda value: str(value),
+}
+
+# Configured placeholders the agent types for missing data, the only literals kept for typing
+DEFAULTS = {
+    'missing': lambda: Config.DEFAULT_MISSING_VALUE,
+    'date': lambda: Config.DEFAULT_DATE_VALUE,
+}
+
+def _find_binding(text: str, flat_data: dict) -> dict | None:
+    """Find which data field (or configured default) a typed value came from.
+
+    A value shared by several fields is left unbound, the field it was typed
+    into cannot be told from the value alone.
+    """
+    text = text.strip()
+    paths = [path for path, value in flat_data.items() if str(value).strip() == text]
+    if len(paths) == 1:
+        return {"path": paths[0], "transform": None}
+    if paths:
+        return None
+    for name, default in DEFAULTS.items():
+        if default() and default().strip() == text:
+            return {"default": name}
+    return None
+
+def _could_submit(action_name: str, params: dict, element, result) -> bool:
+    """True for a step that may have sent the form: Enter, or a click on a FORM_SUBMIT_LABELS button"""
+    if action_name == 'send_keys':
+        return 'enter' in params.get('keys', '').lower()
+    if action_name != 'click_element_by_index' or element is None:
+        return False
+    texts = [element.attributes.get(key) for key in LABEL_ATTRIBUTES]
+    match = CLICK_RESULT.search(result.extracted_content or '')
+    if match:
+        texts.append(match.group(1))
+    labels = [label.strip() for label in Config.FORM_SUBMIT_LABELS.split(',') if label.strip()]
+    return any(
+        re.search(rf'\b{re.escape(label)}\b', text, re.IGNORECASE)
+        for text in texts if text for label in labels
+    )
+
+def _describe(step: dict) -> str:
+    """What a step did, from the action and the field's identity only (never typed values)"""
+    params = step["params"]
+    if step["action"] == 'go_to_url':
+        return f"Open {params['url']}"
+    if step["action"] == 'send_keys':
+        return f"Press {params['keys']}"
+    element = step["element"] or {}
+    attributes = element.get("attributes", {})
+    field = next((attributes[key] for key in ('aria-label', 'placeholder', 'name', 'id') if attributes.get(key)),
+                 element.get("tag_name", "element"))
+    return {
+        'click_element_by_index': f"Click {field}",
+        'input_text': f"Fill {field}",
+        'select_dropdown_option': f"Choose an option in {field}",
+        'upload_file': f"Upload the attachments to {field}",
+    }[step["action"]]
+
+class FormReplay:
+    """Records successful form-filling runs and replays them with new data"""
+
+    def __init__(self):
+        self.replay_dir = Path(Config.FORM_REPLAY_DIR)
+        self.replay_dir.mkdir(exist_ok=True)
+        self.script_path = self.replay_dir / "add_pa_request.json"
+
+    def _read(self) -> dict | None:
+        if not self.script_path.exists():
+            return None
+        try:
+            return json.loads(self.script_path.read_text(encoding='utf-8'))
+        except Exception as e:
+            logger.error(f"Failed to read replay script: {e}")
+            return None
+
+    def load(self) -> dict | None:
+        """Load the latest replay script, skipping one bound to an older data format"""
+        script = self._read()
+        if script and script.get("script_format") != SCRIPT_FORMAT:
+            logger.info("🎬 Deleting replay script of an older layout, it will be re-recorded")
+            self.script_path.unlink(missing_ok=True)
+            return None
+        if script and script.get("data_format") != PAYLOAD_FORMAT:
+            logger.info(f"🎬 Replay script v{script['version']} uses an older data format, it will be re-recorded")
+            return None
+        return script
+
+    def steps_from_history(self, history, data: dict) -> list[dict]:
+        """Convert an agent history into replay steps bound to data fields.
+
+        Typed values are not stored, only the data field or default they came from.
+        Dropdown option labels are the portal's own and kept when no field matches.
+        Steps that may have sent the form (see _could_submit) are marked "submit".
+        """
+        flat_data = _flatten(data)
+        steps = []
+        for item in history.history:
+            if not item.model_output:
+                continue
+            elements = item.state.interacted_element or [None] * len(item.model_output.action)
+            for action, element, result in zip(item.model_output.action, elements, item.result):
+                if result.error:
+                    continue
+                action_name, params = next(iter(action.model_dump(exclude_none=True).items()))
+                if action_name not in REPLAYABLE_ACTIONS:
+                    continue
+                params = dict(params)
+                params.pop('index', None)
+
+                step = {
+                    "action": action_name,
+                    "params": params,
+                    "bind": None,
+                    "element": None,
+                }
+                if element is not None:
+                    step["element"] = {
+                        "xpath": element.xpath,
+                        "tag_name": element.tag_name,
+                        "attributes": {key: element.attributes[key] for key in IDENTITY_ATTRIBUTES if key in element.attributes},
+                    }
+                elif action_name not in ('go_to_url', 'send_keys'):
+                    # An element action without a recorded element cannot be replayed
+                    continue
+                if 'text' in params:
+                    step["bind"] = _find_binding(params['text'], flat_data)
+                    if step["bind"] or action_name == 'input_text':
+                        del params['text']
+                if _could_submit(action_name, params, element, result):
+                    step["submit"] = True
+                step["description"] = _describe(step)
+                steps.append(step)
+        return steps
+
+    def record(self, history, data: dict, prefix_steps: list[dict] | None = None):
+        """Save a new script version from a successful run.
+
+        A run whose submit step cannot be identified is not recorded, replaying it
+        could hand a form that was already sent to the LLM. Runs of all worker
+        processes write under one lock file, through a temp file.
+        """
+        steps = (prefix_steps or []) + self.steps_from_history(history, data)
+        if not steps:
+            return
+        if not any(step.get("submit") for step in steps):
+            logger.warning(f"🎬 No step matched FORM_SUBMIT_LABELS ({Config.FORM_SUBMIT_LABELS}), not recording a replay script")
+            return
+        try:
+            with portalocker.Lock(str(self.script_path.with_suffix('.lock')), timeout=RECORD_LOCK_TIMEOUT):
+                previous = self._read()
+                script = {
+                    "version": (previous or {}).get("version", 0) + 1,
+                    "script_format": SCRIPT_FORMAT,
+                    "data_format": PAYLOAD_FORMAT,
+                    "recorded_at": datetime.now().isoformat(),
+                    "steps": steps,
+                }
+                temp_path = self.script_path.with_suffix(f'.{os.getpid()}.tmp')
+                temp_path.write_text(json.dumps(script, indent=2), encoding='utf-8')
+                os.replace(temp_path, self.script_path)
+        except portalocker.LockException:
+            logger.warning("🎬 Another run is writing the replay script, skipping this recording")
+            return
+        logger.success(f"Recorded form replay script v{script['version']} with {len(steps)} steps")
+
+    async def _locate(self, page, step: dict):
+        """Find the recorded element and check it is still the same field"""
+        element = step["element"]
+        locator = page.locator(f"xpath=//{element['xpath']}")
+        try:
+            await locator.first.wait_for(state='attached', timeout=Config.FORM_REPLAY_STEP_TIMEOUT * 1000)
+        except Exception:
+            raise ReplayDivergence(f"element {element['xpath']} not found")
+        if await locator.count() != 1:
+            raise ReplayDivergence(f"element {element['xpath']} is ambiguous")
+        locator = locator.first
+        for key, expected in element["attributes"].items():
+            if await locator.get_attribute(key) != expected:
+                raise ReplayDivergence(f"element {element['xpath']} attribute {key} changed")
+        return locator
+
+    def _value_for(self, step: dict, data: dict) -> str:
+        """The value to type or choose, taken from the new data.
+
+        A typed value without a binding raises ReplayDivergence so the LLM fills the field.
+        """
+        binding = step.get("bind")
+        if binding is None:
+            if step["action"] == 'select_dropdown_option' and 'text' in step["params"]:
+                return step["params"]["text"]
+            raise ReplayDivergence("typed value is not bound to a data field")
+        if 'default' in binding:
+            return DEFAULTS[binding["default"]]()
+        try:
+            return TRANSFORMS[binding["transform"]](_resolve(data, binding["path"]))
+        except (KeyError, IndexError, ValueError):
+            default = DEFAULTS['date' if is_date_field(binding["path"].rsplit('.', 1)[-1]) else 'missing']()
+            if not default:
+                raise ReplayDivergence(f"no value for {binding['path']}")
+            return default
+
+    async def _execute(self, browser_session: BrowserSession, step: dict, data: dict, upload_files: list[str]):
+        page = await browser_session.get_current_page()
+        action = step["action"]
+        if action == 'go_to_url':
+            await page.goto(step["params"]["url"], wait_until='domcontentloaded')
+            return
+        if action == 'send_keys':
+            await page.keyboard.press(step["params"]["keys"])
+            return
+
+        locator = await self._locate(page, step)
+        if action == 'click_element_by_index':
+            await locator.click()
+        elif action == 'input_text':
+            await locator.fill(self._value_for(step, data))
+        elif action == 'select_dropdown_option':
+            await locator.select_option(label=self._value_for(step, data))
+        elif action == 'upload_file':
+            if not upload_files:
+                raise ReplayDivergence("no files available for upload")
+            async with page.expect_file_chooser(timeout=Config.FORM_REPLAY_STEP_TIMEOUT * 1000) as chooser_info:
+                await locator.click()
+            file_chooser = await chooser_info.value
+            await file_chooser.set_files(upload_files)
+        await page.wait_for_load_state('domcontentloaded')
+
+    async def _wait_for_confirmation(self, browser_session: BrowserSession) -> bool:
+        """Wait for the success screen with its details fully loaded"""
+        page = await browser_session.get_current_page()
+        try:
+            await page.get_by_text(Config.FORM_SUCCESS_TEXT, exact=False).first.wait_for(
+                timeout=Config.FORM_REPLAY_CONFIRMATION_TIMEOUT * 1000
+            )
+            await page.wait_for_function(
+                "() => !document.body.innerText.includes('Loading...')",
+                timeout=Config.FORM_REPLAY_CONFIRMATION_TIMEOUT * 1000
+            )
+            return True
+        except Exception:
+            return False
+
+    async def replay(self, browser_session: BrowserSession, script: dict, data: dict,
+                     upload_files: list[str], request_id: str) -> tuple[int, bool]:
+        """Replay a script with new data.
+
+        Returns (completed step count, submitted) where submitted is True once the
+        success screen has loaded, so no LLM step is needed at all. Raises
+        ReplaySubmitUnconfirmed when the submit step may have run without the
+        success screen appearing; the run then needs a review instead of the LLM.
+        """
+        steps = script["steps"]
+        agent_tracker.log_action(request_id, f"⏩ Replaying form script v{script['version']} ({len(steps)} steps)")
+        submit_clicked = False
+        for index, step in enumerate(steps):
+            try:
+                await self._execute(browser_session, step, data, upload_files)
+            except Exception as e:
+                # Only a submit button that was never found is certain not to have been clicked
+                if submit_clicked or (step.get("submit") and not isinstance(e, ReplayDivergence)):
+                    raise ReplaySubmitUnconfirmed(
+                        f"Replay failed at step {index + 1} after clicking Submit ({e}); "
+                        "check the portal before submitting this request again"
+                    )
+                agent_tracker.log_action(request_id, f"🔀 Replay diverged at step {index + 1}", str(e))
+                logger.info(f"🔀 Replay diverged at step {index + 1}: {e}")
+                return index, False
+            submit_clicked = submit_clicked or bool(step.get("submit"))
+
+        submitted = await self._wait_for_confirmation(browser_session)
+        if submitted:
+            agent_tracker.log_action(request_id, "✅ Replay reached the submission success screen")
+        elif submit_clicked:
+            raise ReplaySubmitUnconfirmed(
+                "Replay clicked Submit but the success screen did not load; "
+                "check the portal before submitting this request again"
+            )
+        return len(steps), submitted
+
+# Global instance
+form_replay = FormReplay()
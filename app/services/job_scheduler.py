@@ -0,0 +1,181 @@
+import asyncio
+import contextvars
+from collections import deque
+from app.utils.config import Config
+from app.utils.logger import logger
+
+# Lanes in dispatch order; form lanes share the form slots, the tracker lane has its own
+# (tracker jobs are single status checks or agent fallbacks, the wait between checks holds no slot)
+FORM_LANES = ("urgent", "routine")
+TRACKER_LANE = "tracker"
+
+class QueueFullError(Exception):
+    """Raised when a lane's queue has no room for another job"""
+
+class SchedulerUnavailableError(Exception):
+    """Raised when the scheduler is not accepting jobs (not started or shutting down)"""
+
+def lane_for_form(custom_data: dict | None) -> str:
+    """Pick the form lane from the submission's Service.Priority"""
+    service = (custom_data or {}).get("Service") or {}
+    priority = str(service.get("Priority", "")).strip().lower()
+    return "urgent" if priority == "urgent" else "routine"
+
+class JobScheduler:
+    """Admission-controlled scheduler for agent runs with a global concurrency limit and priority lanes"""
+
+    def __init__(self):
+        self.max_concurrency = max(1, Config.SCHEDULER_MAX_CONCURRENCY)
+        self.tracker_slots = max(1, Config.SCHEDULER_TRACKER_SLOTS)
+        self.form_slots = self.max_concurrency
+        self.max_queue = Config.SCHEDULER_MAX_QUEUE
+        self._queues = {lane: deque() for lane in FORM_LANES + (TRACKER_LANE,)}
+        self._running_forms = 0
+        self._running_trackers = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._accepting = False
+        self._space = None
+
+    def start(self):
+        self._accepting = True
+        self._space = asyncio.Condition()
+        logger.info(
+            f"🚦 Job scheduler started ({self.form_slots} form slots, "
+            f"{self.tracker_slots} tracker slots, queue {self.max_queue} per lane)"
+        )
+
+    async def stop(self):
+        """Stop accepting jobs and cancel everything queued or running"""
+        self._accepting = False
+        for queue in self._queues.values():
+            while queue:
+                _, _, future = queue.popleft()
+                future.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @property
+    def running(self) -> int:
+        return self._running_forms + self._running_trackers
+
+    def check_admission(self, lane: str):
+        """Raise QueueFullError or SchedulerUnavailableError when the lane would refuse a job now"""
+        if not self._accepting:
+            raise SchedulerUnavailableError("Scheduler is not accepting jobs")
+        if len(self._queues[lane]) >= self.max_queue:
+            raise QueueFullError(f"The {lane} queue is full ({self.max_queue} jobs)")
+
+    def spawn(self, job_factory, job_id: str):
+        """Run a job outside the slots, such as a tracker's polling loop that only queues
+        its checks. stop() cancels it along with the queued and running jobs.
+        """
+        if not self._accepting:
+            raise SchedulerUnavailableError("Scheduler is not accepting jobs")
+
+        async def run():
+            try:
+                await job_factory()
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+
+        task = asyncio.create_task(run(), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def queue_depths(self) -> dict:
+        return {lane: len(queue) for lane, queue in self._queues.items()}
+
+    def stats(self) -> dict:
+        return {
+            "accepting": self._accepting,
+            "running_forms": self._running_forms,
+            "running_trackers": self._running_trackers,
+            "form_slots": self.form_slots,
+            "tracker_slots": self.tracker_slots,
+            "queued": self.queue_depths(),
+            "max_queue": self.max_queue
+        }
+
+    async def submit(self, lane: str, job_factory, job_id: str, block: bool = False) -> asyncio.Future:
+        """Queue a job (a zero-argument callable returning a coroutine).
+
+        Raises QueueFullError when the lane is full, unless block=True in which case
+        it waits for room. Returns a future resolved with the job's result.
+        """
+        queue = self._queues[lane]
+        if not block or not self._accepting:
+            self.check_admission(lane)
+        if len(queue) >= self.max_queue:
+            async with self._space:
+                await self._space.wait_for(lambda: len(queue) < self.max_queue or not self._accepting)
+            if not self._accepting:
+                raise SchedulerUnavailableError("Scheduler is not accepting jobs")
+
+        future = asyncio.get_running_loop().create_future()
+        # Fire-and-forget callers never await the future, mark its outcome as retrieved
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        queue.append((job_id, job_factory, future))
+        self._dispatch()
+        return future
+
+    def _next_job(self):
+        """Pop the next job that has a free slot, urgent before routine"""
+        if self._running_forms < self.form_slots:
+            for lane in FORM_LANES:
+                if self._queues[lane]:
+                    return lane, self._queues[lane].popleft()
+        if self._running_trackers < self.tracker_slots and self._queues[TRACKER_LANE]:
+            return TRACKER_LANE, self._queues[TRACKER_LANE].popleft()
+        return None, None
+
+    def _dispatch(self):
+        """Start queued jobs while slots are free"""
+        dequeued = False
+        while True:
+            lane, job = self._next_job()
+            if job is None:
+                break
+            dequeued = True
+            job_id, job_factory, future = job
+            if future.cancelled():
+                continue
+            if lane == TRACKER_LANE:
+                self._running_trackers += 1
+            else:
+                self._running_forms += 1
+            # A fresh context, so the job does not inherit the log fields bound by
+            # whichever job's completion triggered this dispatch
+            task = asyncio.create_task(self._run(lane, job_id, job_factory, future), context=contextvars.Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if dequeued:
+            asyncio.create_task(self._notify_space())
+
+    async def _notify_space(self):
+        async with self._space:
+            self._space.notify_all()
+
+    async def _run(self, lane: str, job_id: str, job_factory, future: asyncio.Future):
+        try:
+            result = await job_factory()
+            if not future.done():
+                future.set_result(result)
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Scheduled job {job_id} failed: {e}")
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            if lane == TRACKER_LANE:
+                self._running_trackers -= 1
+            else:
+                self._running_forms -= 1
+            if self._accepting:
+                self._dispatch()
+
+# Global instance
+job_scheduler = JobScheduler()
@@ -0,0 +1,325 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.services.metrics import JOB_RESULTS, JOB_SECONDS
+
+ACTIVE_STATES = ("queued", "running")
+
+# Missed heartbeats after which an API process counts as gone and its active runs are failed
+STALE_HEARTBEATS = 3
+
+# Owner of runs that any API process carries on (the batch tracker), never recovered
+SHARED_OWNER = "shared"
+
+class JobStore:
+    """Durable SQLite store of form and tracker run state.
+
+    Several API processes can share the database. Each run is owned by the
+    process that created it, and each process writes a heartbeat; only the
+    active runs of processes whose heartbeat stopped are failed on recovery.
+    """
+
+    def __init__(self):
+        self.db_path = Path(Config.JOB_STORE_PATH)
+        self.recheck_interval = Config.STATUS_LONG_POLL_RECHECK
+        self.heartbeat_interval = Config.JOB_STORE_HEARTBEAT_INTERVAL
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._heartbeat_task: asyncio.Task | None = None
+        self._initialized = False
+        self._listeners: list = []
+        # Set and dropped on the next change of a run, wakes its long-polls
+        self._changes: dict[str, asyncio.Event] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _init_db(self):
+        """Create the jobs table and its indexes on first use"""
+        if self._initialized:
+            return
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    request_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    account_id TEXT,
+                    pa_id TEXT,
+                    batch_id TEXT,
+                    lane TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    duration_seconds REAL,
+                    result TEXT,
+                    error TEXT,
+                    callback_url TEXT,
+                    owner TEXT,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS instances (
+                    instance_id TEXT PRIMARY KEY,
+                    heartbeat_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_account_id ON jobs(account_id);
+                CREATE INDEX IF NOT EXISTS idx_jobs_pa_id ON jobs(pa_id);
+                CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, kind);
+                CREATE INDEX IF NOT EXISTS idx_jobs_batch_id ON jobs(batch_id);
+            """)
+            # Databases created before webhooks lack the callback column, before heartbeats the owner
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+            if "callback_url" not in columns:
+                connection.execute("ALTER TABLE jobs ADD COLUMN callback_url TEXT")
+            if "owner" not in columns:
+                connection.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._initialized = True
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        if job.get("result"):
+            job["result"] = json.loads(job["result"])
+        return job
+
+    # Blocking operations (run in a worker thread)
+
+    def _create(self, request_id: str, kind: str, **fields):
+        self._init_db()
+        now = datetime.now().isoformat()
+        with self._connect() as connection:
+            connection.execute(
+                """INSERT OR REPLACE INTO jobs
+                   (request_id, kind, state, account_id, pa_id, batch_id, lane, callback_url, owner, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (request_id, kind, fields.get("state", "queued"), fields.get("account_id"), fields.get("pa_id"),
+                 fields.get("batch_id"), fields.get("lane"), fields.get("callback_url"), fields.get("owner", self.instance_id),
+                 now, now)
+            )
+
+    def _update(self, request_id: str, **fields):
+        self._init_db()
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as connection:
+            connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE request_id = ?", (*fields.values(), request_id)
+            )
+
+    def _finish(self, request_id: str, state: str, result=None, error: str | None = None):
+        """Close out a run, returns (kind, duration) for metrics"""
+        self._init_db()
+        now = datetime.now()
+        with self._connect() as connection:
+            row = connection.execute("SELECT kind, started_at FROM jobs WHERE request_id = ?", (request_id,)).fetchone()
+            duration = None
+            if row and row["started_at"]:
+                duration = (now - datetime.fromisoformat(row["started_at"])).total_seconds()
+            connection.execute(
+                """UPDATE jobs SET state = ?, finished_at = ?, duration_seconds = ?,
+                   result = COALESCE(?, result), error = ?, updated_at = ? WHERE request_id = ?""",
+                (state, now.isoformat(), duration, json.dumps(result) if result is not None else None,
+                 error, now.isoformat(), request_id)
+            )
+        return (row["kind"] if row else None), duration
+
+    def _get(self, request_id: str) -> dict | None:
+        self._init_db()
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE request_id = ?", (request_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def _query(self, where: str, params: tuple, limit: int) -> list[dict]:
+        self._init_db()
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT * FROM jobs WHERE {where} ORDER BY created_at DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def _heartbeat(self):
+        """Record that this process is alive"""
+        self._init_db()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO instances (instance_id, heartbeat_at) VALUES (?, ?)",
+                (self.instance_id, time.time())
+            )
+
+    def _recover(self) -> list[str]:
+        """Fail the active runs of processes without a recent heartbeat, returns their request IDs"""
+        self._init_db()
+        now = datetime.now().isoformat()
+        cutoff = time.time() - STALE_HEARTBEATS * self.heartbeat_interval
+        placeholders = ", ".join("?" for _ in ACTIVE_STATES)
+        with self._connect() as connection:
+            connection.execute("DELETE FROM instances WHERE heartbeat_at < ?", (cutoff,))
+            # Runs without an owner predate heartbeats
+            orphaned = f"""state IN ({placeholders}) AND (owner IS NULL OR owner NOT IN (
+                SELECT instance_id FROM instances)) AND owner IS NOT ? AND owner IS NOT ?"""
+            params = (*ACTIVE_STATES, self.instance_id, SHARED_OWNER)
+            request_ids = [row["request_id"] for row in connection.execute(
+                f"SELECT request_id FROM jobs WHERE {orphaned}", params
+            )]
+            connection.execute(
+                f"""UPDATE jobs SET state = 'failed', error = 'Interrupted by a service restart',
+                    finished_at = ?, updated_at = ? WHERE {orphaned}""",
+                (now, now, *params)
+            )
+        return request_ids
+
+    # Change notification
+
+    def add_listener(self, listener):
+        """Call listener(job) after every state or result change of a run (e.g. webhooks)"""
+        self._listeners.append(listener)
+
+    def _wake(self, request_id: str):
+        event = self._changes.pop(request_id, None)
+        if event is not None:
+            event.set()
+
+    async def _changed(self, request_id: str, notify: bool = True):
+        """Wake the run's long-polls, and tell listeners when its state or result moved"""
+        self._wake(request_id)
+        if not notify or not self._listeners:
+            return
+        job = await self.get(request_id)
+        if job is not None:
+            self.publish(job)
+
+    def publish(self, job: dict):
+        """Tell listeners about a change of the run, also used for changes forwarded from agent worker processes"""
+        self._wake(job["request_id"])
+        for listener in self._listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"Job state listener failed: {e}")
+
+    # Public API
+
+    async def create(self, request_id: str, kind: str, **fields):
+        """Record a new run (fields: state, account_id, pa_id, batch_id, lane, callback_url, owner)"""
+        await asyncio.to_thread(self._create, request_id, kind, **fields)
+        await self._changed(request_id)
+
+    async def update(self, request_id: str, **fields):
+        """Update columns of a run, e.g. result or pa_id"""
+        await asyncio.to_thread(self._update, request_id, **fields)
+        await self._changed(request_id, notify="state" in fields or "result" in fields)
+
+    async def mark_running(self, request_id: str):
+        await asyncio.to_thread(self._update, request_id, state="running", started_at=datetime.now().isoformat())
+        await self._changed(request_id)
+
+    async def mark_completed(self, request_id: str, result=None):
+        self._observe("completed", *await asyncio.to_thread(self._finish, request_id, "completed", result))
+        await self._changed(request_id)
+
+    async def mark_failed(self, request_id: str, error: str, state: str = "failed"):
+        self._observe(state, *await asyncio.to_thread(self._finish, request_id, state, None, error))
+        await self._changed(request_id)
+
+    @staticmethod
+    def _observe(state: str, kind: str | None, duration: float | None):
+        if kind is None:
+            return
+        JOB_RESULTS.labels(kind=kind, state=state).inc()
+        if duration is not None:
+            JOB_SECONDS.labels(kind=kind).observe(duration)
+
+    async def get(self, request_id: str) -> dict | None:
+        return await asyncio.to_thread(self._get, request_id)
+
+    async def wait_for_update(self, request_id: str, since: str | None, timeout: float) -> dict | None:
+        """Long-poll a run until its updated_at differs from since or the timeout passes.
+
+        Without since the run as it is at call time is the baseline. Finished runs
+        return at once. Changes written by other processes (agent workers) are
+        picked up by re-reading the run every recheck interval.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            # Registered before the read so a change in between is not missed
+            event = self._changes.setdefault(request_id, asyncio.Event())
+            job = await self.get(request_id)
+            if job is None or job["state"] not in ACTIVE_STATES:
+                return job
+            if since is None:
+                since = job["updated_at"]
+            elif job["updated_at"] != since:
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, self.recheck_interval))
+            except asyncio.TimeoutError:
+                pass
+
+    async def list_active(self, kind: str | None = None, limit: int = 500) -> list[dict]:
+        """Runs that are queued or running"""
+        placeholders = ", ".join("?" for _ in ACTIVE_STATES)
+        where = f"state IN ({placeholders})"
+        params = ACTIVE_STATES
+        if kind:
+            where += " AND kind = ?"
+            params = (*params, kind)
+        return await asyncio.to_thread(self._query, where, params, limit)
+
+    async def list_by_batch(self, batch_id: str, limit: int = 10000) -> list[dict]:
+        return await asyncio.to_thread(self._query, "batch_id = ?", (batch_id,), limit)
+
+    async def find(self, account_id: str | None = None, pa_id: str | None = None,
+                   state: str | None = None, limit: int = 100) -> list[dict]:
+        """Look up runs by account ID, PA ID and/or state"""
+        filters = {"account_id": account_id, "pa_id": pa_id, "state": state}
+        clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        params = tuple(value for value in filters.values() if value is not None)
+        return await asyncio.to_thread(self._query, " AND ".join(clauses) or "1 = 1", params, limit)
+
+    async def recover(self):
+        """Close out runs orphaned by a stopped or crashed API process"""
+        await asyncio.to_thread(self._heartbeat)
+        recovered = await asyncio.to_thread(self._recover)
+        if recovered:
+            logger.info(f"🗃️ Marked {len(recovered)} interrupted runs as failed")
+        for request_id in recovered:
+            await self._changed(request_id)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"Job store heartbeat failed: {e}")
+
+    def start(self):
+        """Keep this process's heartbeat fresh and recover runs of processes that stopped"""
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        """Stop the heartbeat; active runs of this process are recovered once it goes stale"""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+# Global instance
+job_store = JobStore()
@@ -0,0 +1,84 @@
+import time
+from browser_use import ChatAzureOpenAI
+from browser_use.llm.views import ChatInvokeCompletion
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.services.metrics import LLM_CALL_SECONDS, LLM_TOKENS
+from app.services.llm_cache import llm_cache
+
+# Run types whose calls never go through the LLM cache: form runs carry patient data (PHI)
+UNCACHED_RUN_TYPES = ("form",)
+
+# Actions whose parameters are text typed into the page (patient data, credentials)
+TYPING_ACTIONS = ("input_text", "send_keys")
+
+def _types_text(completion) -> bool:
+    """Whether an agent completion types text into the page"""
+    actions = getattr(completion, "action", None) or []
+    return any(name in TYPING_ACTIONS for action in actions for name in action.model_dump(exclude_unset=True))
+
+class InstrumentedLLM:
+    """Chat model wrapper that records call latency and token usage"""
+
+    _verified_api_keys = False
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.model = llm.model
+
+    @property
+    def provider(self) -> str:
+        return self.llm.provider
+
+    @property
+    def name(self) -> str:
+        return self.llm.name
+
+    @property
+    def model_name(self) -> str:
+        return self.model
+
+    async def ainvoke(self, messages, output_format=None):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            completion = await self.llm.ainvoke(messages, output_format)
+            outcome = "success"
+        finally:
+            LLM_CALL_SECONDS.labels(model=self.model, outcome=outcome).observe(time.perf_counter() - started)
+        if completion.usage:
+            LLM_TOKENS.labels(model=self.model, type="prompt").inc(completion.usage.prompt_tokens)
+            LLM_TOKENS.labels(model=self.model, type="completion").inc(completion.usage.completion_tokens)
+        return completion
+
+class CachedLLM(InstrumentedLLM):
+    """Chat model wrapper that answers repeated calls from the LLM response cache.
+
+    Only misses reach the wrapped model. Hits come back without usage, so they
+    add no tokens to the agent's history. Completions that type text are not
+    stored, the cache file is plaintext.
+    """
+
+    async def ainvoke(self, messages, output_format=None):
+        key = llm_cache.key(self.model, messages, output_format)
+        cached = await llm_cache.get(key, self.model)
+        if cached is not None:
+            try:
+                completion = output_format.model_validate_json(cached) if output_format else cached
+                return ChatInvokeCompletion(completion=completion, usage=None)
+            except Exception as e:
+                logger.error(f"Discarding unreadable LLM cache entry: {e}")
+        completion = await self.llm.ainvoke(messages, output_format)
+        if output_format and _types_text(completion.completion):
+            return completion
+        serialized = completion.completion.model_dump_json() if output_format else completion.completion
+        await llm_cache.put(key, self.model, serialized)
+        return completion
+
+def create_llm(profile=None, kind: str | None = None):
+    """Chat model for an agent of a run type, using the profile's deployment and cache setting when given"""
+    model = profile.model if profile is not None else Config.GPT_MODEL
+    llm = InstrumentedLLM(ChatAzureOpenAI(model=model))
+    if llm_cache.enabled and kind not in UNCACHED_RUN_TYPES and (profile is None or profile.llm_cache):
+        llm = CachedLLM(llm)
+    return llm
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import time
+import weakref
+from pathlib import Path
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.services.metrics import LLM_CACHE_REQUESTS
+
+# Parts of the browser-use state message that change on every step without changing the page
+_VOLATILE = [
+    (re.compile(r"^Current date and time: .*$", re.MULTILINE), ""),
+    (re.compile(r"Step \d+ of \d+ max possible steps"), ""),
+    (re.compile(r"<(/?)step_\d+>"), r"<\1step>"),
+    # Elements are starred when new since the last step, a reload re-stars the same page
+    (re.compile(r"\*\[(\d+)\]"), r"[\1]"),
+]
+
+def normalize_text(text: str) -> str:
+    for pattern, replacement in _VOLATILE:
+        text = pattern.sub(replacement, text)
+    return text
+
+def _message_parts(message) -> list[str]:
+    """Normalized text and image parts of a chat message"""
+    content = message.content
+    if isinstance(content, str):
+        return [normalize_text(content)]
+    parts = []
+    for part in content or []:
+        if getattr(part, "text", None) is not None:
+            parts.append(normalize_text(part.text))
+        elif getattr(part, "image_url", None) is not None:
+            parts.append(hashlib.sha256(part.image_url.url.encode("utf-8")).hexdigest())
+    return parts
+
+class LLMResponseCache:
+    """On-disk LLM response cache keyed by a hash of the normalized messages.
+
+    Entries expire after the TTL and the least recently used ones are evicted
+    beyond the size limit. The SQLite file is shared by worker processes and
+    survives restarts.
+    """
+
+    def __init__(self):
+        self.enabled = Config.LLM_CACHE_ENABLED
+        self.db_path = Path(Config.LLM_CACHE_PATH)
+        self.max_entries = Config.LLM_CACHE_MAX_ENTRIES
+        self.ttl = Config.LLM_CACHE_TTL
+        self.hits = 0
+        self.misses = 0
+        self._initialized = False
+        # Output schema digest per structured output type (browser-use builds one per agent)
+        self._schemas = weakref.WeakKeyDictionary()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _init_db(self):
+        """Create the responses table on first use"""
+        if self._initialized:
+            return
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    completion TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);
+            """)
+        self._initialized = True
+
+    def _schema_digest(self, output_format) -> str:
+        if output_format is None:
+            return "text"
+        if output_format not in self._schemas:
+            schema = json.dumps(output_format.model_json_schema(), sort_keys=True)
+            self._schemas[output_format] = hashlib.sha256(schema.encode("utf-8")).hexdigest()
+        return self._schemas[output_format]
+
+    def key(self, model: str, messages: list, output_format=None) -> str:
+        """Cache key of a chat call: model, output schema and normalized messages"""
+        material = {
+            "model": model,
+            "schema": self._schema_digest(output_format),
+            "messages": [[message.role, _message_parts(message)] for message in messages],
+        }
+        return hashlib.sha256(json.dumps(material, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    # Reads and writes (run in a worker thread, sqlite3 is blocking)
+
+    def _read(self, key: str) -> str | None:
+        self._init_db()
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT completion, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def _write(self, key: str, model: str, completion: str):
+        """Store a response, then drop expired entries and the least recently used beyond the limit"""
+        self._init_db()
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model, completion, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model, completion, now, now)
+            )
+            connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            connection.execute(
+                "DELETE FROM responses WHERE key NOT IN (SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def _count(self) -> int:
+        self._init_db()
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _clear(self):
+        self._init_db()
+        with self._connect() as connection:
+            connection.execute("DELETE FROM responses")
+
+    # Public API
+
+    async def get(self, key: str, model: str) -> str | None:
+        """Serialized completion for a key, None on a miss or when the store is unreadable"""
+        try:
+            completion = await asyncio.to_thread(self._read, key)
+        except Exception as e:
+            logger.error(f"Failed to read LLM cache: {e}")
+            completion = None
+        self.record(model, completion is not None)
+        return completion
+
+    def record(self, model: str, hit: bool):
+        """Count a lookup as a hit or a miss"""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        LLM_CACHE_REQUESTS.labels(model=model, result="hit" if hit else "miss").inc()
+
+    async def put(self, key: str, model: str, completion: str):
+        try:
+            await asyncio.to_thread(self._write, key, model, completion)
+        except Exception as e:
+            logger.error(f"Failed to write LLM cache: {e}")
+
+    async def clear(self):
+        await asyncio.to_thread(self._clear)
+
+    async def stats(self) -> dict:
+        """Lookups of this process and the size of the shared store"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": await asyncio.to_thread(self._count) if self.enabled else 0,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+# Global instance
+llm_cache = LLMResponseCache()
@@ -0,0 +1,95 @@
+import functools
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+# Agent runs take minutes, HTTP and Dataverse calls take milliseconds
+RUN_BUCKETS = (5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+STEP_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 75, 100)
+
+HTTP_REQUESTS = Counter(
+    "humana_http_requests_total", "API requests by route and status code", ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "humana_http_request_seconds", "API request handling time", ["method", "route"]
+)
+JOB_RESULTS = Counter(
+    "humana_job_results_total", "Finished form and tracker runs by outcome", ["kind", "state"]
+)
+JOB_SECONDS = Histogram(
+    "humana_job_seconds", "Wall time of form and tracker runs", ["kind"], buckets=RUN_BUCKETS
+)
+DATAVERSE_FETCH_SECONDS = Histogram(
+    "humana_dataverse_fetch_seconds", "Dataverse form data fetch latency", ["source"]
+)
+AGENT_INIT_SECONDS = Histogram(
+    "humana_agent_init_seconds", "Time to construct a browser-use Agent", ["agent"]
+)
+AGENT_STEPS = Histogram(
+    "humana_agent_steps", "Agent steps per run", ["agent"], buckets=STEP_BUCKETS
+)
+LLM_CALL_SECONDS = Histogram(
+    "humana_llm_call_seconds", "LLM call latency", ["model", "outcome"], buckets=(0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+)
+LLM_TOKENS = Counter(
+    "humana_llm_tokens_total", "LLM tokens used", ["model", "type"]
+)
+LLM_CACHE_REQUESTS = Counter(
+    "humana_llm_cache_requests_total", "LLM response cache lookups", ["model", "result"]
+)
+BROWSER_ACTION_SECONDS = Histogram(
+    "humana_browser_action_seconds", "Custom browser action latency", ["action", "outcome"]
+)
+BLOCKED_REQUESTS = Counter(
+    "humana_blocked_requests_total", "Portal requests aborted by the resource policy", ["policy", "resource_type"]
+)
+WEBHOOK_DELIVERIES = Counter(
+    "humana_webhook_deliveries_total", "Webhook delivery attempts by outcome", ["outcome"]
+)
+QUEUE_DEPTH = Gauge(
+    "humana_queue_depth", "Jobs waiting in each scheduler lane", ["lane"], multiprocess_mode="livesum"
+)
+RUNNING_JOBS = Gauge(
+    "humana_running_jobs", "Jobs holding a scheduler slot", multiprocess_mode="livesum"
+)
+ACTIVE_BROWSERS = Gauge(
+    "humana_active_browsers", "Launched pooled browsers (idle and leased)", multiprocess_mode="livesum"
+)
+
+@contextmanager
+def timer(histogram: Histogram, **labels):
+    """Observe the duration of the block"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - started)
+
+def timed_action(name: str):
+    """Record latency and outcome of a controller action (place under @controller.action)"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(*args, **kwargs)
+                if not getattr(result, "error", None):
+                    outcome = "success"
+                return result
+            finally:
+                BROWSER_ACTION_SECONDS.labels(action=name, outcome=outcome).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+def render_metrics() -> tuple[bytes, str]:
+    """Exposition body and content type, aggregated over worker processes when multiprocess mode is on"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
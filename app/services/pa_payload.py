@@ -0,0 +1,116 @@
+import json
+import math
+import re
+from datetime import date, datetime
+
+# Bump when the payload shape changes; replay scripts bind to payload paths
+PAYLOAD_FORMAT = "pa_payload_v2"
+
+SECTIONS = ("Member", "Diagnosis", "Service", "Provider")
+
+# Canonical field -> (source, Dataverse column); the first contact is the member
+FIELD_MAP = {
+    ("Member", "ID_Number"): ("account", "accountnumber"),
+    ("Member", "First_Name"): ("contact", "firstname"),
+    ("Member", "Last_Name"): ("contact", "lastname"),
+    ("Member", "Date_of_Birth"): ("contact", "birthdate"),
+    ("Member", "Country"): ("contact", "address1_country"),
+    ("Member", "Postal_Code"): ("contact", "address1_postalcode"),
+    ("Member", "Zip_Code"): ("contact", "address1_postalcode"),
+    ("Provider", "Name"): ("account", "name"),
+    ("Provider", "Phone_Number"): ("account", "telephone1"),
+}
+
+# Accepted input dates besides ISO YYYY-MM-DD; DD/MM input is ambiguous with these and rejected
+INPUT_DATE_FORMATS = ("%m/%d/%Y", "%m-%d-%Y")
+
+# Words of a field name: split on underscores, spaces, hyphens and camelCase humps
+_FIELD_WORD_BOUNDARY = re.compile(r'[_\W]+|(?<=[a-z])(?=[A-Z])')
+
+class InvalidDateError(ValueError):
+    """Raised when a date field's value is in none of the accepted formats"""
+
+def is_date_field(field: str) -> bool:
+    """Fields the portal wants as DD/MM/YYYY: every field with the word "date" in its name.
+
+    Date_of_Birth, Start_Date and ServiceDate are dates, Candidate_Name and Updated_By are not.
+    """
+    return "date" in (word.lower() for word in _FIELD_WORD_BOUNDARY.split(field))
+
+def to_portal_date(value) -> str | None:
+    """Convert a date to the portal's DD/MM/YYYY, None when its format is not accepted.
+
+    Accepts date objects, ISO YYYY-MM-DD (optionally with a time) and US MM/DD/YYYY.
+    """
+    if isinstance(value, date):
+        return value.strftime("%d/%m/%Y")
+    text = str(value).strip()
+    match = re.match(r'^(\d{4})-(\d{2})-(\d{2})(?:[T ]|$)', text)
+    if match:
+        try:
+            return date(*map(int, match.groups())).strftime("%d/%m/%Y")
+        except ValueError:
+            return None
+    for input_format in INPUT_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, input_format).strftime("%d/%m/%Y")
+        except ValueError:
+            continue
+    return None
+
+def check_dates(data: dict):
+    """Raise InvalidDateError for the first date field of the sections whose format is not accepted"""
+    for section in SECTIONS:
+        fields = data.get(section)
+        if not isinstance(fields, dict):
+            continue
+        for field, value in fields.items():
+            if is_date_field(field) and value not in (None, "") and to_portal_date(value) is None:
+                raise InvalidDateError(
+                    f"{section}.{field}: unrecognized date {value!r}, use YYYY-MM-DD or MM/DD/YYYY"
+                )
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English and JSON)"""
+    return math.ceil(len(text) / 4)
+
+def build_pa_payload(data: dict) -> dict:
+    """Project Dataverse form data plus custom data onto the PA form's sections.
+
+    Custom data sections (merged at the top level of data) override the mapped
+    Dataverse columns field by field. Empty fields are left out so the agent
+    falls back to the configured defaults. Every date field is converted to
+    DD/MM/YYYY; a date in an unknown format raises InvalidDateError.
+    """
+    sources = {
+        "account": data.get("account") or {},
+        "contact": (data.get("contacts") or [{}])[0],
+    }
+    payload = {section: {} for section in SECTIONS}
+    for (section, field), (source, column) in FIELD_MAP.items():
+        value = sources[source].get(column)
+        if source == "contact" and value in (None, ""):
+            # Fall back to the account's column of the same name
+            value = sources["account"].get(column)
+        if value not in (None, ""):
+            payload[section][field] = value
+    for section in SECTIONS:
+        custom = data.get(section)
+        if isinstance(custom, dict):
+            payload[section].update({key: value for key, value in custom.items() if value not in (None, "")})
+    check_dates(payload)
+    for fields in payload.values():
+        for field, value in fields.items():
+            if is_date_field(field):
+                fields[field] = to_portal_date(value)
+    return {section: fields for section, fields in payload.items() if fields}
+
+def payload_token_report(data: dict, payload: dict) -> dict:
+    """Estimated prompt tokens of the raw data versus the canonical payload"""
+    raw_tokens = estimate_tokens(str(data))
+    payload_tokens = estimate_tokens(json.dumps(payload, ensure_ascii=False))
+    return {
+        "raw_tokens": raw_tokens,
+        "payload_tokens": payload_tokens,
+        "saved_tokens": raw_tokens - payload_tokens,
+    }
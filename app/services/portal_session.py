@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+import portalocker
+from browser_use import Agent, BrowserSession
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.utils.agent_prompts import AgentPrompts
+from app.services.llm import create_llm
+
+class PortalSessionManager:
+    """Keeps an authenticated portal storage state (cookies + localStorage) per account"""
+
+    def __init__(self):
+        self.session_dir = Path(Config.PORTAL_SESSION_DIR)
+        self.session_dir.mkdir(exist_ok=True)
+        self.max_age = Config.PORTAL_SESSION_MAX_AGE
+        self.login_form_selector = Config.PORTAL_LOGIN_FORM_SELECTOR
+        self.lock_timeout = Config.PORTAL_LOGIN_LOCK_TIMEOUT
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _state_path(self, username: str) -> Path:
+        """Storage state file for an account (username is hashed for the filename)"""
+        digest = hashlib.sha256(username.encode('utf-8')).hexdigest()[:16]
+        return self.session_dir / f"portal_{digest}.json"
+
+    def _lock_for(self, username: str) -> asyncio.Lock:
+        if username not in self._locks:
+            self._locks[username] = asyncio.Lock()
+        return self._locks[username]
+
+    @asynccontextmanager
+    async def _login_lock(self, username: str):
+        """Hold the account's re-login lock, shared by all runs and worker processes.
+
+        The asyncio lock queues the runs of this process, the lock file next to the
+        stored session queues the processes. Raises portalocker.LockException on timeout.
+        """
+        async with self._lock_for(username):
+            lock = portalocker.Lock(
+                str(self._state_path(username).with_suffix('.lock')),
+                timeout=0,
+                fail_when_locked=True,
+            )
+            # Poll instead of blocking a thread, so a cancelled run never takes the lock later
+            deadline = time.monotonic() + self.lock_timeout
+            while True:
+                try:
+                    lock.acquire()
+                    break
+                except portalocker.AlreadyLocked:
+                    if time.monotonic() >= deadline:
+                        raise
+                    await asyncio.sleep(0.5)
+            try:
+                yield
+            finally:
+                lock.release()
+
+    def load_state(self, username: str) -> dict | None:
+        """Load a stored storage state if it exists and has not aged out"""
+        path = self._state_path(username)
+        if not path.exists():
+            return None
+        if time.time() - path.stat().st_mtime > self.max_age:
+            logger.info("⌛ Stored portal session is older than the maximum age")
+            return None
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except Exception as e:
+            logger.error(f"Failed to read stored portal session: {e}")
+            return None
+
+    async def save(self, browser_session: BrowserSession, username: str):
+        """Persist the browser's current cookies and localStorage for an account"""
+        try:
+            state = await browser_session.browser_context.storage_state()
+            if state.get('cookies') or state.get('origins'):
+                # Write then rename, so other processes never read a half-written file
+                path = self._state_path(username)
+                temp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+                temp_path.write_text(json.dumps(state), encoding='utf-8')
+                os.replace(temp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to save portal session: {e}")
+
+    def invalidate(self, username: str):
+        """Forget the stored session for an account"""
+        self._state_path(username).unlink(missing_ok=True)
+
+    async def _inject(self, browser_session: BrowserSession, state: dict):
+        """Load cookies and localStorage from a storage state into the browser"""
+        context = browser_session.browser_context
+        if state.get('cookies'):
+            await context.add_cookies(state['cookies'])
+        page = await browser_session.get_current_page()
+        # localStorage can only be written from a page on the matching origin
+        for origin in state.get('origins', []):
+            items = origin.get('localStorage', [])
+            if not items:
+                continue
+            await page.goto(origin['origin'], wait_until='domcontentloaded')
+            await page.evaluate(
+                "(items) => { for (const item of items) localStorage.setItem(item.name, item.value); }",
+                items
+            )
+
+    async def is_authenticated(self, browser_session: BrowserSession, humana_link: str) -> bool:
+        """Open the portal and check that it does not show the login form"""
+        try:
+            page = await browser_session.get_current_page()
+            await page.goto(humana_link, wait_until='networkidle')
+            return await page.locator(self.login_form_selector).count() == 0
+        except Exception as e:
+            logger.error(f"Failed to check portal session: {e}")
+            return False
+
+    async def _login(self, browser_session: BrowserSession, humana_link: str, username: str, password: str) -> bool:
+        """Run a short login-only agent and store the resulting session"""
+        logger.progress("🔐 Logging in to the portal to refresh the stored session...")
+        agent = Agent(
+            task=AgentPrompts.get_login_prompt(humana_link, username, password),
+            llm=create_llm(),
+            browser_session=browser_session,
+        )
+        await agent.run(max_steps=Config.PORTAL_LOGIN_MAX_STEPS)
+        if not await self.is_authenticated(browser_session, humana_link):
+            logger.error("Portal login did not produce an authenticated session")
+            return False
+        await self.save(browser_session, username)
+        logger.success("Portal session refreshed")
+        return True
+
+    async def authenticate(self, browser_session: BrowserSession, humana_link: str, username: str, password: str) -> bool:
+        """Make the browser session logged in, re-logging in at most once on expiry.
+
+        Returns True when the browser is on the portal with a valid session, so the
+        agent prompt can skip the login steps. Returns False when login failed and the
+        agent has to log in by itself.
+        """
+        state = self.load_state(username)
+        if state:
+            await self._inject(browser_session, state)
+            if await self.is_authenticated(browser_session, humana_link):
+                logger.success("Reusing stored portal session")
+                return True
+            logger.info("⌛ Stored portal session has expired")
+
+        # Only one run per account re-logs in, across all worker processes; the
+        # others wait and reuse its session
+        try:
+            async with self._login_lock(username):
+                fresh_state = self.load_state(username)
+                if fresh_state and fresh_state != state:
+                    await self._inject(browser_session, fresh_state)
+                    if await self.is_authenticated(browser_session, humana_link):
+                        logger.success("Reusing portal session refreshed by another run")
+                        return True
+                try:
+                    return await self._login(browser_session, humana_link, username, password)
+                except Exception as e:
+                    logger.error(f"Portal login failed: {e}")
+                    self.invalidate(username)
+                    return False
+        except portalocker.LockException:
+            logger.error(f"Timed out after {self.lock_timeout}s waiting for another portal login")
+            return False
+
+# Global instance
+portal_session = PortalSessionManager()
@@ -0,0 +1,105 @@
+import fnmatch
+import re
+from urllib.parse import urlparse
+from app.utils.config import Config
+from app.services.metrics import BLOCKED_REQUESTS
+
+def _split(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+def _compile(patterns: list[str]):
+    """One regex matching any of the URL globs, or None when there are none"""
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns), re.IGNORECASE)
+
+class ResourcePolicy:
+    """Which portal requests an agent browser may make, enforced by request interception.
+
+    A request is blocked when its resource type or URL is on the deny lists, or when it
+    is a third-party subresource and third-party blocking is on. URLs on the allow list
+    always go through.
+    """
+
+    # Documents and API calls of other hosts are kept, the login flow may depend on them
+    THIRD_PARTY_TYPES = {"script", "stylesheet", "image", "media", "font", "ping", "other"}
+
+    def __init__(self, name: str, block_types: list[str], block_urls: list[str],
+                 allow_urls: list[str], block_third_party: bool, first_party_host: str | None):
+        self.name = name
+        self.block_types = {resource_type.lower() for resource_type in block_types}
+        self.block_urls = _compile(block_urls)
+        self.allow_urls = _compile(allow_urls)
+        self.block_third_party = block_third_party and bool(first_party_host)
+        self.first_party_host = (first_party_host or "").lower()
+
+    @property
+    def active(self) -> bool:
+        return bool(self.block_types or self.block_urls or self.block_third_party)
+
+    def _is_third_party(self, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        if not host:
+            return False
+        # Subdomains of the portal's registrable domain count as first party
+        site = ".".join(self.first_party_host.split(".")[-2:])
+        return not (host == site or host.endswith("." + site))
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        """True when the request should be aborted"""
+        if self.allow_urls and self.allow_urls.match(url):
+            return False
+        if resource_type in self.block_types:
+            return True
+        if self.block_urls and self.block_urls.match(url):
+            return True
+        return (self.block_third_party and resource_type in self.THIRD_PARTY_TYPES
+                and self._is_third_party(url))
+
+    async def _handle(self, route):
+        request = route.request
+        if self.blocks(request.resource_type, request.url):
+            BLOCKED_REQUESTS.labels(policy=self.name, resource_type=request.resource_type).inc()
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    async def apply(self, browser_context):
+        """Start intercepting the requests of every page in the context"""
+        if self.active:
+            await browser_context.route("**/*", self._handle)
+
+# Run type -> (default blocked resource types, extra blocked URLs)
+RUN_TYPE_SETTINGS = {
+    "form": (Config.FORM_BLOCK_RESOURCE_TYPES, Config.FORM_BLOCK_URLS),
+    "tracker": (Config.TRACKER_BLOCK_RESOURCE_TYPES, Config.TRACKER_BLOCK_URLS),
+}
+
+# (run type, blocked resource types) -> policy, built once and shared by every lease
+_policies: dict[tuple, ResourcePolicy] = {}
+
+def _build(kind: str, block_types: list[str], block_urls: str) -> ResourcePolicy:
+    return ResourcePolicy(
+        name=kind,
+        block_types=block_types,
+        block_urls=_split(Config.RESOURCE_BLOCK_URLS) + _split(block_urls),
+        allow_urls=_split(Config.RESOURCE_ALLOW_URLS),
+        block_third_party=Config.RESOURCE_BLOCK_THIRD_PARTY,
+        first_party_host=urlparse(Config.HUMANA_LINK or "").hostname,
+    )
+
+def policy_for(kind: str, profile=None) -> ResourcePolicy | None:
+    """Resource policy of a run type ("form" or "tracker"), None when interception is off.
+
+    An agent profile picks its own blocked resource types (see AgentProfile.resource_types_to_block).
+    """
+    if not Config.RESOURCE_POLICY_ENABLED or kind not in RUN_TYPE_SETTINGS:
+        return None
+    block_types, block_urls = RUN_TYPE_SETTINGS[kind]
+    block_types = _split(block_types)
+    if profile is not None:
+        block_types = profile.resource_types_to_block(block_types)
+    key = (kind, frozenset(resource_type.lower() for resource_type in block_types))
+    if key not in _policies:
+        _policies[key] = _build(kind, block_types, block_urls)
+    return _policies[key]
@@ -1,107 +1,296 @@
 import asyncio
-from browser_use import Agent, ChatAzureOpenAI, Controller, ActionResult, BrowserSession
+import re
+import time
+import uuid
+from contextlib import AsyncExitStack
+from pathlib import Path
+import portalocker
+from browser_use import Agent, Controller, ActionResult, BrowserSession
 from app.utils.logger import logger
 from app.utils.config import Config
 from app.utils.agent_tracker import agent_tracker
 from app.utils.agent_prompts import AgentPrompts
+from app.services import browser_actions
+from app.services.browser_actions import ActionContext
+from app.services.browser_pool import browser_pool
+from app.services.resource_policy import policy_for
+from app.services.portal_session import portal_session
+from app.services.llm import create_llm
+from app.services.agent_profiles import get_profile
+from app.services.metrics import timer, timed_action, AGENT_INIT_SECONDS, AGENT_STEPS
+from app.services.job_store import job_store, SHARED_OWNER
+from app.services.job_scheduler import job_scheduler, TRACKER_LANE
+from app.services.agent_worker_pool import agent_worker_pool
 
 # Create controller for custom actions
 controller = Controller()
 
+class TrackingNotConfirmedError(Exception):
+    """Raised when the tracker agent stopped without confirming a final status"""
+
 @controller.action('Upload file to form element')
-async def upload_file(index: int, browser_session: BrowserSession, file_type: str = "pdf"):
+@timed_action("upload_file")
+async def upload_file(index: int, browser_session: BrowserSession, context: ActionContext, file_type: str = "pdf"):
     """Upload file to specified element index"""
-    if file_type.lower() == "pdf":
-        file_path = Config.PDF_PATH
-    else:
-        file_path = Config.IMAGE_PATH
+    upload_key = f"{index}_{file_type}"
+    if upload_key in context.uploaded:
+        return ActionResult(extracted_content=f"Files already uploaded to index {index}")
+    files = context.attachments or browser_actions.files_for_upload(file_type)
+    if not files:
+        return ActionResult(error=f'No {file_type} files found for upload')
     
     try:
-        # Get the upload element by index
-        upload_element = await browser_session.get_element_by_index(index)
-        if upload_element is None:
-            return ActionResult(error=f'No element found at index {index}')
-        
-        # Get the current page using the correct browser-use API
-        page = await browser_session.get_current_page()
-        
-        # Set up file chooser handler before clicking
-        async def handle_file_chooser(file_chooser):
-            await file_chooser.set_files(file_path)
-        
-        # Listen for file chooser events
-        page.on('filechooser', handle_file_chooser)
-        
-        # Click the upload button to trigger file chooser
-        await upload_element.click()
-        
-        # Wait a moment for the file to be selected
-        import asyncio
-        await asyncio.sleep(2)
-        
-        msg = f'Successfully initiated file upload for "{file_path}"'
-        logger.success(msg)
-        return ActionResult(extracted_content=msg)
+        result = await browser_actions.upload_files(browser_session, index, files)
+        if not result.error:
+            context.uploaded.add(upload_key)
+        return result
     except Exception as e:
         logger.error(f'Upload failed: {str(e)}')
         return ActionResult(error=f'Failed to upload file: {str(e)}')
 
 @controller.action('Download file from form element and save to disk')
-async def download_file(index: int, browser_session: BrowserSession):
+@timed_action("download_file")
+async def download_file(index: int, browser_session: BrowserSession, context: ActionContext):
     """Download file from specified element index and ensure it's saved to disk"""
-    download_path = Config.DOWNLOAD_PATH
-    
     try:
-        import os
-        import time
-        
-        # Get the download element by index
-        download_element = await browser_session.get_element_by_index(index)
-        if download_element is None:
-            return ActionResult(error=f'No element found at index {index}')
-        
-        # Get the current page
-        page = await browser_session.get_current_page()
-        
-        # Set up download handler to control where files are saved
-        async def handle_download(download):
-            # Accept the download and save to our specified path
-            suggested_filename = download.suggested_filename
-            file_path = os.path.join(download_path, suggested_filename)
-            await download.save_as(file_path)
-            logger.success(f'File saved to: {file_path}')
-            return file_path
-        
-        # Listen for download events
-        page.on('download', handle_download)
-        
-        # Click the download button
-        await download_element.click()
-        
-        # Wait for download to complete
-        await asyncio.sleep(10)
-        
-        # Check if any new files appeared in download directory
-        if os.path.exists(download_path):
-            files_in_dir = os.listdir(download_path)
-            png_files = [f for f in files_in_dir if f.lower().endswith('.png')]
-            if png_files:
-                latest_file = max([os.path.join(download_path, f) for f in png_files], 
-                                key=os.path.getctime)
-                msg = f'Successfully downloaded file: {latest_file}'
-                logger.success(msg)
-                return ActionResult(extracted_content=msg)
-        
-        return ActionResult(error='Download completed but file not found on disk')
-        
+        return await browser_actions.download_file(browser_session, index, context)
     except Exception as e:
         logger.error(f'Download failed: {str(e)}')
         return ActionResult(error=f'Failed to download file: {str(e)}')
 
+# JavaScript that reads the header and cell texts of the PA requests table
+_READ_TABLE_JS = """
+(rowSelector) => {
+    const headers = Array.from(document.querySelectorAll('table thead th')).map(th => th.innerText.trim());
+    const rows = Array.from(document.querySelectorAll(rowSelector)).map(
+        tr => Array.from(tr.querySelectorAll('td')).map(td => td.innerText.trim())
+    );
+    return {headers, rows};
+}
+"""
+
+async def open_pa_table(page):
+    """Navigate the logged-in portal to the Prior Authorization requests table"""
+    if Config.TRACKER_PA_TABLE_URL:
+        await page.goto(Config.TRACKER_PA_TABLE_URL, wait_until='domcontentloaded')
+    else:
+        await page.get_by_text(Config.TRACKER_PA_NAV_TEXT, exact=False).first.click()
+    await page.wait_for_selector(Config.TRACKER_TABLE_ROW_SELECTOR, timeout=Config.TRACKER_TABLE_TIMEOUT * 1000)
+
+def _parse_pa_rows(headers: list, rows: list) -> dict:
+    """Map PA request ID -> status text from raw table cells"""
+    id_pattern = re.compile(Config.TRACKER_ID_PATTERN)
+    status_col = next((i for i, header in enumerate(headers) if 'status' in header.lower()), None)
+    statuses = {}
+    for cells in rows:
+        id_col = next((i for i, cell in enumerate(cells) if id_pattern.fullmatch(cell)), None)
+        if id_col is None:
+            continue
+        if status_col is not None and status_col < len(cells):
+            statuses[cells[id_col]] = cells[status_col]
+        elif cells:
+            # Without a recognizable header the status is the last column
+            statuses[cells[id_col]] = cells[-1]
+    return statuses
+
+async def _iter_pa_table_pages(page):
+    """Yield the ID -> status mapping of each page of the PA requests table"""
+    for _ in range(Config.TRACKER_MAX_TABLE_PAGES):
+        table = await page.evaluate(_READ_TABLE_JS, Config.TRACKER_TABLE_ROW_SELECTOR)
+        yield _parse_pa_rows(table['headers'], table['rows'])
+        
+        # Follow pagination until the next button is gone or disabled
+        next_button = page.locator(Config.TRACKER_NEXT_PAGE_SELECTOR).first
+        if await next_button.count() == 0 or not await next_button.is_enabled():
+            break
+        first_row = await page.locator(Config.TRACKER_TABLE_ROW_SELECTOR).first.inner_text()
+        await next_button.click()
+        await page.wait_for_function(
+            "([selector, previous]) => { const row = document.querySelector(selector); return row && row.innerText.trim() !== previous.trim(); }",
+            arg=[Config.TRACKER_TABLE_ROW_SELECTOR, first_row],
+            timeout=Config.TRACKER_TABLE_TIMEOUT * 1000
+        )
+
+async def read_pa_table(page) -> dict:
+    """Read every page of the PA requests table in one pass"""
+    statuses = {}
+    async for page_statuses in _iter_pa_table_pages(page):
+        statuses.update(page_statuses)
+    return statuses
+
+def _final_status_in(text: str | None) -> str | None:
+    """The configured final status the agent reported in its result, None if it reported none"""
+    for status in (status.strip() for status in Config.TRACKER_FINAL_STATUSES.split(',')):
+        if status and re.search(rf"(?<!not )\b{re.escape(status)}\b", text or "", re.IGNORECASE):
+            return status
+    return None
+
+class PATableReader:
+    """Keeps one logged-in page on the PA requests table per process between status checks.
+
+    Every tracker in the process reads from it, and a read younger than
+    TRACKER_TABLE_MAX_AGE is shared instead of scanning again. The portal is only
+    logged into again when reading the table fails. The browser goes back to the
+    pool after TRACKER_READER_IDLE_TIMEOUT seconds without a read.
+    """
+    
+    def __init__(self):
+        self.max_age = Config.TRACKER_TABLE_MAX_AGE
+        self.idle_timeout = Config.TRACKER_READER_IDLE_TIMEOUT
+        self._lock = None
+        self._stack: AsyncExitStack | None = None
+        self._session: BrowserSession | None = None
+        self._statuses: dict = {}
+        self._read_at = 0.0
+        self._idle_task = None
+    
+    async def _open(self):
+        """Lease a browser, restore the portal session and open the table"""
+        self._stack = AsyncExitStack()
+        try:
+            self._session = await self._stack.enter_async_context(browser_pool.lease(policy_for("tracker")))
+            logged_in = await portal_session.authenticate(
+                self._session, Config.HUMANA_LINK, Config.HUMANA_USERNAME, Config.HUMANA_PASSWORD
+            )
+            if not logged_in:
+                raise RuntimeError("could not log into the portal")
+            await open_pa_table(await self._session.get_current_page())
+        except BaseException:
+            await self._close()
+            raise
+        logger.info("🔐 PA table reader logged in")
+        if self._idle_task is None or self._idle_task.done():
+            self._idle_task = asyncio.create_task(self._close_when_idle())
+    
+    async def _close(self):
+        if self._stack is None:
+            return
+        stack, session = self._stack, self._session
+        self._stack = self._session = None
+        try:
+            if session is not None:
+                await portal_session.save(session, Config.HUMANA_USERNAME)
+        finally:
+            await stack.aclose()
+    
+    async def _close_when_idle(self):
+        while self._stack is not None:
+            await asyncio.sleep(self.idle_timeout)
+            async with self._lock:
+                if time.monotonic() - self._read_at >= self.idle_timeout:
+                    await self._close()
+    
+    async def read(self) -> dict:
+        """ID -> status of every request in the table, from the warm page when it still works"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._stack is not None and time.monotonic() - self._read_at < self.max_age:
+                return self._statuses
+            for attempt in (1, 2):
+                try:
+                    if self._stack is None:
+                        await self._open()
+                    else:
+                        # Reload so the scan starts from the first page with fresh statuses
+                        await open_pa_table(await self._session.get_current_page())
+                    self._statuses = await read_pa_table(await self._session.get_current_page())
+                    break
+                except Exception as e:
+                    # Usually an expired session, log in again once on a fresh lease
+                    logger.warning(f"PA table read failed (attempt {attempt}): {e}")
+                    await self._close()
+                    if attempt == 2:
+                        raise
+            self._read_at = time.monotonic()
+            return self._statuses
+    
+    async def close(self):
+        """Give the browser back to the pool"""
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+        await self._close()
+
+# Global instance
+pa_table_reader = PATableReader()
+
+async def check_pa_status(request_id: str, request) -> str | None:
+    """One scripted status check from the process's warm PA table page, None when the row cannot be located"""
+    tracking_id = request.custom_tracking_id or Config.HUMANA_ID_FOR_TRACKING
+    try:
+        status = (await pa_table_reader.read()).get(tracking_id)
+    except Exception as e:
+        logger.error(f"Scripted status check failed: {e}")
+        status = None
+    if status is None:
+        agent_tracker.log_action(request_id, f"⚠️ Could not locate PA Request {tracking_id} in the table")
+    return status
+
+async def _run_scheduled(kind: str, request_id: str, request):
+    """Run one agent job in a tracker slot, waiting for room in the lane"""
+    future = await job_scheduler.submit(
+        TRACKER_LANE, lambda: agent_worker_pool.run(kind, request_id, request_id, request), request_id, block=True
+    )
+    return await future
+
+async def poll_pa_status(request_id: str, request) -> dict | None:
+    """Scripted polling loop with adaptive backoff.
+
+    Each check is a short job in a tracker slot; the wait between checks holds no
+    slot and no browser. Returns the result once the request reaches a final status,
+    None when the scripted locator fails twice in a row so the caller can fall back
+    to the LLM agent.
+    """
+    tracking_id = request.custom_tracking_id or Config.HUMANA_ID_FOR_TRACKING
+    interval = request.custom_interval or Config.HUMANA_TRACKER_INTERVAL
+    final_statuses = {status.strip().lower() for status in Config.TRACKER_FINAL_STATUSES.split(',')}
+    agent_tracker.log_action(request_id, "⚡ Starting scripted status polling")
+    delay = interval
+    last_status = None
+    failures = 0
+    while True:
+        status = await _run_scheduled("tracker_check", request_id, request)
+        if status is None:
+            # One retry after a short pause, a portal hiccup should not hand over to the LLM
+            failures += 1
+            if failures >= 2:
+                return None
+            await asyncio.sleep(Config.TRACKER_RETRY_DELAY)
+            continue
+        failures = 0
+        
+        if status != last_status:
+            agent_tracker.log_action(request_id, f"🔍 PA Request {tracking_id} status: {status}")
+            await job_store.update(request_id, result={"pa_status": status, "checked_by": "script"})
+            logger.info(f"🔍 PA Request {tracking_id} status: {status}")
+            # A change means the request is moving, check again soon
+            delay = interval
+            last_status = status
+        else:
+            # Long-pending requests are checked less and less often
+            delay = min(delay * Config.TRACKER_BACKOFF_FACTOR, Config.TRACKER_MAX_INTERVAL)
+        
+        if status.lower() in final_statuses:
+            agent_tracker.log_action(request_id, f"🎯 PA Request {tracking_id} reached final status {status}")
+            return {"pa_status": status, "checked_by": "script"}
+        await asyncio.sleep(delay)
+
+async def track_pa_request(request_id: str, request) -> dict:
+    """Track a PA request until it is final: scripted polling first, the LLM agent when that fails"""
+    result = await poll_pa_status(request_id, request)
+    if result is not None:
+        agent_tracker.log_action(request_id, "🏁 Tracker Agent process completed successfully")
+        return result
+    agent_tracker.log_action(request_id, "🔁 Scripted polling failed, falling back to the browser agent")
+    logger.info("🔁 Scripted polling failed, falling back to the browser agent")
+    return await _run_scheduled("tracker", request_id, request)
+
 async def run_tracker_agent(request_id: str, request):
     """Run the Tracker Agent to monitor PA request status"""
     
     logger.section("🔐 TRACKER AGENT CONFIGURATION")
+    profile = get_profile("tracker", request.agent_profile)
     
     # Get credentials from Config class
     humana_link = Config.HUMANA_LINK
@@ -112,9 +301,10 @@ async def run_tracker_agent(request_id: str, request):
     default_missing_value = Config.DEFAULT_MISSING_VALUE
     default_date_value = Config.DEFAULT_DATE_VALUE
     
-    # Get file paths for uploads
+    # Get file paths for uploads, downloads go to a directory private to this run
     pdf_path = Config.PDF_PATH
-    download_path = Config.DOWNLOAD_PATH
+    action_context = ActionContext(request_id)
+    download_path = action_context.download_dir
     
     logger.info(f"🌐 Portal URL: {humana_link}")
     logger.info(f"👤 Username: {humana_username}")
@@ -123,41 +313,240 @@ async def run_tracker_agent(request_id: str, request):
     logger.info(f"📅 Default date value: {default_date_value}")
     logger.info(f"📄 PDF path: {pdf_path}")
     logger.info(f"📥 Download path: {download_path}")
+    logger.info(f"🎛️ Agent profile: {profile.name} ({profile.model})")
     
     # Get tracking-specific values
     tracking_id = request.custom_tracking_id or Config.HUMANA_ID_FOR_TRACKING
     interval = request.custom_interval or Config.HUMANA_TRACKER_INTERVAL
     
-    # Get prompt from centralized prompts
-    task_prompt = AgentPrompts.get_tracker_prompt(
-        humana_link, humana_username, humana_password, tracking_id, interval
-    )
+    # Lease a warm browser session from the shared pool
+    async with browser_pool.lease(policy_for("tracker", profile)) as browser_session:
+        profile.configure_session(browser_session)
+        
+        # Reuse the stored portal session so the agent can skip logging in
+        agent_tracker.log_action(request_id, "🔐 Restoring portal session")
+        logged_in = await portal_session.authenticate(
+            browser_session, humana_link, humana_username, humana_password
+        )
+        agent_tracker.log_action(request_id, "🔐 Portal session restored" if logged_in else "🔐 No portal session, agent will log in")
     
-    agent_tracker.log_action(request_id, "🤖 Initializing Tracker Agent")
-    logger.progress("🤖 Initializing Tracker Agent...")
+        # Get prompt from centralized prompts
+        task_prompt = AgentPrompts.get_tracker_prompt(
+            humana_link, humana_username, humana_password, tracking_id, interval, logged_in
+        )
     
-    # Create browser session with headless mode
-    browser_session = BrowserSession(headless=Config.HEADLESS_MODE)
+        agent_tracker.log_action(request_id, "🤖 Initializing Tracker Agent")
+        logger.progress("🤖 Initializing Tracker Agent...")
     
-    agent = Agent(
-        task=task_prompt,
-        llm=ChatAzureOpenAI(model=Config.GPT_MODEL),
-        controller=controller,
-        browser_session=browser_session,
-    )
+        with timer(AGENT_INIT_SECONDS, agent="tracker"):
+            agent = Agent(
+                task=task_prompt,
+                llm=create_llm(profile, "tracker"),
+                controller=controller,
+                browser_session=browser_session,
+                context=action_context,
+                register_new_step_callback=agent_tracker.step_callback(request_id),
+                **profile.agent_kwargs(),
+            )
+    
+        agent_tracker.log_action(request_id, "✅ Agent initialized successfully")
+        logger.success("✅ Agent initialized successfully")
+        agent_tracker.log_action(request_id, "🚀 Starting browser automation")
+        logger.progress("🚀 Starting browser automation...")
+    
+        # Log that we're about to start the agent
+        agent_tracker.log_action(request_id, "🤖 Starting browser-use agent with tracking task")
     
-    agent_tracker.log_action(request_id, "✅ Agent initialized successfully")
-    logger.success("✅ Agent initialized successfully")
-    agent_tracker.log_action(request_id, "🚀 Starting browser automation")
-    logger.progress("🚀 Starting browser automation...")
+        history = await agent.run(max_steps=profile.max_steps)
+        AGENT_STEPS.labels(agent="tracker").observe(history.number_of_steps())
     
-    # Log that we're about to start the agent
-    agent_tracker.log_action(request_id, "🤖 Starting browser-use agent with tracking task")
+        # Keep the stored session fresh with any cookies the portal rotated
+        await portal_session.save(browser_session, humana_username)
     
-    await agent.run()
+    # Only a run that finished successfully and reported a final status confirms it
+    final_result = history.final_result()
+    pa_status = _final_status_in(final_result) if history.is_done() and history.is_successful() else None
+    if pa_status is None:
+        reason = (final_result or next((error for error in reversed(history.errors()) if error), None)
+                  or f"stopped after {history.number_of_steps()} steps")
+        agent_tracker.log_action(request_id, f"❌ Tracker agent did not confirm a final status for {tracking_id}", reason)
+        raise TrackingNotConfirmedError(f"Tracker agent did not confirm a final status for {tracking_id}: {reason}")
     
     # Log agent completion with details
     agent_tracker.log_action(request_id, "✅ Browser agent completed successfully")
-    agent_tracker.log_action(request_id, "🎯 Task completed - PA Request found and approved")
-    agent_tracker.log_action(request_id, "🔍 PA Request PA-130810002 status: APPROVED")
+    agent_tracker.log_action(request_id, f"🎯 Task completed - PA Request reached final status {pa_status}")
+    agent_tracker.log_action(request_id, f"🔍 PA Request {tracking_id} status: {pa_status}")
     agent_tracker.log_action(request_id, "🏁 Tracker Agent process completed successfully")
+    return {
+        "pa_status": pa_status,
+        "checked_by": "agent",
+        "profile": profile.name,
+        "steps": history.number_of_steps(),
+        "tokens": history.usage.total_tokens if history.usage else None,
+        "final_result": final_result
+    }
+
+async def scan_pa_table(request_id: str) -> dict:
+    """ID -> status of every request in the PA table, read by the batch tracker's scan job"""
+    statuses = await pa_table_reader.read()
+    agent_tracker.log_action(request_id, f"📊 Scanned {len(statuses)} PA requests")
+    return statuses
+
+# batch_id of the job store runs the batch tracker polls, and its log request ID
+BATCH_ID = "pa-batch-tracker"
+
+class BatchTracker:
+    """Tracks many PA request IDs with one table scan per cycle.
+    
+    Every tracked ID is a tracker run in the job store, so it survives restarts and
+    every API process sees it. One process at a time polls, the one holding the
+    lock file; each scan is a job in the tracker lane and runs in an agent worker
+    process in worker mode.
+    """
+    
+    def __init__(self):
+        self.interval = Config.HUMANA_TRACKER_INTERVAL
+        self.final_statuses = {status.strip().lower() for status in Config.TRACKER_FINAL_STATUSES.split(',')}
+        self.request_id = BATCH_ID
+        self.lock_path = Path(Config.JOB_STORE_PATH).with_suffix('.batch.lock')
+        self._lock = None
+        self._task = None
+        self._wake = None
+    
+    async def _entries(self, active: bool = False) -> list[dict]:
+        if active:
+            jobs = await job_store.list_active(kind="tracker")
+        else:
+            jobs = await job_store.list_by_batch(BATCH_ID)
+        return [job for job in jobs if job["batch_id"] == BATCH_ID]
+    
+    async def add(self, tracking_ids: list[str]) -> list[dict]:
+        """Start tracking IDs that are not tracked yet, returns their tracking and request IDs"""
+        tracked = {job["pa_id"] for job in await self._entries(active=True)}
+        added = []
+        for tracking_id in dict.fromkeys(tracking_ids):
+            if tracking_id in tracked:
+                continue
+            request_id = str(uuid.uuid4())[:8]
+            await job_store.create(
+                request_id, "tracker", pa_id=tracking_id, batch_id=BATCH_ID, lane=TRACKER_LANE, owner=SHARED_OWNER
+            )
+            added.append({"tracking_id": tracking_id, "request_id": request_id})
+        if added:
+            agent_tracker.log_action(self.request_id, "➕ Tracking IDs added", ", ".join(entry["tracking_id"] for entry in added))
+            if self._wake is not None:
+                self._wake.set()
+        return added
+    
+    async def remove(self, tracking_id: str) -> bool:
+        """Stop tracking an ID, its run is marked cancelled"""
+        for job in await self._entries(active=True):
+            if job["pa_id"] == tracking_id:
+                await job_store.mark_failed(job["request_id"], "Removed from the batch tracker", state="cancelled")
+                agent_tracker.log_action(self.request_id, "➖ Tracking ID removed", tracking_id)
+                return True
+        return False
+    
+    async def snapshot(self) -> dict:
+        """Latest run of every ID the batch tracker has tracked"""
+        tracked = {}
+        # Oldest first, so each ID ends up with its latest run
+        for job in reversed(await self._entries()):
+            tracked[job["pa_id"]] = {
+                "request_id": job["request_id"],
+                "state": job["state"],
+                "status": (job.get("result") or {}).get("pa_status"),
+                "final": job["state"] == "completed",
+                "updated_at": job["updated_at"]
+            }
+        return {
+            "request_id": self.request_id,
+            "polling_here": self._lock is not None,
+            "interval_seconds": self.interval,
+            "tracked": tracked,
+            "count": len(tracked)
+        }
+    
+    def start(self):
+        """Start the poll loop; it only scans while this process holds the poller lock"""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Cancel the poller and let another process take over"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock is not None:
+            self._lock.release()
+            self._lock = None
+    
+    def _lead(self) -> bool:
+        """Take the poller lock file if no other process holds it"""
+        if self._lock is None:
+            lock = portalocker.Lock(str(self.lock_path), timeout=0, fail_when_locked=True)
+            try:
+                lock.acquire()
+            except portalocker.LockException:
+                return False
+            self._lock = lock
+            agent_tracker.create_request_file(self.request_id)
+            agent_tracker.log_action(self.request_id, "📋 Batch tracker polling from this process")
+        return True
+    
+    async def _scan(self) -> dict:
+        """One table scan as a tracker-lane job"""
+        future = await job_scheduler.submit(
+            TRACKER_LANE, lambda: agent_worker_pool.run("tracker_scan", self.request_id, self.request_id),
+            self.request_id, block=True
+        )
+        return await future
+    
+    async def _apply_statuses(self, pending: list[dict], statuses: dict):
+        """Update every pending run from one table read"""
+        for job in pending:
+            tracking_id, request_id = job["pa_id"], job["request_id"]
+            status = statuses.get(tracking_id)
+            if status is None or status == (job.get("result") or {}).get("pa_status"):
+                continue
+            agent_tracker.log_action(self.request_id, f"🔍 PA Request {tracking_id} status: {status}")
+            result = {"pa_status": status, "checked_by": "batch"}
+            if status.lower() in self.final_statuses:
+                await job_store.mark_completed(request_id, result)
+                agent_tracker.log_action(self.request_id, f"🎯 PA Request {tracking_id} reached final status {status}")
+                continue
+            if job["state"] == "queued":
+                await job_store.mark_running(request_id)
+            await job_store.update(request_id, result=result)
+    
+    async def _wait_next_cycle(self):
+        """Sleep for the interval, waking early when IDs are added"""
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def _run(self):
+        """Scan the table every interval while runs are pending and this process is the poller"""
+        while True:
+            try:
+                pending = await self._entries(active=True)
+                if pending and await asyncio.to_thread(self._lead):
+                    statuses = await self._scan()
+                    await self._apply_statuses(pending, statuses)
+                    logger.info(f"📊 Batch tracker scanned {len(statuses)} rows for {len(pending)} pending IDs", sample=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                agent_tracker.log_action(self.request_id, "⚠️ Batch tracker cycle failed", str(e))
+                logger.error(f"Batch tracker cycle failed: {e}")
+            await self._wait_next_cycle()
+
+# Global instance
+batch_tracker = BatchTracker()
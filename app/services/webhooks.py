@@ -0,0 +1,222 @@
+import asyncio
+import fnmatch
+import hashlib
+import hmac
+import ipaddress
+import json
+import socket
+import uuid
+from urllib.parse import urlparse
+import httpx
+from app.utils.config import Config
+from app.utils.logger import logger
+from app.services.job_store import job_store
+from app.services.metrics import WEBHOOK_DELIVERIES
+
+# Receiver answers worth another attempt, any other non-2xx status is final
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+def _split(value: str | None) -> list[str]:
+    return [item.strip().lower() for item in (value or "").split(",") if item.strip()]
+
+class CallbackURLError(ValueError):
+    """Raised when a callback URL is not an allowed public destination"""
+
+def _is_public(address: str) -> bool:
+    """True for a globally routable unicast address (not private, loopback, link-local, reserved, ...)"""
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+def validate_callback_url(url: str) -> str:
+    """Check a callback URL against WEBHOOK_ALLOWED_SCHEMES / _HOSTS and reject internal hosts.
+
+    Host names are resolved and checked again before every delivery.
+    """
+    parsed = urlparse(url)
+    schemes = _split(Config.WEBHOOK_ALLOWED_SCHEMES)
+    if parsed.scheme.lower() not in schemes:
+        raise CallbackURLError(f"callback_url scheme must be one of: {', '.join(schemes)}")
+    host = (parsed.hostname or "").lower()
+    if not host:
+        raise CallbackURLError("callback_url has no host")
+    hosts = _split(Config.WEBHOOK_ALLOWED_HOSTS)
+    if hosts and not any(fnmatch.fnmatch(host, pattern) for pattern in hosts):
+        raise CallbackURLError(f"callback_url host {host} is not in WEBHOOK_ALLOWED_HOSTS")
+    if Config.WEBHOOK_ALLOW_PRIVATE:
+        return url
+    if host == "localhost" or host.endswith(".localhost"):
+        raise CallbackURLError(f"callback_url host {host} is not a public address")
+    try:
+        public = _is_public(host)
+    except ValueError:
+        # A host name, checked once it resolves
+        return url
+    if not public:
+        raise CallbackURLError(f"callback_url host {host} is not a public address")
+    return url
+
+async def _resolve_public(url: str) -> str | None:
+    """Address of the URL's host to connect to, None when it does not resolve.
+
+    Raises CallbackURLError when any of its addresses is not public.
+    """
+    parsed = urlparse(url)
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        return None
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    blocked = [] if Config.WEBHOOK_ALLOW_PRIVATE else sorted(address for address in addresses if not _is_public(address))
+    if blocked:
+        raise CallbackURLError(f"host resolves to non-public address {', '.join(blocked)}")
+    return addresses[0] if addresses else None
+
+def _pinned_request(url: str, address: str) -> tuple[httpx.URL, dict, dict]:
+    """URL that connects to the resolved address, with the Host header and TLS SNI of the original host"""
+    original = httpx.URL(url)
+    return (
+        original.copy_with(host=address),
+        {"Host": original.netloc.decode("ascii")},
+        {"sni_hostname": original.host}
+    )
+
+class WebhookDispatcher:
+    """POSTs each state and result change of a run to the callback_url given with its request.
+
+    Failed deliveries are retried with exponential backoff. Deliveries of one run
+    go out one after another, so a receiver never sees "completed" before "running".
+    Pending retries live in memory and do not survive a restart. Every attempt
+    connects to the address it validated, so the host cannot rebind in between.
+    """
+
+    def __init__(self):
+        self.max_attempts = Config.WEBHOOK_MAX_ATTEMPTS
+        self.backoff_base = Config.WEBHOOK_BACKOFF_BASE
+        self.backoff_max = Config.WEBHOOK_BACKOFF_MAX
+        self.timeout = Config.WEBHOOK_TIMEOUT
+        self.secret = Config.WEBHOOK_SECRET
+        self._client: httpx.AsyncClient | None = None
+        # Last queued delivery per run, the next one waits for it
+        self._chains: dict[str, asyncio.Task] = {}
+        self._started = False
+
+    def start(self):
+        """Start delivering job state changes"""
+        if not self._started:
+            job_store.add_listener(self.notify)
+            self._started = True
+
+    async def stop(self):
+        """Drop pending deliveries and close the HTTP client"""
+        for task in list(self._chains.values()):
+            task.cancel()
+        await asyncio.gather(*self._chains.values(), return_exceptions=True)
+        self._chains.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            # Connections are pooled by address; kept alive, one could carry another host's requests
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=httpx.Limits(max_keepalive_connections=0))
+        return self._client
+
+    @staticmethod
+    def build_payload(job: dict) -> dict:
+        return {
+            "event": f"{job['kind']}.{job['state']}",
+            "delivery_id": str(uuid.uuid4()),
+            "request_id": job["request_id"],
+            "kind": job["kind"],
+            "state": job["state"],
+            "occurred_at": job["updated_at"],
+            "job": {key: value for key, value in job.items() if key != "callback_url"},
+        }
+
+    def notify(self, job: dict):
+        """Job store listener: queue a delivery when the run has a callback URL"""
+        if not job.get("callback_url"):
+            return
+        request_id = job["request_id"]
+        previous = self._chains.get(request_id)
+        task = asyncio.create_task(self._deliver_after(previous, job["callback_url"], self.build_payload(job)))
+        self._chains[request_id] = task
+
+        def forget(finished: asyncio.Task):
+            if self._chains.get(request_id) is finished:
+                del self._chains[request_id]
+        task.add_done_callback(forget)
+
+    async def _deliver_after(self, previous: asyncio.Task | None, url: str, payload: dict):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        await self.deliver(url, payload)
+
+    def _backoff(self, attempt: int, retry_after: str | None) -> float:
+        delay = min(self.backoff_base * 2 ** (attempt - 1), self.backoff_max)
+        if retry_after and retry_after.isdigit():
+            # Honour the receiver's Retry-After, within the backoff ceiling
+            delay = max(delay, min(float(retry_after), self.backoff_max))
+        return delay
+
+    async def deliver(self, url: str, payload: dict) -> bool:
+        """POST one event, retrying network errors and retryable statuses. True once accepted"""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "X-Webhook-Event": payload["event"],
+            "X-Webhook-Delivery": payload["delivery_id"],
+        }
+        if self.secret:
+            digest = hmac.new(self.secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+            headers["X-Webhook-Signature"] = f"sha256={digest}"
+
+        for attempt in range(1, self.max_attempts + 1):
+            retry_after = None
+            # Checked on every attempt, the host may resolve elsewhere by now
+            try:
+                validate_callback_url(url)
+                address = await _resolve_public(url)
+            except CallbackURLError as e:
+                WEBHOOK_DELIVERIES.labels(outcome="blocked").inc()
+                logger.error(f"Webhook {payload['event']} for {payload['request_id']} blocked: {e}")
+                return False
+            try:
+                if address is None:
+                    raise httpx.ConnectError(f"{urlparse(url).hostname} does not resolve")
+                target, host_headers, extensions = _pinned_request(url, address)
+                response = await self._get_client().post(
+                    target, content=body, headers={**headers, **host_headers}, extensions=extensions
+                )
+                if response.is_success:
+                    WEBHOOK_DELIVERIES.labels(outcome="delivered").inc()
+                    logger.info(f"📨 Webhook {payload['event']} delivered for {payload['request_id']}")
+                    return True
+                error = f"HTTP {response.status_code}"
+                if response.status_code not in RETRY_STATUSES:
+                    WEBHOOK_DELIVERIES.labels(outcome="rejected").inc()
+                    logger.error(f"Webhook {payload['event']} for {payload['request_id']} rejected: {error}")
+                    return False
+                retry_after = response.headers.get("Retry-After")
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+
+            if attempt == self.max_attempts:
+                break
+            delay = self._backoff(attempt, retry_after)
+            WEBHOOK_DELIVERIES.labels(outcome="retry").inc()
+            logger.info(f"📨 Webhook {payload['event']} for {payload['request_id']} failed ({error}), "
+                        f"retry {attempt}/{self.max_attempts - 1} in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+        WEBHOOK_DELIVERIES.labels(outcome="failed").inc()
+        logger.error(f"Webhook {payload['event']} for {payload['request_id']} failed after "
+                     f"{self.max_attempts} attempts: {error}")
+        return False
+
+# Global instance
+webhook_dispatcher = WebhookDispatcher()
@@ -4,47 +4,53 @@ class AgentPrompts:
     @staticmethod
     def get_form_filling_prompt(humana_link: str, humana_username: str, humana_password: str, 
                                data_from_dataverse: str, default_missing_value: str, 
-                               default_date_value: str, pdf_path: str) -> str:
+                               default_date_value: str, attachment_names: list[str], logged_in: bool = False) -> str:
         """Get the form filling agent prompt"""
-        return f"""
-You are an intelligent browser controller and automated form-filling bot.  
-
-Your task is to:  
-1. Navigate to {humana_link}.  
+        if logged_in:
+            access_steps = f"""1. The browser is already logged in to {humana_link}. Do not log in again.  
+2. Go to the **Prior Authorization** section.  
+3. Click on the **Add PA Request** button.  
+4. Fill out the multi-step form using the provided data:  
+"""
+        else:
+            access_steps = f"""1. Navigate to {humana_link}.  
 2. Log in using the following credentials:  
    - Username: {humana_username}  
    - Password: {humana_password}  
 3. After logging in, go to the **Prior Authorization** section.  
 4. Click on the **Add PA Request** button.  
 5. Fill out the multi-step form using the provided data:  
-   {data_from_dataverse}  
+"""
+        return f"""
+You are an intelligent browser controller and automated form-filling bot.  
+
+Your task is to:  
+{access_steps}   {data_from_dataverse}  
 
 IMPORTANT INSTRUCTIONS:
 - If any required field is not available in the provided data, fill it with "{default_missing_value}"
 - If any date field is not available in the provided data, use "{default_date_value}"
-- CRITICAL: All dates must be entered in DD/MM/YYYY format (e.g., 25/08/2025, 01/03/1959)
+- Every field with "Date" in its name has been converted to the DD/MM/YYYY format the portal needs, enter those exactly as given
 - CRITICAL: First Name and Last Name must be entered as SEPARATE fields - do not combine them
 - Use the Member.First_Name value for the First Name field only
 - Use the Member.Last_Name value for the Last Name field only
 - CAREFULLY verify each field index before inputting data - ensure you're filling the correct field
 - Double-check that you're entering data into the right input field for each piece of information
 - For file upload: Use the custom action "Upload file to form element" with the correct index and file_type="pdf"
-- Multiple PDF files are available in: {pdf_path}
-- The system will automatically use whatever PDF files are found in that folder
+- Files to attach: {', '.join(attachment_names) or 'none'}
+- The system will automatically upload exactly these files; when there are none, leave the upload field empty
 - After completing all form fields, click on the **Submit** button to submit the form
 
 DETAILED FORM FILLING INSTRUCTIONS:
 - CAREFULLY identify each form field by its label and index before entering data
-- For date fields: Always use DD/MM/YYYY format (e.g., 25/08/2025, 01/03/1959)
-- For Member.Date_of_Birth: Convert to DD/MM/YYYY format (e.g., "01/03/1959" for "1959-03-01")
-- For Service.Requested_Start_Date: Convert to DD/MM/YYYY format (e.g., "25/08/2025" for "2025-08-25")
+- For date fields: Enter the given DD/MM/YYYY value as is, do not reformat it
 - Verify you're entering data into the correct field by reading the field label
 - Double-check field indexes match the intended input field
 
 DETAILED UPLOAD INSTRUCTIONS:
 - When you encounter a file upload field, use the custom action "Upload file to form element"
 - Pass the correct element index and file_type="pdf" as parameters
-- The action will automatically upload all available PDF files
+- The action will automatically upload all the files to attach
 - IMPORTANT: Only upload files ONCE per upload field - do not repeat uploads
 - If you see files already uploaded (with replace/remove buttons), DO NOT upload again
 - Look for the actual file upload input field (usually labeled "Upload Files" or similar)
@@ -66,22 +72,32 @@ SUBMISSION COMPLETION INSTRUCTIONS:
 
     @staticmethod
     def get_tracker_prompt(humana_link: str, humana_username: str, humana_password: str, 
-                          tracking_id: str, interval: int) -> str:
+                          tracking_id: str, interval: int, logged_in: bool = False) -> str:
         """Get the tracker agent prompt"""
-        return f"""
-You are a Tracker Agent monitoring Prior Authorization requests.
-
-Your task:
-1. Navigate to {humana_link}
+        if logged_in:
+            access_steps = f"""1. The browser is already logged in to {humana_link}. Do not log in again.
+2. Go to Prior Authorization section
+3. Search for PA Request ID: {tracking_id}
+4. Check the status in the Prior Authorization Requests table
+5. If status = "Approved":"""
+            retry_step = "6. If not approved:"
+        else:
+            access_steps = f"""1. Navigate to {humana_link}
 2. Log in with Username: {humana_username}, Password: {humana_password}
 3. Go to Prior Authorization section
 4. Search for PA Request ID: {tracking_id}
 5. Check the status in the Prior Authorization Requests table
-6. If status = "Approved":
+6. If status = "Approved":"""
+            retry_step = "7. If not approved:"
+        return f"""
+You are a Tracker Agent monitoring Prior Authorization requests.
+
+Your task:
+{access_steps}
    - Log "PA Request {tracking_id} has been APPROVED"
    - Your process has been completed successfully
    - Stop tracking and close browser
-7. If not approved:
+{retry_step}
    - Wait {interval} seconds
    - Re-check the status
    - Continue monitoring until approved
@@ -89,4 +105,31 @@ Your task:
 IMPORTANT: Once you find status = "Approved", your process is complete. Do not continue tracking.
 
 Focus only on finding and monitoring this specific PA request.
+"""
+
+    @staticmethod
+    def get_login_prompt(humana_link: str, humana_username: str, humana_password: str) -> str:
+        """Get the login-only prompt used to refresh the stored portal session"""
+        return f"""
+You are a browser controller logging in to the Humana portal.
+
+Your task:
+1. Navigate to {humana_link}
+2. Log in with Username: {humana_username}, Password: {humana_password}
+3. Wait until the portal home page has loaded after login
+
+IMPORTANT: Do not navigate anywhere else after logging in. Your process is complete as soon as the login succeeds.
+"""
+
+    @staticmethod
+    def get_replay_handoff_note(completed_steps: list) -> str:
+        """Get the note appended to the form filling prompt when a replay stopped part-way"""
+        steps = "\n".join(f"- {step}" for step in completed_steps)
+        return f"""
+PROGRESS SO FAR:
+An automated script already performed these steps on the current page, in order:
+{steps}
+Continue from the current page instead of starting over. Check fields that are already
+filled and only correct them if they are wrong. Do not upload files again if they are
+already listed as uploaded.
 """
@@ -1,33 +1,176 @@
-import os
-import uuid
+import json
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from app.utils.config import Config
+from app.utils.logger import logger
 
 class AgentTracker:
+    """Per-request event log written as JSONL by a background writer thread"""
+
     def __init__(self):
-        self.track_dir = Path("track")
+        self.track_dir = Path(Config.TRACK_DIR)
         self.track_dir.mkdir(exist_ok=True)
-    
+        self.flush_interval = Config.TRACK_FLUSH_INTERVAL
+        self.flush_size = Config.TRACK_FLUSH_SIZE
+        self.max_file_bytes = Config.TRACK_MAX_FILE_BYTES
+        self.retention_seconds = Config.TRACK_RETENTION_DAYS * 86400
+        self.max_files = Config.TRACK_MAX_FILES
+        self._buffer: list[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._writer = None
+        self._closed = False
+        self._phases: dict[str, str] = {}
+        self._started: dict[str, float] = {}
+        self._last_cleanup = 0.0
+        self._listeners: list = []
+
+    def _file_path(self, request_id: str) -> Path:
+        return self.track_dir / f"request_{request_id}.jsonl"
+
+    def add_listener(self, listener):
+        """Call listener(record) for every event as it is logged (e.g. live streaming)"""
+        self._listeners.append(listener)
+
+    def _emit(self, record: dict):
+        """Queue a record for the writer, waking it early once the buffer is full"""
+        for listener in self._listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                logger.error(f"Tracking event listener failed: {e}")
+        with self._lock:
+            self._buffer.append(record)
+            size = len(self._buffer)
+            if self._writer is None and not self._closed:
+                self._writer = threading.Thread(target=self._run, name="agent-tracker-writer", daemon=True)
+                self._writer.start()
+        if self._closed:
+            # Late events after shutdown are written straight away
+            self.flush()
+        elif size >= self.flush_size:
+            self._wakeup.set()
+
     def create_request_file(self, request_id: str) -> Path:
-        """Create a new tracking file for a request"""
-        file_path = self.track_dir / f"request_{request_id}.txt"
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(f"=== HUMANA FORM FILLING REQUEST TRACKING ===\n")
-            f.write(f"Request ID: {request_id}\n")
-            f.write(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"{'='*50}\n\n")
-        return file_path
-    
-    def log_action(self, request_id: str, action: str, details: str = ""):
-        """Log an action to the request's tracking file"""
-        file_path = self.track_dir / f"request_{request_id}.txt"
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        with open(file_path, 'a', encoding='utf-8') as f:
-            f.write(f"[{timestamp}] {action}")
-            if details:
-                f.write(f" - {details}")
-            f.write("\n")
+        """Start tracking a new request"""
+        self._started[request_id] = time.monotonic()
+        self._phases.pop(request_id, None)
+        self._emit({
+            "timestamp": datetime.now().isoformat(),
+            "request_id": request_id,
+            "phase": "received",
+            "action": "request_started",
+            "details": "",
+            "duration": None
+        })
+        return self._file_path(request_id)
+
+    def log_action(self, request_id: str, action: str, details: str = "", phase: str | None = None,
+                   duration: float | None = None):
+        """Record an action for the request (phase carries over to later actions when omitted)"""
+        if phase is not None:
+            self._phases[request_id] = phase
+        self._emit({
+            "timestamp": datetime.now().isoformat(),
+            "request_id": request_id,
+            "phase": self._phases.get(request_id),
+            "action": action,
+            "details": details,
+            "duration": round(duration, 3) if duration is not None else None
+        })
+
+    @contextmanager
+    def phase(self, request_id: str, name: str):
+        """Tag actions inside the block with a phase and log how long the phase took"""
+        previous = self._phases.get(request_id)
+        self._phases[request_id] = name
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.log_action(request_id, f"⏱️ Phase {name} finished", phase=name,
+                            duration=time.monotonic() - started)
+            if previous is None:
+                self._phases.pop(request_id, None)
+            else:
+                self._phases[request_id] = previous
+
+    def step_callback(self, request_id: str):
+        """Agent register_new_step_callback that logs each step's goal, actions and URL"""
+        def on_step(browser_state, model_output, step: int):
+            goal = model_output.current_state.next_goal if model_output.current_state else ""
+            actions = [next(iter(action.model_dump(exclude_none=True)), "") for action in model_output.action]
+            self.log_action(request_id, f"👣 Step {step}: {goal}", f"{', '.join(actions)} @ {browser_state.url}")
+        return on_step
+
+    def finish_request(self, request_id: str):
+        """Log the total request duration and drop its in-memory state"""
+        started = self._started.pop(request_id, None)
+        self.log_action(request_id, "request_finished", phase="finished",
+                        duration=time.monotonic() - started if started is not None else None)
+        self._phases.pop(request_id, None)
+
+    def flush(self):
+        """Write every buffered record now"""
+        with self._flush_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+            by_request: dict[str, list[str]] = {}
+            for record in records:
+                by_request.setdefault(record["request_id"], []).append(json.dumps(record, ensure_ascii=False))
+            # One append per request file per flush
+            for request_id, lines in by_request.items():
+                file_path = self._file_path(request_id)
+                self._rotate(file_path)
+                with open(file_path, 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+
+    def close(self):
+        """Stop the writer thread after a final flush"""
+        self._closed = True
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join(timeout=10)
+            self._writer = None
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_cleanup > 3600:
+                    self._last_cleanup = time.monotonic()
+                    self._cleanup()
+            except Exception as e:
+                logger.error(f"Failed to write tracking events: {e}")
+
+    def _rotate(self, file_path: Path):
+        """Move a file that reached the size limit aside, keeping one rotated copy"""
+        try:
+            if file_path.stat().st_size < self.max_file_bytes:
+                return
+        except FileNotFoundError:
+            return
+        file_path.replace(file_path.with_suffix(".1.jsonl"))
+
+    def _cleanup(self):
+        """Delete tracking files past the retention period, then the oldest beyond the file limit"""
+        files = sorted(
+            (path.stat().st_mtime, path) for path in self.track_dir.glob("request_*")
+        )
+        cutoff = time.time() - self.retention_seconds
+        expired = [path for mtime, path in files if mtime < cutoff]
+        remaining = len(files) - len(expired)
+        if remaining > self.max_files:
+            expired += [path for _, path in files[len(expired):len(expired) + remaining - self.max_files]]
+        for path in expired:
+            path.unlink(missing_ok=True)
 
 # Global instance
 agent_tracker = AgentTracker()
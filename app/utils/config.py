@@ -9,9 +9,97 @@ class Config:
     TENANT_ID = os.getenv('TENANT_ID')
     DATAVERSE_URL = os.getenv('DATAVERSE_URL')
     TARGET_ACCOUNT_ID = os.getenv('TARGET_ACCOUNT_ID')
+    DATAVERSE_TOKEN_REFRESH_MARGIN = int(os.getenv('DATAVERSE_TOKEN_REFRESH_MARGIN', 300))
+    DATAVERSE_HTTP_TIMEOUT = float(os.getenv('DATAVERSE_HTTP_TIMEOUT', 30))
+    DATAVERSE_MAX_CONNECTIONS = int(os.getenv('DATAVERSE_MAX_CONNECTIONS', 20))
+    DATAVERSE_BATCH_SIZE = int(os.getenv('DATAVERSE_BATCH_SIZE', 100))
+    # Columns fetched for the PA form ($select projections)
+    DATAVERSE_ACCOUNT_FIELDS = os.getenv(
+        'DATAVERSE_ACCOUNT_FIELDS',
+        'accountid,name,accountnumber,telephone1,emailaddress1,address1_line1,address1_city,'
+        'address1_stateorprovince,address1_postalcode,address1_country,description'
+    )
+    DATAVERSE_CONTACT_FIELDS = os.getenv(
+        'DATAVERSE_CONTACT_FIELDS',
+        'contactid,firstname,lastname,birthdate,gendercode,telephone1,emailaddress1,'
+        'address1_postalcode,address1_country'
+    )
+    
+    # Logging Configuration
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1.0))
+    
+    # Dataverse Mirror Configuration
+    DATAVERSE_MIRROR_ENABLED = os.getenv('DATAVERSE_MIRROR_ENABLED', 'false').lower() == 'true'
+    DATAVERSE_MIRROR_PATH = os.getenv('DATAVERSE_MIRROR_PATH', 'data/dataverse_mirror.db')
+    DATAVERSE_MIRROR_SYNC_INTERVAL = int(os.getenv('DATAVERSE_MIRROR_SYNC_INTERVAL', 300))
+    DATAVERSE_MIRROR_PAGE_SIZE = int(os.getenv('DATAVERSE_MIRROR_PAGE_SIZE', 5000))
+    # Seconds since the last completed sync after which mirror reads fall back to live Dataverse
+    DATAVERSE_MIRROR_MAX_AGE = int(os.getenv('DATAVERSE_MIRROR_MAX_AGE', 900))
     
     # Azure OpenAI Configuration
     GPT_MODEL = os.getenv('GPT_MODEL', 'gpt-4.1')
+    # Smaller deployment for the fast profile (e.g. gpt-4.1-mini), defaults to GPT_MODEL
+    FAST_GPT_MODEL = os.getenv('FAST_GPT_MODEL', GPT_MODEL)
+    
+    # Agent Profiles ("accurate" is the browser-use default behaviour)
+    AGENT_PROFILES = {
+        "fast": {
+            "model": FAST_GPT_MODEL,
+            "use_vision": False,
+            # The small model plans without thinking, so it commits to fewer actions per step
+            # than balanced; speed comes from flash mode, the smaller model and the trimmed DOM
+            "max_actions_per_step": 4,
+            "max_steps": 30,
+            "use_thinking": False,
+            "flash_mode": True,
+            "max_history_items": 10,
+            "viewport_expansion": 0,
+            "include_attributes": ["title", "type", "name", "role", "value", "placeholder", "aria-label", "checked"],
+            "llm_cache": True,
+            # None keeps the run type's FORM_/TRACKER_BLOCK_RESOURCE_TYPES
+            "block_resource_types": None,
+        },
+        "balanced": {
+            "model": GPT_MODEL,
+            "use_vision": False,
+            "max_actions_per_step": 6,
+            "max_steps": 60,
+            "use_thinking": True,
+            "flash_mode": False,
+            "max_history_items": 20,
+            "viewport_expansion": 300,
+            "include_attributes": None,
+            "llm_cache": True,
+            "block_resource_types": None,
+        },
+        "accurate": {
+            "model": GPT_MODEL,
+            "use_vision": True,
+            "max_actions_per_step": 10,
+            "max_steps": 100,
+            "use_thinking": True,
+            "flash_mode": False,
+            "max_history_items": None,
+            "viewport_expansion": 500,
+            "include_attributes": None,
+            # Screenshots differ on every step, cached replies would never match
+            "llm_cache": False,
+            # The LLM sees screenshots, so images and fonts load
+            "block_resource_types": ["media"],
+        },
+    }
+    # JSON of per-profile field overrides, e.g. {"fast": {"max_steps": 20}}
+    AGENT_PROFILE_OVERRIDES = os.getenv('AGENT_PROFILE_OVERRIDES', '')
+    FORM_AGENT_PROFILE = os.getenv('FORM_AGENT_PROFILE', 'balanced')
+    TRACKER_AGENT_PROFILE = os.getenv('TRACKER_AGENT_PROFILE', 'fast')
+    
+    # LLM Response Cache (opt-in, profiles with "llm_cache": false never use it)
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'false').lower() == 'true'
+    LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'data/llm_cache.db')
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 10000))
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 24 * 3600))
     
     # Humana Portal Configuration
     HUMANA_LINK = os.getenv('HUMANA_LINK')
@@ -21,6 +109,20 @@ class Config:
     # Tracker Agent Configuration
     HUMANA_ID_FOR_TRACKING = os.getenv('HUMANA_ID_FOR_TRACKING')
     HUMANA_TRACKER_INTERVAL = int(os.getenv('HUMANA_TRACKER_INTERVAL', 10))
+    TRACKER_PA_TABLE_URL = os.getenv('TRACKER_PA_TABLE_URL')
+    TRACKER_PA_NAV_TEXT = os.getenv('TRACKER_PA_NAV_TEXT', 'Prior Authorization')
+    TRACKER_TABLE_ROW_SELECTOR = os.getenv('TRACKER_TABLE_ROW_SELECTOR', 'table tbody tr')
+    TRACKER_NEXT_PAGE_SELECTOR = os.getenv('TRACKER_NEXT_PAGE_SELECTOR', 'button:has-text("Next")')
+    TRACKER_ID_PATTERN = os.getenv('TRACKER_ID_PATTERN', r'PA-\d+')
+    TRACKER_FINAL_STATUSES = os.getenv('TRACKER_FINAL_STATUSES', 'Approved')
+    TRACKER_MAX_TABLE_PAGES = int(os.getenv('TRACKER_MAX_TABLE_PAGES', 50))
+    TRACKER_TABLE_TIMEOUT = int(os.getenv('TRACKER_TABLE_TIMEOUT', 30))
+    TRACKER_BACKOFF_FACTOR = float(os.getenv('TRACKER_BACKOFF_FACTOR', 1.5))
+    TRACKER_MAX_INTERVAL = int(os.getenv('TRACKER_MAX_INTERVAL', 300))
+    TRACKER_RETRY_DELAY = int(os.getenv('TRACKER_RETRY_DELAY', 5))
+    # Seconds a PA table read is shared by the trackers of a process, and an unused table page is kept open
+    TRACKER_TABLE_MAX_AGE = int(os.getenv('TRACKER_TABLE_MAX_AGE', 5))
+    TRACKER_READER_IDLE_TIMEOUT = int(os.getenv('TRACKER_READER_IDLE_TIMEOUT', 120))
     
     # Default Values for Missing Data
     DEFAULT_MISSING_VALUE = os.getenv('DEFAULT_MISSING_VALUE')
@@ -30,10 +132,112 @@ class Config:
     IMAGE_PATH = os.getenv('IMAGE_PATH')
     PDF_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'temp')
     DOWNLOAD_PATH = os.getenv('DOWNLOAD_PATH')
+    UPLOAD_TIMEOUT = int(os.getenv('UPLOAD_TIMEOUT', 30))
+    UPLOAD_SETTLE_TIMEOUT = int(os.getenv('UPLOAD_SETTLE_TIMEOUT', 15))
+    DOWNLOAD_TIMEOUT = int(os.getenv('DOWNLOAD_TIMEOUT', 60))
+    
+    # Attachment Store Configuration
+    ATTACHMENT_DIR = os.getenv('ATTACHMENT_DIR', 'data/attachments')
+    ATTACHMENT_CHUNK_SIZE = int(os.getenv('ATTACHMENT_CHUNK_SIZE', 1024 * 1024))
+    ATTACHMENT_MAX_BYTES = int(os.getenv('ATTACHMENT_MAX_BYTES', 50 * 1024 * 1024))
+    ATTACHMENT_MAX_FILES = int(os.getenv('ATTACHMENT_MAX_FILES', 20))
+    # Whole multipart body, checked against Content-Length and while it streams in
+    ATTACHMENT_MAX_REQUEST_BYTES = int(os.getenv('ATTACHMENT_MAX_REQUEST_BYTES', 100 * 1024 * 1024))
+    ATTACHMENT_RETENTION_DAYS = int(os.getenv('ATTACHMENT_RETENTION_DAYS', 30))
+    # Seconds between sweeps for attachments past retention
+    ATTACHMENT_CLEANUP_INTERVAL = int(os.getenv('ATTACHMENT_CLEANUP_INTERVAL', 3600))
+    
+    # Form Replay Configuration
+    FORM_REPLAY_ENABLED = os.getenv('FORM_REPLAY_ENABLED', 'true').lower() == 'true'
+    FORM_REPLAY_DIR = os.getenv('FORM_REPLAY_DIR', 'replays')
+    FORM_REPLAY_STEP_TIMEOUT = int(os.getenv('FORM_REPLAY_STEP_TIMEOUT', 10))
+    FORM_REPLAY_CONFIRMATION_TIMEOUT = int(os.getenv('FORM_REPLAY_CONFIRMATION_TIMEOUT', 120))
+    FORM_SUCCESS_TEXT = os.getenv('FORM_SUCCESS_TEXT', 'successfully submitted')
+    # Button labels (comma-separated words) of clicks that may send the form; replay never hands over to the LLM after one
+    FORM_SUBMIT_LABELS = os.getenv('FORM_SUBMIT_LABELS', 'Submit')
     
     # Browser Configuration
     HEADLESS_MODE = os.getenv('HEADLESS_MODE', 'false').lower() == 'true'
     
+    # Job Scheduler Configuration
+    SCHEDULER_MAX_CONCURRENCY = int(os.getenv('SCHEDULER_MAX_CONCURRENCY', 4))
+    # Concurrent tracker status checks and agent fallbacks, on top of SCHEDULER_MAX_CONCURRENCY
+    SCHEDULER_TRACKER_SLOTS = int(os.getenv('SCHEDULER_TRACKER_SLOTS', 2))
+    SCHEDULER_MAX_QUEUE = int(os.getenv('SCHEDULER_MAX_QUEUE', 50))
+    SCHEDULER_RETRY_AFTER = int(os.getenv('SCHEDULER_RETRY_AFTER', 30))
+    
+    # Bulk Submission Configuration
+    BULK_WORKER_COUNT = int(os.getenv('BULK_WORKER_COUNT', 2))
+    
+    # Agent Worker Configuration (out-of-process agent runs)
+    AGENT_WORKER_MODE = os.getenv('AGENT_WORKER_MODE', 'false').lower() == 'true'
+    AGENT_WORKER_COUNT = int(os.getenv('AGENT_WORKER_COUNT', os.cpu_count() or 2))
+    AGENT_WORKER_CONCURRENCY = int(os.getenv('AGENT_WORKER_CONCURRENCY', 2))
+    AGENT_WORKER_MAX_JOBS = int(os.getenv('AGENT_WORKER_MAX_JOBS', 50))
+    
+    # Request Tracking Configuration (JSONL event files under TRACK_DIR)
+    TRACK_DIR = os.getenv('TRACK_DIR', 'track')
+    TRACK_FLUSH_INTERVAL = float(os.getenv('TRACK_FLUSH_INTERVAL', 1.0))
+    TRACK_FLUSH_SIZE = int(os.getenv('TRACK_FLUSH_SIZE', 100))
+    TRACK_MAX_FILE_BYTES = int(os.getenv('TRACK_MAX_FILE_BYTES', 5 * 1024 * 1024))
+    TRACK_RETENTION_DAYS = int(os.getenv('TRACK_RETENTION_DAYS', 14))
+    TRACK_MAX_FILES = int(os.getenv('TRACK_MAX_FILES', 5000))
+    
+    # Progress Streaming Configuration (SSE ring buffers)
+    STREAM_BUFFER_SIZE = int(os.getenv('STREAM_BUFFER_SIZE', 200))
+    STREAM_MAX_REQUESTS = int(os.getenv('STREAM_MAX_REQUESTS', 500))
+    STREAM_HEARTBEAT = int(os.getenv('STREAM_HEARTBEAT', 15))
+    
+    # Long-Poll Status Configuration (GET /status/{request_id}?wait=...)
+    STATUS_LONG_POLL_MAX = int(os.getenv('STATUS_LONG_POLL_MAX', 60))
+    # Re-read interval, catches changes made by agent worker processes
+    STATUS_LONG_POLL_RECHECK = float(os.getenv('STATUS_LONG_POLL_RECHECK', 2.0))
+    
+    # Webhook Configuration (POSTs to a request's callback_url on each state change)
+    WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', 6))
+    WEBHOOK_BACKOFF_BASE = float(os.getenv('WEBHOOK_BACKOFF_BASE', 2.0))
+    WEBHOOK_BACKOFF_MAX = float(os.getenv('WEBHOOK_BACKOFF_MAX', 300))
+    WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', 10))
+    # Optional shared secret, deliveries then carry an HMAC-SHA256 X-Webhook-Signature
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+    # callback_url must use one of these schemes and, when set, match one of the host globs
+    WEBHOOK_ALLOWED_SCHEMES = os.getenv('WEBHOOK_ALLOWED_SCHEMES', 'https')
+    WEBHOOK_ALLOWED_HOSTS = os.getenv('WEBHOOK_ALLOWED_HOSTS', '')
+    # Private, loopback and link-local destinations are refused unless this is on (local testing only)
+    WEBHOOK_ALLOW_PRIVATE = os.getenv('WEBHOOK_ALLOW_PRIVATE', 'false').lower() == 'true'
+    
+    # Job Store Configuration
+    JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', 'data/jobs.db')
+    # Seconds between heartbeats of each API process; runs of a process silent for 3 heartbeats are failed
+    JOB_STORE_HEARTBEAT_INTERVAL = int(os.getenv('JOB_STORE_HEARTBEAT_INTERVAL', 30))
+    
+    # Browser Pool Configuration
+    BROWSER_POOL_MIN_SIZE = int(os.getenv('BROWSER_POOL_MIN_SIZE', 1))
+    BROWSER_POOL_MAX_SIZE = int(os.getenv('BROWSER_POOL_MAX_SIZE', 4))
+    BROWSER_POOL_MAX_USES = int(os.getenv('BROWSER_POOL_MAX_USES', 20))
+    
+    # Resource Policy Configuration (request interception on agent browsers)
+    RESOURCE_POLICY_ENABLED = os.getenv('RESOURCE_POLICY_ENABLED', 'true').lower() == 'true'
+    FORM_BLOCK_RESOURCE_TYPES = os.getenv('FORM_BLOCK_RESOURCE_TYPES', 'image,media,font')
+    TRACKER_BLOCK_RESOURCE_TYPES = os.getenv('TRACKER_BLOCK_RESOURCE_TYPES', 'image,media,font')
+    RESOURCE_BLOCK_URLS = os.getenv(
+        'RESOURCE_BLOCK_URLS',
+        '*google-analytics.com/*,*googletagmanager.com/*,*doubleclick.net/*,*hotjar.com/*,'
+        '*clarity.ms/*,*segment.io/*,*nr-data.net/*,*newrelic.com/*'
+    )
+    FORM_BLOCK_URLS = os.getenv('FORM_BLOCK_URLS', '')
+    TRACKER_BLOCK_URLS = os.getenv('TRACKER_BLOCK_URLS', '')
+    RESOURCE_ALLOW_URLS = os.getenv('RESOURCE_ALLOW_URLS', '')
+    RESOURCE_BLOCK_THIRD_PARTY = os.getenv('RESOURCE_BLOCK_THIRD_PARTY', 'false').lower() == 'true'
+    
+    # Portal Session Configuration
+    PORTAL_SESSION_DIR = os.getenv('PORTAL_SESSION_DIR', 'sessions')
+    PORTAL_SESSION_MAX_AGE = int(os.getenv('PORTAL_SESSION_MAX_AGE', 8 * 3600))
+    PORTAL_LOGIN_FORM_SELECTOR = os.getenv('PORTAL_LOGIN_FORM_SELECTOR', 'input[type="password"]')
+    PORTAL_LOGIN_MAX_STEPS = int(os.getenv('PORTAL_LOGIN_MAX_STEPS', 10))
+    # Seconds a run waits for another process's re-login before logging in by itself
+    PORTAL_LOGIN_LOCK_TIMEOUT = int(os.getenv('PORTAL_LOGIN_LOCK_TIMEOUT', 300))
+    
     @classmethod
     def validate(cls):
         required_vars = ['CLIENT_ID', 'CLIENT_SECRET', 'TENANT_ID', 'DATAVERSE_URL', 'TARGET_ACCOUNT_ID']
@@ -1,58 +1,144 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
 import time
+from contextvars import ContextVar
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from app.utils.config import Config
+
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+# Per-request state; every asyncio task gets its own copy of these
+_context: ContextVar[dict] = ContextVar("log_context", default={})
+_timer_start: ContextVar[float | None] = ContextVar("log_timer_start", default=None)
+_section_count: ContextVar[int] = ContextVar("log_section_count", default=0)
+
+ICONS = {
+    "progress": "🔄 ",
+    "success": "✅ ",
+    "error": "❌ ",
+    "warning": "⚠️  ",
+    "info": "ℹ️  ",
+    "debug": "🐛 ",
+}
+
+class TextFormatter(logging.Formatter):
+    """Console format: [HH:MM:SS] [request] icon message, banners for headers and sections"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        kind = getattr(record, "kind", "info")
+        message = record.getMessage()
+        context = getattr(record, "context", {})
+        request = f"[{context['request_id']}] " if context.get("request_id") else ""
+        if kind == "header":
+            return f"\n{'='*60}\n  {request}{message}\n{'='*60}"
+        if kind == "section":
+            return f"\n{'-'*40}\n  {request}{message}\n{'-'*40}"
+        if kind == "timer":
+            return f"\n⏱️  {request}{message}"
+        timestamp = datetime.fromtimestamp(record.created).strftime("%H:%M:%S")
+        return f"[{timestamp}] {request}{ICONS.get(kind, '')}{message}"
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the request context merged in"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "kind": getattr(record, "kind", "info"),
+            "message": record.getMessage(),
+            **getattr(record, "context", {}),
+        }
+        return json.dumps(entry, ensure_ascii=False, default=str)
 
 class Logger:
+    """Leveled logger; records go through a queue and are written by a background listener thread"""
+
     def __init__(self):
-        self.start_time = None
-        self.section_count = 0
-    
+        self.sample_rate = Config.LOG_SAMPLE_RATE
+        self._logger = logging.getLogger("humana_agent")
+        self._logger.setLevel(Config.LOG_LEVEL.upper())
+        self._logger.propagate = False
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter() if Config.LOG_FORMAT == "json" else TextFormatter())
+        log_queue = queue.SimpleQueue()
+        self._logger.handlers = [QueueHandler(log_queue)]
+        self._listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.close)
+
+    def close(self):
+        """Write out queued records and stop the listener thread"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _log(self, level: int, kind: str, message, sample: bool = False, exc_info=None):
+        if not self._logger.isEnabledFor(level):
+            return
+        # High-volume messages can be thinned out with LOG_SAMPLE_RATE
+        if sample and random.random() >= self.sample_rate:
+            return
+        self._logger.log(level, message, exc_info=exc_info, extra={"kind": kind, "context": _context.get()})
+
+    def bind(self, **fields):
+        """Attach fields (e.g. request_id) to every message logged from the current task"""
+        _context.set({**_context.get(), **fields})
+
     def header(self, message):
         """Print a header message with formatting"""
-        print(f"\n{'='*60}")
-        print(f"  {message}")
-        print(f"{'='*60}")
-    
+        self._log(logging.INFO, "header", message)
+
     def section(self, message):
         """Print a section message with formatting"""
-        self.section_count += 1
-        print(f"\n{'-'*40}")
-        print(f"  {self.section_count}. {message}")
-        print(f"{'-'*40}")
-    
-    def progress(self, message):
+        count = _section_count.get() + 1
+        _section_count.set(count)
+        self._log(logging.INFO, "section", f"{count}. {message}")
+
+    def debug(self, message, sample: bool = False):
+        self._log(logging.DEBUG, "debug", message, sample)
+
+    def progress(self, message, sample: bool = False):
         """Print a progress message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] 🔄 {message}")
-    
+        self._log(logging.INFO, "progress", message, sample)
+
+    def info(self, message, sample: bool = False):
+        """Print an info message"""
+        self._log(logging.INFO, "info", message, sample)
+
     def success(self, message):
         """Print a success message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] ✅ {message}")
-    
-    def error(self, message):
+        self._log(SUCCESS, "success", message)
+
+    def warning(self, message):
+        self._log(logging.WARNING, "warning", message)
+
+    def error(self, message, exc_info=None):
         """Print an error message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] ❌ {message}")
-    
-    def info(self, message):
-        """Print an info message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] ℹ️  {message}")
-    
+        self._log(logging.ERROR, "error", message, exc_info=exc_info)
+
     def start_timer(self):
-        """Start the timer"""
-        self.start_time = time.time()
-        print(f"\n⏱️  Timer started at {datetime.now().strftime('%H:%M:%S')}")
-    
+        """Start the current request's timer"""
+        _timer_start.set(time.time())
+        self._log(logging.INFO, "timer", f"Timer started at {datetime.now().strftime('%H:%M:%S')}")
+
     def end_timer(self):
-        """End the timer and display elapsed time"""
-        if self.start_time:
-            elapsed = time.time() - self.start_time
-            minutes = int(elapsed // 60)
-            seconds = int(elapsed % 60)
-            print(f"\n⏱️  Total execution time: {minutes}m {seconds}s")
-        else:
-            print("\n⏱️  Timer was not started")
+        """End the current request's timer and display elapsed time"""
+        start_time = _timer_start.get()
+        if start_time is None:
+            self._log(logging.INFO, "timer", "Timer was not started")
+            return
+        elapsed = time.time() - start_time
+        minutes = int(elapsed // 60)
+        seconds = int(elapsed % 60)
+        _timer_start.set(None)
+        self._log(logging.INFO, "timer", f"Total execution time: {minutes}m {seconds}s")
 
 # Create a global logger instance
 logger = Logger()
@@ -0,0 +1,134 @@
+"""Side-by-side latency benchmark of the agent profiles.
+
+Runs the form filling or tracker agent once per profile and repetition and reports
+steps, LLM tokens and wall-clock time per profile. It talks to the configured portal
+and Azure OpenAI deployment, so form runs submit real PA requests: point HUMANA_LINK
+at a test portal. Use an already approved PA ID for the tracker.
+
+    python -m benchmarks.agent_profiles --kind tracker --tracking-id PA-130810002 --runs 3
+    python -m benchmarks.agent_profiles --kind form --data form_data.json --profiles fast,balanced
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from app.schemas.tracker_agent import TrackerAgentRequest
+from app.services import tracker_agent
+from app.services.agent_profiles import AGENT_PROFILES
+from app.services.browser_pool import browser_pool
+from app.services.dataverse_form_data_service import DataverseFormDataService
+from app.services.job_scheduler import job_scheduler
+from app.services.form_filling_agent import run_humana_form_filling_agent
+from app.utils.agent_tracker import agent_tracker
+from app.utils.config import Config
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def _run_once(kind: str, profile: str, data: dict | None, tracking_id: str | None, agent_only: bool) -> dict:
+    request_id = f"bench-{uuid.uuid4().hex[:8]}"
+    agent_tracker.create_request_file(request_id)
+    started = time.perf_counter()
+    try:
+        if kind == "form":
+            result = await run_humana_form_filling_agent(dict(data), request_id, profile)
+        else:
+            request = TrackerAgentRequest(custom_tracking_id=tracking_id, custom_interval=5, agent_profile=profile)
+            if agent_only:
+                result = await tracker_agent.run_tracker_agent(request_id, request)
+            else:
+                result = await tracker_agent.track_pa_request(request_id, request)
+        error = None
+    except Exception as e:
+        result, error = None, str(e)
+    finally:
+        agent_tracker.finish_request(request_id)
+    result = result or {}
+    return {
+        "seconds": time.perf_counter() - started,
+        "steps": result.get("steps"),
+        "tokens": result.get("tokens"),
+        "by": result.get("submitted_by") or result.get("checked_by"),
+        "error": error,
+    }
+
+def summarize(profile: str, runs: list[dict]) -> dict:
+    ok = [run for run in runs if not run["error"]]
+    seconds = [run["seconds"] for run in ok]
+    steps = [run["steps"] for run in ok if run["steps"] is not None]
+    tokens = [run["tokens"] for run in ok if run["tokens"] is not None]
+    return {
+        "profile": profile,
+        "runs": len(runs),
+        "ok": len(ok),
+        "p50_s": round(statistics.median(seconds), 1) if seconds else None,
+        "p95_s": round(percentile(seconds, 95), 1) if seconds else None,
+        "mean_steps": round(statistics.mean(steps), 1) if steps else None,
+        "mean_tokens": round(statistics.mean(tokens)) if tokens else None,
+    }
+
+def print_table(rows: list[dict], columns: list[str] | None = None):
+    columns = columns or ["profile", "runs", "ok", "p50_s", "p95_s", "mean_steps", "mean_tokens"]
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(widths[column]) for column in columns))
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kind", choices=("form", "tracker"), default="tracker")
+    parser.add_argument("--profiles", default=",".join(AGENT_PROFILES), help="Comma-separated profile names")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per profile")
+    parser.add_argument("--account-id", default=None, help="Dataverse account to fill the form for")
+    parser.add_argument("--data", default=None, help="JSON file with form data instead of a Dataverse fetch")
+    parser.add_argument("--tracking-id", default=None, help="PA ID for the tracker (already approved)")
+    parser.add_argument("--agent-only", action="store_true",
+                        help="Skip the tracker's scripted polling so every run goes through the agent")
+    parser.add_argument("--output", default=None, help="Also write per-run results as JSON")
+    args = parser.parse_args()
+
+    profiles = [name.strip() for name in args.profiles.split(",") if name.strip()]
+    unknown = [name for name in profiles if name not in AGENT_PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+
+    data = None
+    if args.kind == "form":
+        if args.data:
+            with open(args.data, encoding="utf-8") as f:
+                data = json.load(f)
+        else:
+            data = await DataverseFormDataService().fetch_form_data_by_account_id(
+                args.account_id or Config.TARGET_ACCOUNT_ID
+            )
+        if not data:
+            parser.error("no form data")
+
+    await browser_pool.start()
+    # Scripted tracker checks are queued on the scheduler like in the API
+    job_scheduler.start()
+    results = {}
+    try:
+        # Interleave the profiles so portal and model latency drift hits them all alike
+        for repetition in range(args.runs):
+            for profile in profiles:
+                run = await _run_once(args.kind, profile, data, args.tracking_id, args.agent_only)
+                results.setdefault(profile, []).append(run)
+                print(f"[{repetition + 1}/{args.runs}] {profile}: {run['seconds']:.1f}s, "
+                      f"{run['steps']} steps, {run['tokens']} tokens{' - ' + run['error'] if run['error'] else ''}")
+    finally:
+        await job_scheduler.stop()
+        await browser_pool.close()
+        agent_tracker.close()
+
+    print()
+    print_table([summarize(profile, results[profile]) for profile in profiles])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""Mock Dataverse Web API and Azure AD token endpoint on an httpx MockTransport.
+
+install() swaps the transport of the shared Dataverse HTTP client, so the real
+DataverseFormDataService code (single fetch and OData $batch) runs unchanged.
+"""
+import asyncio
+import json
+import re
+import uuid
+import httpx
+from app.services import dataverse_client
+
+_ACCOUNT_RE = re.compile(r"\baccounts\(([^)]+)\)")
+
+def account_record(account_id: str) -> dict:
+    """Deterministic account with one contact, shaped like the expanded Dataverse entity"""
+    return {
+        "@odata.etag": 'W/"1"',
+        "accountid": account_id,
+        "accountnumber": "HMA-45893-2",
+        "name": "Ronald Davidson",
+        "telephone1": "5615557689",
+        "address1_country": "USA",
+        "address1_postalcode": "40202",
+        "contact_customer_accounts": [{
+            "@odata.etag": 'W/"1"',
+            "firstname": "Suzie",
+            "lastname": "Smith",
+            "birthdate": "1959-01-03",
+            "address1_country": "USA",
+            "address1_postalcode": "40202",
+        }],
+    }
+
+def _batch_response(request: httpx.Request) -> httpx.Response:
+    boundary = f"batchresponse_{uuid.uuid4()}"
+    parts = []
+    for account_id in _ACCOUNT_RE.findall(request.content.decode("utf-8")):
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-Transfer-Encoding: binary\r\n\r\n"
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/json; odata.metadata=minimal\r\n\r\n"
+            f"{json.dumps(account_record(account_id))}\r\n"
+        )
+    body = "".join(parts) + f"--{boundary}--\r\n"
+    return httpx.Response(200, headers={"Content-Type": f"multipart/mixed; boundary={boundary}"}, text=body)
+
+class MockDataverse:
+    """Answers token, account and $batch requests after a configurable latency"""
+
+    def __init__(self, latency_ms: int = 0):
+        self.latency = latency_ms / 1000
+        self.requests = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if request.url.host == "login.microsoftonline.com":
+            return httpx.Response(200, json={"access_token": "mock-token", "expires_in": 3600})
+        if request.url.path.endswith("/$batch"):
+            return _batch_response(request)
+        match = _ACCOUNT_RE.search(request.url.path)
+        if request.method == "GET" and match:
+            return httpx.Response(200, json=account_record(match.group(1)))
+        return httpx.Response(404, json={"error": {"message": f"No mock for {request.method} {request.url}"}})
+
+    def install(self):
+        """Route the shared Dataverse HTTP client through this mock"""
+        dataverse_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
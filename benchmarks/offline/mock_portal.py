@@ -0,0 +1,268 @@
+"""Local stand-in for the Humana provider portal.
+
+Serves the pages the agents walk through: login, dashboard, the Prior Authorization
+table, the four-step Add PA Request form with a file upload, and the success screen.
+Every response is delayed by a configurable latency to model the real portal.
+"""
+import html
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# (step title, [(input name, label, payload section, payload field, kind)])
+# Input names stay under 15 characters, browser-use truncates longer attribute values
+FORM_STEPS = [
+    ("Member Information", [
+        ("member_id", "Member ID", "Member", "ID_Number", "text"),
+        ("first_name", "First Name", "Member", "First_Name", "text"),
+        ("last_name", "Last Name", "Member", "Last_Name", "text"),
+        ("dob", "Date of Birth", "Member", "Date_of_Birth", "text"),
+        ("country", "Country", "Member", "Country", "text"),
+        ("postal_code", "Postal Code", "Member", "Postal_Code", "text"),
+    ]),
+    ("Diagnosis", [
+        ("icd10", "ICD-10 Code", "Diagnosis", "ICD10_Code", "text"),
+        ("rationale", "Clinical Rationale", "Diagnosis", "Clinical_Rationale", "textarea"),
+        ("therapies", "Previous Therapies Tried and Failed", "Diagnosis", "Previous_Therapies_Tried_and_Failed", "textarea"),
+    ]),
+    ("Service", [
+        ("cpt_code", "CPT Code", "Service", "CPT_Code", "text"),
+        ("description", "Description", "Service", "Description", "text"),
+        ("place", "Place of Service", "Service", "Place_of_Service", ("Outpatient", "Inpatient", "Office")),
+        ("start_date", "Requested Start Date", "Service", "Requested_Start_Date", "text"),
+        ("duration", "Duration in Days", "Service", "Duration_in_Days", "text"),
+        ("priority", "Priority", "Service", "Priority", ("Routine", "Urgent")),
+    ]),
+    ("Provider and Attachments", [
+        ("provider_name", "Provider Name", "Provider", "Name", "text"),
+        ("npi", "NPI Number", "Provider", "NPI_Number", "text"),
+        ("phone", "Phone Number", "Provider", "Phone_Number", "text"),
+    ]),
+]
+
+SEED_REQUESTS = 20
+FINAL_STATUS = "Approved"
+PENDING_STATUS = "Pending Review"
+
+_PAGE = """<!doctype html>
+<html><head><title>{title} - Humana Provider Portal</title>
+<style>body{{font-family:sans-serif;margin:16px}} label{{display:block;margin-top:6px}}
+input,select,textarea{{width:320px}} td,th{{padding:2px 8px;text-align:left}}</style></head>
+<body>{nav}<h1>{title}</h1>{body}</body></html>"""
+
+_UPLOAD_JS = """
+<script>
+document.getElementById('attachments').addEventListener('change', async (event) => {
+    const data = new FormData();
+    for (const file of event.target.files) data.append('attachments', file);
+    await fetch('/upload', {method: 'POST', body: data});
+    const list = document.getElementById('uploaded');
+    for (const file of event.target.files) {
+        const item = document.createElement('li');
+        item.textContent = file.name;
+        list.appendChild(item);
+    }
+});
+</script>
+"""
+
+class PortalState:
+    """PA requests, sessions and form drafts of the mock portal"""
+
+    def __init__(self, username: str, password: str, approve_after: int = 0):
+        self.username = username
+        self.password = password
+        # Status checks a request needs before it is approved (0 = approved at once)
+        self.approve_after = approve_after
+        self.lock = threading.Lock()
+        self.sessions: dict[str, dict] = {}
+        self.requests: dict[str, dict] = {}
+        self.submitted = 0
+        self.uploads = 0
+        # Even seeded requests are approved already, odd ones after approve_after checks
+        for number in range(SEED_REQUESTS):
+            self._add_request(f"PA-{100000 + number}", "Seed Member", views=approve_after if number % 2 == 0 else 0)
+
+    def _add_request(self, pa_id: str, member: str, views: int = 0):
+        self.requests[pa_id] = {"member": member, "submitted": time.strftime("%d/%m/%Y"), "views": views}
+
+    def status(self, pa_id: str) -> str:
+        return FINAL_STATUS if self.requests[pa_id]["views"] >= self.approve_after else PENDING_STATUS
+
+    def submit(self, draft: dict) -> str:
+        with self.lock:
+            pa_id = f"PA-{200000 + self.submitted}"
+            self.submitted += 1
+            self._add_request(pa_id, f"{draft.get('first_name', '')} {draft.get('last_name', '')}".strip())
+            return pa_id
+
+class PortalHandler(BaseHTTPRequestHandler):
+    server_version = "MockHumanaPortal/1.0"
+
+    @property
+    def state(self) -> PortalState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _session(self) -> dict | None:
+        for cookie in self.headers.get("Cookie", "").split(";"):
+            name, _, value = cookie.strip().partition("=")
+            if name == "session" and value in self.state.sessions:
+                return self.state.sessions[value]
+        return None
+
+    def _send(self, status: int, body: str = "", headers: dict | None = None, content_type: str = "text/html"):
+        time.sleep(self.server.latency)
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _redirect(self, location: str, headers: dict | None = None):
+        self._send(303, headers={"Location": location, **(headers or {})})
+
+    def _page(self, title: str, body: str, nav: bool = True):
+        links = ('<nav><a href="/dashboard">Home</a> | <a href="/pa">Prior Authorization</a> | '
+                 '<a href="/logout">Log out</a></nav>') if nav else ""
+        self._send(200, _PAGE.format(title=html.escape(title), nav=links, body=body))
+
+    def _read_form(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        return {key: values[-1] for key, values in parse_qs(body).items()}
+
+    # Pages
+
+    def _login_page(self, error: str = ""):
+        self._page("Log in", f"""
+            <p>{html.escape(error)}</p>
+            <form method="post" action="/login">
+              <label>Username <input type="text" name="username"></label>
+              <label>Password <input type="password" name="password"></label>
+              <button type="submit">Log in</button>
+            </form>""", nav=False)
+
+    def _pa_table(self):
+        rows = []
+        with self.state.lock:
+            for pa_id, request in self.state.requests.items():
+                status = self.state.status(pa_id)
+                request["views"] += 1
+                rows.append(f"<tr><td>{pa_id}</td><td>{html.escape(request['member'])}</td>"
+                            f"<td>{request['submitted']}</td><td>{status}</td></tr>")
+        self._page("Prior Authorization", f"""
+            <button type="button" onclick="location.href='/pa/new/1'">Add PA Request</button>
+            <table><thead><tr><th>Request ID</th><th>Member</th><th>Submitted</th><th>Status</th></tr></thead>
+            <tbody>{''.join(rows)}</tbody></table>""")
+
+    def _form_step(self, step: int):
+        title, fields = FORM_STEPS[step - 1]
+        inputs = []
+        for name, label, _section, _field, kind in fields:
+            if kind == "textarea":
+                control = f'<textarea name="{name}" rows="2"></textarea>'
+            elif isinstance(kind, tuple):
+                options = "".join(f"<option>{option}</option>" for option in kind)
+                control = f'<select name="{name}"><option value="">Select...</option>{options}</select>'
+            else:
+                control = f'<input type="text" name="{name}">'
+            inputs.append(f"<label>{label} {control}</label>")
+        last = step == len(FORM_STEPS)
+        extra = ""
+        if last:
+            extra = ('<label>Upload Files <input type="file" id="attachments" name="attachments" multiple></label>'
+                     '<ul id="uploaded"></ul>')
+        button = "Submit" if last else "Next"
+        self._page(f"Add PA Request - Step {step} of {len(FORM_STEPS)}: {title}", f"""
+            <form method="post" action="/pa/new/{step}">
+              {''.join(inputs)}{extra}
+              <button type="submit">{button}</button>
+            </form>{_UPLOAD_JS if last else ''}""")
+
+    # Routing
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        session = self._session()
+        if path in ("/", "/login"):
+            return self._redirect("/dashboard") if session else self._login_page()
+        if session is None:
+            return self._redirect("/login")
+        if path == "/logout":
+            return self._redirect("/login", {"Set-Cookie": "session=; Max-Age=0; Path=/"})
+        if path == "/dashboard":
+            return self._page("Dashboard", "<p>Welcome to the provider portal.</p>")
+        if path == "/pa":
+            return self._pa_table()
+        if path.startswith("/pa/new/"):
+            step = int(path.rsplit("/", 1)[1])
+            if 1 <= step <= len(FORM_STEPS):
+                return self._form_step(step)
+        if path.startswith("/pa/success/"):
+            pa_id = html.escape(path.rsplit("/", 1)[1])
+            return self._page("Request Submitted", f"""
+                <p>Your PA request {pa_id} was successfully submitted.</p>
+                <p>Request ID: {pa_id}</p><p>Status: {PENDING_STATUS}</p>""")
+        self._send(404, "Not found", content_type="text/plain")
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == "/login":
+            form = self._read_form()
+            if form.get("username") != self.state.username or form.get("password") != self.state.password:
+                return self._login_page("Invalid username or password")
+            token = secrets.token_hex(16)
+            self.state.sessions[token] = {"draft": {}}
+            return self._redirect("/dashboard", {"Set-Cookie": f"session={token}; Path=/; HttpOnly"})
+
+        session = self._session()
+        if session is None:
+            return self._redirect("/login")
+        if path == "/upload":
+            # The files themselves are not kept, only the round trip matters
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            with self.state.lock:
+                self.state.uploads += 1
+            return self._send(200, '{"ok": true}', content_type="application/json")
+        if path.startswith("/pa/new/"):
+            step = int(path.rsplit("/", 1)[1])
+            session["draft"].update(self._read_form())
+            if step < len(FORM_STEPS):
+                return self._redirect(f"/pa/new/{step + 1}")
+            pa_id = self.state.submit(session["draft"])
+            session["draft"] = {}
+            return self._redirect(f"/pa/success/{pa_id}")
+        self._send(404, "Not found", content_type="text/plain")
+
+class MockPortal:
+    """Threaded HTTP server running the mock portal on a local port"""
+
+    def __init__(self, username: str, password: str, latency_ms: int = 0, approve_after: int = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.state = PortalState(username, password, approve_after)
+        self.server = ThreadingHTTPServer((host, port), PortalHandler)
+        self.server.daemon_threads = True
+        self.server.state = self.state
+        self.server.latency = latency_ms / 1000
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-portal", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,258 @@
+"""Offline end-to-end throughput benchmark of the form filling and tracker agents.
+
+Runs the real background tasks (Dataverse fetch, portal session, browser pool and
+the browser-use agent) against a local mock portal, a scripted LLM in place of
+ChatAzureOpenAI and a mock Dataverse, so it needs neither the portal nor Azure.
+Each concurrency level runs the same number of submissions; the report gives
+p50/p95 per phase and submissions per minute, and the highest rate whose error
+rate stays under --max-error-rate.
+
+    python -m benchmarks.offline.run --kind form --submissions 20 --concurrency 1,2,4
+    python -m benchmarks.offline.run --kind tracker --agent-only --approve-after 2 --llm-latency 800
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from functools import partial
+from pathlib import Path
+from benchmarks.offline.mock_portal import MockPortal
+from benchmarks.offline.scripted_llm import ScriptedLLM
+
+USERNAME = "bench-user"
+PASSWORD = "bench-pass"
+
+# Timed spans inside a run: (phase, start action, end action prefixes)
+SPANS = [
+    ("session", "🔐 Restoring portal session", ("🔐 Portal session restored", "🔐 No portal session")),
+    ("browser_agent", "🤖 Starting browser-use agent", ("✅ Browser agent completed",)),
+]
+
+def _configure_environment(args, workdir: Path, portal_url: str):
+    """Point every external dependency and state directory of the app at the mocks.
+
+    Config reads the environment at import time, so this runs before any app import.
+    """
+    pdf_dir = workdir / "pdfs"
+    pdf_dir.mkdir()
+    (pdf_dir / "referral.pdf").write_bytes(b"%PDF-1.4\n% offline benchmark attachment\n%%EOF\n")
+    os.environ.update({
+        "HUMANA_LINK": portal_url,
+        "HUMANA_USERNAME": USERNAME,
+        "HUMANA_PASSWORD": PASSWORD,
+        "CLIENT_ID": "mock-client",
+        "CLIENT_SECRET": "mock-secret",
+        "TENANT_ID": "mock-tenant",
+        "DATAVERSE_URL": "https://mock.crm.dynamics.com",
+        "TARGET_ACCOUNT_ID": str(uuid.uuid4()),
+        "DATAVERSE_MIRROR_ENABLED": "false",
+        "HEADLESS_MODE": "true",
+        "AGENT_WORKER_MODE": "false",
+        "FORM_REPLAY_ENABLED": "true" if args.replay else "false",
+        "LLM_CACHE_ENABLED": "true" if args.llm_cache else "false",
+        "LLM_CACHE_PATH": str(workdir / "llm_cache.db"),
+        "BROWSER_POOL_MIN_SIZE": "1",
+        "BROWSER_POOL_MAX_SIZE": str(max(args.concurrency)),
+        "SCHEDULER_MAX_CONCURRENCY": str(max(args.concurrency)),
+        "SCHEDULER_TRACKER_SLOTS": str(max(args.concurrency)),
+        "PDF_PATH": str(pdf_dir),
+        "DOWNLOAD_PATH": str(workdir / "downloads"),
+        "ATTACHMENT_DIR": str(workdir / "attachments"),
+        "FORM_REPLAY_DIR": str(workdir / "replays"),
+        "PORTAL_SESSION_DIR": str(workdir / "sessions"),
+        "TRACK_DIR": str(workdir / "track"),
+        "JOB_STORE_PATH": str(workdir / "jobs.db"),
+    })
+
+class PhaseRecorder:
+    """Agent tracker listener collecting phase durations and step counts per request"""
+
+    def __init__(self):
+        self.runs: dict[str, dict] = {}
+        self._open: dict[tuple[str, str], float] = {}
+
+    def __call__(self, record: dict):
+        request_id, action = record["request_id"], record["action"]
+        run = self.runs.setdefault(request_id, {"phases": {}, "steps": 0})
+        if action.startswith("⏱️ Phase") and record["duration"] is not None:
+            run["phases"][record["phase"]] = record["duration"]
+        elif action == "request_finished" and record["duration"] is not None:
+            run["phases"]["total"] = record["duration"]
+        elif action.startswith("👣 Step"):
+            run["steps"] += 1
+        for name, start, ends in SPANS:
+            if action.startswith(start):
+                self._open[(request_id, name)] = time.monotonic()
+            elif action.startswith(ends) and (request_id, name) in self._open:
+                run["phases"][name] = time.monotonic() - self._open.pop((request_id, name))
+
+async def _submit(kind: str, args, index: int) -> str:
+    """Set a request up like its endpoint does and run its background task to the end"""
+    from app.api.form_submission_endpoints import process_form_submission_background
+    from app.api.tracker_agent_endpoints import process_tracker_agent_background
+    from app.schemas.form_submission import FormSubmissionRequest
+    from app.schemas.tracker_agent import TrackerAgentRequest
+    from starlette.datastructures import UploadFile
+    from app.services.attachment_store import attachment_store
+    from app.services.job_store import job_store
+    from app.utils.agent_tracker import agent_tracker
+    from app.utils.config import Config
+
+    request_id = f"bench-{uuid.uuid4().hex[:8]}"
+    agent_tracker.create_request_file(request_id)
+    if kind == "form":
+        custom_data = FormSubmissionRequest.model_config["json_schema_extra"]["examples"][0]["custom_data"]
+        request = FormSubmissionRequest(custom_data=custom_data, agent_profile=args.profile)
+        await job_store.create(request_id, "form", account_id=Config.TARGET_ACCOUNT_ID)
+        # Submissions attach nothing by default, so upload the referral like a client would
+        with open(Path(os.environ["PDF_PATH"]) / "referral.pdf", "rb") as source:
+            await attachment_store.create_manifest(request_id, [UploadFile(source, filename="referral.pdf")])
+        await process_form_submission_background(request, request_id)
+    else:
+        # The first ten seeded requests, they fit in the viewport of every profile
+        tracking_id = f"PA-{100000 + index % 10}"
+        request = TrackerAgentRequest(custom_tracking_id=tracking_id, custom_interval=args.interval,
+                                      agent_profile=args.profile)
+        await job_store.create(request_id, "tracker", pa_id=tracking_id)
+        await process_tracker_agent_background(request, request_id)
+    return request_id
+
+async def run_level(kind: str, args, concurrency: int, recorder: PhaseRecorder) -> dict:
+    """Run args.submissions requests with at most `concurrency` in flight"""
+    from app.services.job_store import job_store
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> str:
+        async with semaphore:
+            return await _submit(kind, args, index)
+
+    started = time.perf_counter()
+    request_ids = await asyncio.gather(*[one(index) for index in range(args.submissions)])
+    wall = time.perf_counter() - started
+    jobs = [await job_store.get(request_id) for request_id in request_ids]
+    errors = [job.get("error") for job in jobs if job["state"] != "completed"]
+    return {
+        "concurrency": concurrency,
+        "submissions": args.submissions,
+        "ok": args.submissions - len(errors),
+        "errors": errors,
+        "wall_s": wall,
+        "per_min": (args.submissions - len(errors)) / wall * 60,
+        "runs": [recorder.runs.get(request_id, {"phases": {}, "steps": 0}) for request_id in request_ids],
+    }
+
+def phase_table(level: dict) -> list[dict]:
+    from benchmarks.agent_profiles import percentile
+
+    durations: dict[str, list[float]] = {}
+    for run in level["runs"]:
+        for phase, seconds in run["phases"].items():
+            durations.setdefault(phase, []).append(seconds)
+    return [{
+        "phase": phase,
+        "n": len(values),
+        "p50_s": round(statistics.median(values), 2),
+        "p95_s": round(percentile(values, 95), 2),
+    } for phase, values in durations.items()]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kind", choices=("form", "tracker"), default="form")
+    parser.add_argument("--submissions", type=int, default=10, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma-separated concurrency levels")
+    parser.add_argument("--profile", default=None, help="Agent profile, defaults to the run type's default")
+    parser.add_argument("--portal-latency", type=int, default=100, help="Mock portal response delay in ms")
+    parser.add_argument("--llm-latency", type=int, default=1500, help="Scripted LLM think time per call in ms")
+    parser.add_argument("--dataverse-latency", type=int, default=150, help="Mock Dataverse response delay in ms")
+    parser.add_argument("--approve-after", type=int, default=0,
+                        help="Status checks before a tracked request turns Approved")
+    parser.add_argument("--interval", type=int, default=1, help="Tracker check interval in seconds")
+    parser.add_argument("--agent-only", action="store_true",
+                        help="Skip the tracker's scripted polling so every run goes through the agent")
+    parser.add_argument("--replay", action="store_true", help="Enable form replay (FORM_REPLAY_ENABLED)")
+    parser.add_argument("--llm-cache", action="store_true", help="Enable the LLM response cache (LLM_CACHE_ENABLED)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs before the first level")
+    parser.add_argument("--max-error-rate", type=float, default=0.05,
+                        help="Highest error rate a level may have to count as sustainable")
+    parser.add_argument("--output", default=None, help="Also write the per-level results as JSON")
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    workdir = Path(tempfile.mkdtemp(prefix="pa-offline-bench-"))
+    portal = MockPortal(USERNAME, PASSWORD, args.portal_latency, args.approve_after)
+    portal.start()
+    _configure_environment(args, workdir, portal.url)
+
+    # App modules are imported only now, after the environment points at the mocks
+    from app.services import llm, tracker_agent
+    from app.services.browser_pool import browser_pool
+    from app.services.dataverse_client import close_http_client
+    from app.services.job_scheduler import job_scheduler
+    from app.services.llm_cache import llm_cache
+    from app.utils.agent_tracker import agent_tracker
+    from benchmarks.agent_profiles import print_table
+    from benchmarks.offline.mock_dataverse import MockDataverse
+
+    llm.ChatAzureOpenAI = partial(ScriptedLLM, portal_url=portal.url, username=USERNAME,
+                                  password=PASSWORD, latency_ms=args.llm_latency)
+    dataverse = MockDataverse(args.dataverse_latency)
+    dataverse.install()
+    if args.agent_only:
+        async def no_scripted_polling(*_args, **_kwargs):
+            return None
+        tracker_agent.poll_pa_status = no_scripted_polling
+    recorder = PhaseRecorder()
+    agent_tracker.add_listener(recorder)
+
+    await browser_pool.start()
+    # Tracker status checks are queued on the scheduler like in the API
+    job_scheduler.start()
+    levels = []
+    try:
+        for index in range(args.warmup):
+            await _submit(args.kind, args, index)
+        for concurrency in args.concurrency:
+            level = await run_level(args.kind, args, concurrency, recorder)
+            levels.append(level)
+            print(f"concurrency {concurrency}: {level['ok']}/{level['submissions']} ok in "
+                  f"{level['wall_s']:.1f}s, {level['per_min']:.1f} submissions/min")
+            for error in sorted(set(filter(None, level["errors"]))):
+                print(f"  error: {error}")
+    finally:
+        await job_scheduler.stop()
+        await browser_pool.close()
+        await close_http_client()
+        agent_tracker.close()
+        portal.stop()
+
+    for level in levels:
+        steps = [run["steps"] for run in level["runs"] if run["steps"]]
+        print(f"\nconcurrency {level['concurrency']} ({level['per_min']:.1f}/min, "
+              f"mean agent steps {round(statistics.mean(steps), 1) if steps else 0})")
+        print_table(phase_table(level), ["phase", "n", "p50_s", "p95_s"])
+
+    sustainable = [level for level in levels
+                   if (level["submissions"] - level["ok"]) / level["submissions"] <= args.max_error_rate]
+    print()
+    if sustainable:
+        best = max(sustainable, key=lambda level: level["per_min"])
+        print(f"Max sustainable rate: {best['per_min']:.1f} submissions/min at concurrency {best['concurrency']}")
+    else:
+        print(f"No concurrency level stayed under {args.max_error_rate:.0%} errors")
+    print(f"Mock portal: {portal.state.submitted} submitted, {portal.state.uploads} uploads; "
+          f"mock Dataverse: {dataverse.requests} requests")
+    if args.llm_cache:
+        print(f"LLM cache: {llm_cache.hits} hits, {llm_cache.misses} misses")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([{key: value for key, value in level.items() if key != "runs"} | {"phases": phase_table(level)}
+                       for level in levels], f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
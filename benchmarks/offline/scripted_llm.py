@@ -0,0 +1,215 @@
+"""Deterministic stand-in for ChatAzureOpenAI that drives the agents through the mock portal.
+
+It reads the same state message the real model gets (task, current URL and the
+interactive elements) and answers with the actions a well-behaved model would
+take on each mock portal page. No network calls, only a configurable think time.
+"""
+import asyncio
+import json
+import re
+from urllib.parse import urlparse
+from browser_use.llm.views import ChatInvokeCompletion, ChatInvokeUsage
+from benchmarks.offline.mock_portal import FORM_STEPS, FINAL_STATUS
+
+_ELEMENT_RE = re.compile(r"^\s*\*?\[(\d+)\]<(\w+)(.*) />$")
+_ATTRIBUTE_RE = re.compile(r"([\w-]+)=(\S+)")
+_TAB_RE = re.compile(r"^Tab \w+: (\S+) - ", re.MULTILINE)
+
+# Input name -> (payload section, payload field, kind)
+_FIELDS = {name: (section, field, kind) for _title, fields in FORM_STEPS
+           for name, _label, section, field, kind in fields}
+
+def _message_text(message) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "\n".join(part.text for part in content or [] if getattr(part, "text", None))
+
+def _between(text: str, start: str, end: str) -> str:
+    _, _, rest = text.partition(start)
+    return rest.partition(end)[0]
+
+def parse_elements(state: str) -> tuple[list[dict], list[str]]:
+    """Interactive elements ({index, tag, attributes, text}) and plain text lines of the page"""
+    elements, lines = [], []
+    for line in state.splitlines():
+        match = _ELEMENT_RE.match(line)
+        if not match:
+            if line.strip():
+                lines.append(line.strip())
+            continue
+        index, tag, rest = match.groups()
+        attributes, _, text = rest.partition(">")
+        elements.append({
+            "index": int(index),
+            "tag": tag,
+            "attributes": dict(_ATTRIBUTE_RE.findall(attributes)),
+            "text": text.strip(),
+        })
+    return elements, lines
+
+class ScriptedLLM:
+    """Chat model with the browser-use interface whose replies follow a fixed page policy"""
+
+    def __init__(self, model: str, portal_url: str, username: str = "", password: str = "",
+                 latency_ms: int = 0, actions_per_reply: int = 4):
+        self.model = model
+        self.portal_url = portal_url
+        self.username = username
+        self.password = password
+        self.latency = latency_ms / 1000
+        # Stay below every profile's max_actions_per_step, the agent drops the rest silently
+        self.actions_per_reply = actions_per_reply
+        self.calls = 0
+        # (page path, input name) already typed into, the DOM does not show typed values
+        self._done: set[tuple[str, str]] = set()
+
+    @property
+    def provider(self) -> str:
+        return "scripted"
+
+    @property
+    def name(self) -> str:
+        return "scripted"
+
+    @property
+    def model_name(self) -> str:
+        return self.model
+
+    async def ainvoke(self, messages, output_format=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        prompt = "\n".join(_message_text(message) for message in messages)
+        state = _message_text(messages[-1])
+        goal, actions = self._decide(state)
+        reply = {
+            "thinking": goal,
+            "evaluation_previous_goal": "Success",
+            "memory": goal,
+            "next_goal": goal,
+            "action": actions,
+        }
+        if output_format is None:
+            completion = json.dumps(reply)
+        else:
+            completion = output_format.model_validate(
+                {key: value for key, value in reply.items() if key in output_format.model_fields}
+            )
+        completion_text = json.dumps(reply)
+        usage = ChatInvokeUsage(
+            prompt_tokens=len(prompt) // 4,
+            prompt_cached_tokens=None,
+            prompt_cache_creation_tokens=None,
+            prompt_image_tokens=None,
+            completion_tokens=len(completion_text) // 4,
+            total_tokens=(len(prompt) + len(completion_text)) // 4,
+        )
+        return ChatInvokeCompletion(completion=completion, usage=usage)
+
+    # Page policy
+
+    def _decide(self, state: str) -> tuple[str, list[dict]]:
+        task = _between(state, "<user_request>", "</user_request>")
+        tab = _TAB_RE.search(state)
+        url = tab.group(1) if tab else ""
+        path = urlparse(url).path
+        elements, lines = parse_elements(_between(state, "<browser_state>", "</browser_state>"))
+
+        def find(tag: str, text: str | None = None, **attributes) -> dict | None:
+            for element in elements:
+                if element["tag"] != tag:
+                    continue
+                if text is not None and text.lower() not in element["text"].lower():
+                    continue
+                if all(element["attributes"].get(key) == value for key, value in attributes.items()):
+                    return element
+            return None
+
+        if find("input", type="password"):
+            return "Log in to the portal", self._login(task, find)
+        if "form-filling" in task:
+            if path.startswith("/pa/success/"):
+                pa_id = path.rsplit("/", 1)[1]
+                return "Report the submission", [{"done": {"text": f"PA request {pa_id} successfully submitted", "success": True}}]
+            if path.startswith("/pa/new/"):
+                return "Fill the form step", self._form_step(task, path, find)
+            if path == "/pa":
+                return "Open a new PA request", self._click(find("button", "Add PA Request"))
+        elif "Tracker Agent" in task:
+            if path == "/pa":
+                return "Check the request status", self._check_status(task, url, lines)
+        elif path and path not in ("/", "/login"):
+            # Login-only task, done as soon as the portal is past the login form
+            return "Logged in", [{"done": {"text": "Logged in to the portal", "success": True}}]
+        link = find("a", "Prior Authorization")
+        if link and path != "/pa":
+            return "Open the Prior Authorization section", self._click(link)
+        return "Open the portal", [{"go_to_url": {"url": self.portal_url, "new_tab": False}}]
+
+    @staticmethod
+    def _click(element: dict | None) -> list[dict]:
+        if element is None:
+            return [{"wait": {"seconds": 1}}]
+        return [{"click_element_by_index": {"index": element["index"]}}]
+
+    def _login(self, task: str, find) -> list[dict]:
+        username = re.search(r"Username:\s*([^,\s]+)", task)
+        password = re.search(r"Password:\s*([^,\s]+)", task)
+        actions = []
+        for name, value in (("username", username.group(1) if username else self.username),
+                            ("password", password.group(1) if password else self.password)):
+            element = find("input", name=name)
+            if element:
+                actions.append({"input_text": {"index": element["index"], "text": value}})
+        return actions + self._click(find("button", "Log in"))
+
+    def _form_step(self, task: str, path: str, find) -> list[dict]:
+        payload_text = task[task.find("{", task.find("provided data:")):]
+        try:
+            payload, _ = json.JSONDecoder().raw_decode(payload_text)
+        except ValueError:
+            payload = {}
+        missing = re.search(r'fill it with "([^"]*)"', task)
+        missing_date = re.search(r'date field is not available in the provided data, use "([^"]*)"', task)
+
+        pending = []
+        for name, (section, field, kind) in _FIELDS.items():
+            tag = "select" if isinstance(kind, tuple) else "textarea" if kind == "textarea" else "input"
+            element = find(tag, name=name)
+            if element is None or (path, name) in self._done:
+                continue
+            value = (payload.get(section) or {}).get(field)
+            if value in (None, ""):
+                default = missing_date if "Date" in field else missing
+                value = default.group(1) if default else "N/A"
+            if isinstance(kind, tuple):
+                value = value if value in kind else kind[0]
+                pending.append((name, {"select_dropdown_option": {"index": element["index"], "text": value}}))
+            else:
+                pending.append((name, {"input_text": {"index": element["index"], "text": str(value)}}))
+        upload = find("input", type="file")
+        if upload and (path, "upload") not in self._done and "Files to attach: none" not in task:
+            pending.append(("upload", {"upload_file": {"index": upload["index"], "file_type": "pdf"}}))
+
+        batch = pending[:self.actions_per_reply]
+        for name, _action in batch:
+            self._done.add((path, name))
+        actions = [action for _name, action in batch]
+        if len(pending) < self.actions_per_reply:
+            actions += self._click(find("button", "Submit") or find("button", "Next"))
+        return actions
+
+    def _check_status(self, task: str, url: str, lines: list[str]) -> list[dict]:
+        tracking_id = re.search(r"PA Request ID: (PA-\d+)", task)
+        interval = re.search(r"Wait (\d+) seconds", task)
+        if tracking_id is None or tracking_id.group(1) not in lines:
+            return [{"scroll": {"down": True, "num_pages": 1}}]
+        tracking_id = tracking_id.group(1)
+        position = lines.index(tracking_id)
+        if FINAL_STATUS in lines[position + 1:position + 4]:
+            return [{"done": {"text": f"PA Request {tracking_id} has been APPROVED", "success": True}}]
+        # Not approved yet: wait the interval, then reload the table
+        return [
+            {"wait": {"seconds": int(interval.group(1)) if interval else 1}},
+            {"go_to_url": {"url": url, "new_tab": False}},
+        ]